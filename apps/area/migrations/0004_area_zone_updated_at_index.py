@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('area', '0003_alter_workingday_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='area',
+            index=models.Index(fields=['updated_at', 'id'], name='area_area_updated_3bef14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zone',
+            index=models.Index(fields=['updated_at', 'id'], name='area_zone_updated_ac1fef_idx'),
+        ),
+    ]
@@ -24,6 +24,9 @@ class Zone(BaseModel):
         verbose_name = "Zone"
         verbose_name_plural = "Zones"
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -51,6 +54,9 @@ class Area(BaseModel):
         verbose_name = "Area"
         verbose_name_plural = "Areas"
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),
+        ]
 
     def __str__(self):
         return self.name
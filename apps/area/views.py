@@ -2,10 +2,12 @@ from rest_framework import viewsets, mixins, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .models import Zone, Area, WorkingDay
 from .serializers import ZoneSerializer, AreaSerializer, WorkingDaySerializer
+from apps.core.delta import DeltaSyncMixin
 from apps.core.utils import DefaultPagination
 
 # utils
@@ -14,6 +16,7 @@ from drf_spectacular.utils import extend_schema
 
 @extend_schema(tags=["Zones"])
 class ZoneViewSet(
+    DeltaSyncMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -27,7 +30,12 @@ class ZoneViewSet(
 
     http_method_names = ["get", "post", "patch", "delete"]
 
-    queryset = Zone.objects.all()
+    queryset = Zone.objects.prefetch_related(
+        Prefetch(
+            "areas",
+            queryset=Area.objects.select_related("zone").prefetch_related("working_days"),
+        )
+    )
     serializer_class = ZoneSerializer
     pagination_class = DefaultPagination
     permission_classes = [IsAuthenticated]
@@ -44,6 +52,7 @@ class ZoneViewSet(
 
 @extend_schema(tags=["Zones Areas"])
 class AreaViewSet(
+    DeltaSyncMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -1,4 +1,30 @@
 from django.contrib import admin
 
+from .models import IdempotencyKey, Sequence, Tombstone
+
 # Register your models here.
-admin.site.site_header = "Kiron Enterprice"
\ No newline at end of file
+admin.site.site_header = "Kiron Enterprice"
+
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ["prefix", "year", "last_value", "updated_at"]
+    search_fields = ["prefix"]
+    list_filter = ["prefix", "year"]
+    readonly_fields = ["created_at", "updated_at"]
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ["key", "user", "method", "path", "status_code", "created_at", "expires_at"]
+    search_fields = ["key", "user__username", "path"]
+    list_filter = ["method", "status_code"]
+    readonly_fields = [field.name for field in IdempotencyKey._meta.fields]
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ["model", "object_id", "deleted_at"]
+    search_fields = ["object_id"]
+    list_filter = ["model"]
+    readonly_fields = [field.name for field in Tombstone._meta.fields]
@@ -0,0 +1,94 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that resolves from a batch loaded up front by
+    BatchedListSerializer, instead of one query per row. Used on its own it
+    behaves exactly like PrimaryKeyRelatedField.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batch = None
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def normalize_pk(self, data):
+        """The pk as the model field stores it, or None when it cannot be one."""
+        if isinstance(data, bool):
+            return None
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            return None
+
+    def load_batch(self, values):
+        pks = {
+            pk
+            for pk in (self.normalize_pk(value) for value in values if value not in (None, ""))
+            if pk is not None
+        }
+        self.batch = self.get_queryset().in_bulk(pks) if pks else {}
+
+    def to_internal_value(self, data):
+        if self.batch is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+        pk = self.normalize_pk(data)
+        if pk is None:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return self.batch[pk]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """
+    ``many=True`` form of BatchedPrimaryKeyRelatedField: all ids in the list
+    are resolved with one ``IN`` query.
+    """
+
+    def to_internal_value(self, data):
+        child = self.child_relation
+        if isinstance(data, str) or not hasattr(data, "__iter__") or child.batch is not None:
+            return super().to_internal_value(data)
+        data = list(data)
+        child.load_batch(data)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            child.batch = None
+
+
+class BatchedListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer that loads every BatchedPrimaryKeyRelatedField of its
+    child with one ``IN`` query per field before validating the rows.
+    """
+
+    def batched_fields(self):
+        return {
+            name: field
+            for name, field in self.child.fields.items()
+            if isinstance(field, BatchedPrimaryKeyRelatedField) and not field.read_only
+        }
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            rows = [row for row in data if isinstance(row, dict)]
+            for name, field in self.batched_fields().items():
+                field.load_batch(row.get(name) for row in rows)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            for field in self.batched_fields().values():
+                field.batch = None
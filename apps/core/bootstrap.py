@@ -0,0 +1,76 @@
+import hashlib
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from apps.core.models import Sequence
+from apps.core.utils import next_sequence_value
+
+# The reference data version is kept in a Sequence row, so every worker
+# (and every cache backend) sees the same number.
+BOOTSTRAP_SEQUENCE = "BOOTSTRAP"
+BOOTSTRAP_CACHE_KEY = "core:bootstrap:{}"
+BOOTSTRAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def bootstrap_version() -> str:
+    """
+    Current version hash of the reference data.
+
+    Derived from the counter row's id and value, so a recreated row (fresh
+    database) never collides with an ETag a client still holds.
+    """
+    row = (
+        Sequence.objects.filter(prefix=BOOTSTRAP_SEQUENCE, year=0)
+        .values_list("id", "last_value")
+        .first()
+    )
+    return hashlib.sha1(repr(row).encode()).hexdigest()[:20]
+
+
+def bump_bootstrap_version():
+    """Move the version forward once the current transaction commits."""
+    transaction.on_commit(lambda: next_sequence_value(BOOTSTRAP_SEQUENCE))
+
+
+def build_bootstrap_payload() -> dict:
+    """Serialize all reference data with a fixed number of queries."""
+    from apps.area.models import Area, WorkingDay, Zone
+    from apps.area.serializers import AreaSerializer, WorkingDaySerializer, ZoneSerializer
+    from apps.inventory.models import StockType
+    from apps.inventory.serializers import StockTypeOptionSerializer
+    from apps.product.models import Product, ProductPrice
+    from apps.product.serializers import ProductCatalogSerializer
+    from apps.user.serializers import GroupSerializer
+
+    areas = Area.objects.select_related("zone").prefetch_related("working_days")
+    zones = Zone.objects.prefetch_related(Prefetch("areas", queryset=areas))
+    products = Product.objects.select_related("brand").prefetch_related(
+        Prefetch("prices", queryset=ProductPrice.objects.order_by("-created_at"))
+    )
+    return {
+        "zones": ZoneSerializer(zones, many=True).data,
+        "areas": AreaSerializer(areas, many=True).data,
+        "working_days": WorkingDaySerializer(
+            WorkingDay.objects.order_by("name"), many=True
+        ).data,
+        "groups": GroupSerializer(Group.objects.order_by("name"), many=True).data,
+        "stock_types": StockTypeOptionSerializer(
+            StockType.objects.order_by("name"), many=True
+        ).data,
+        "products": ProductCatalogSerializer(products.order_by("name"), many=True).data,
+    }
+
+
+def get_bootstrap():
+    """(version, payload), building and caching the payload on a miss."""
+    version = bootstrap_version()
+    key = BOOTSTRAP_CACHE_KEY.format(version)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_bootstrap_payload()
+        payload["version"] = version
+        cache.set(key, payload, BOOTSTRAP_CACHE_TIMEOUT)
+    return version, payload
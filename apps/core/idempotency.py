@@ -0,0 +1,128 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from apps.core.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field("key").max_length
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used for a different request."
+    default_code = "idempotency_key_reused"
+
+
+class _Replay(Exception):
+    """Raised from ``initial()`` to answer with a stored response instead of the handler."""
+
+    def __init__(self, record):
+        self.record = record
+
+
+def request_fingerprint(request):
+    """sha256 of the method, full path and raw body of ``request``."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.get_full_path()}\n".encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def claim_key(request, key):
+    """
+    Reserve ``key`` for this request, or raise _Replay with the response
+    stored for an earlier request with the same key and fingerprint.
+
+    Must run inside the transaction that wraps the request: a concurrent
+    retry blocks on the unique (user, key) index until the first attempt
+    commits, then replays its response.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValidationError(
+            {IDEMPOTENCY_HEADER: f"Ensure this header has no more than {MAX_KEY_LENGTH} characters."}
+        )
+    fingerprint = request_fingerprint(request)
+    now = timezone.now()
+
+    record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+    if record is not None and record.expires_at <= now:
+        record.delete()
+        record = None
+    if record is None:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    method=request.method,
+                    path=request.path[: IdempotencyKey._meta.get_field("path").max_length],
+                    fingerprint=fingerprint,
+                    expires_at=now + datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+                )
+        except IntegrityError:
+            record = IdempotencyKey.objects.get(user=request.user, key=key)
+
+    if record.fingerprint != fingerprint:
+        raise IdempotencyKeyReused()
+    raise _Replay(record)
+
+
+def purge_expired_keys(now=None):
+    """Delete idempotency keys past their expiry; returns the number deleted."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
+
+
+class IdempotencyMixin:
+    """
+    Viewset mixin that honours an ``Idempotency-Key`` header on POST.
+
+    The first request with a key runs in one transaction together with the
+    key row, and a successful (2xx) response is stored on it. A retry with
+    the same key and the same method, path and body gets that response back
+    (with ``Idempotent-Replayed: true``) after one indexed lookup and
+    nothing is posted again; the same key on a different request is a 422.
+    A failed request is rolled back, key included, so it can be retried.
+    Keys live for IDEMPOTENCY_KEY_TTL_HOURS.
+    """
+
+    idempotency_record = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == "POST" and request.headers.get(IDEMPOTENCY_HEADER):
+            with transaction.atomic():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method == "POST" and key and request.user.is_authenticated:
+            self.idempotency_record = claim_key(request, key)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _Replay):
+            response = Response(exc.record.response, status=exc.record.status_code)
+            response[REPLAYED_HEADER] = "true"
+            return response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        record = self.idempotency_record
+        if record is not None:
+            self.idempotency_record = None
+            if status.is_success(response.status_code):
+                record.status_code = response.status_code
+                record.response = getattr(response, "data", None)
+                record.save(update_fields=["status_code", "response", "updated_at"])
+            else:
+                transaction.set_rollback(True)
+        return super().finalize_response(request, response, *args, **kwargs)
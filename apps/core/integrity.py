@@ -0,0 +1,223 @@
+"""
+Ledger integrity checks run by ``manage.py check_ledger_integrity``.
+
+Each check works on one chunk of keys, given as an inclusive primary key
+range, so the command can spread the chunks over a process pool:
+
+- ``order_lines`` (orders): the stock legs every OrderItem, DamageOrderItem
+  and FreeOfferItem should have posted, against the StockTransaction rows
+  linked to the line;
+- ``stock_balances`` (products): StockBalance against the ledger totals;
+- ``customer_balances`` (customers): Customer due_sell/due_collection
+  against their DueSell/DueCollection rows.
+
+A check returns its discrepancies as plain dicts and, with ``repair``,
+fixes them in one atomic block per chunk.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+
+from apps.crm.balances import BALANCE_SOURCES, drifted_customers, reconcile_balances
+from apps.crm.models import Customer
+from apps.inventory.models import StockBalance, StockTransaction, TransactionType
+from apps.inventory.summaries import ledger_totals, rebuild_balances
+from apps.product.models import Product
+from apps.sales.models import DamageOrderItem, FreeOfferItem, OrderDelivery, OrderItem
+from apps.sales.services import (
+    build_adjustment_transactions,
+    build_damage_order_item_transactions,
+    build_free_offer_item_transactions,
+    build_order_item_transactions,
+    get_stock_type_ids,
+)
+
+# StockTransaction link field -> (line model, builder of its expected legs).
+LINE_SOURCES = {
+    "order_item": (OrderItem, build_order_item_transactions),
+    "damage_order_item": (DamageOrderItem, build_damage_order_item_transactions),
+    "free_offer_item": (FreeOfferItem, build_free_offer_item_transactions),
+}
+LINE_CHUNK_SIZE = 2000
+
+
+def _signed(transaction_type, ctn, pcs):
+    direction = 1 if transaction_type == TransactionType.IN else -1
+    return direction * ctn, direction * pcs
+
+
+def check_order_lines(lo, hi, repair=False):
+    """Compare the stock legs of the lines of orders ``lo``..``hi`` with the ledger."""
+    stock_type_ids = get_stock_type_ids()
+    discrepancies = []
+    for field, (model, build) in LINE_SOURCES.items():
+        lines = {}
+        expected = defaultdict(lambda: [0, 0])
+        queryset = model.objects.filter(order_id__gte=lo, order_id__lte=hi).select_related(
+            "order", "price"
+        )
+        for line in queryset.iterator(chunk_size=LINE_CHUNK_SIZE):
+            lines[line.pk] = line
+            for leg in build(line, stock_type_ids):
+                ctn, pcs = _signed(leg.transaction_type, leg.ctn_quantity, leg.piece_quantity)
+                expected[(line.pk, leg.stock_type_id)][0] += ctn
+                expected[(line.pk, leg.stock_type_id)][1] += pcs
+
+        actual = defaultdict(lambda: [0, 0])
+        ledger = StockTransaction.objects.filter(
+            **{f"{field}__order_id__gte": lo, f"{field}__order_id__lte": hi}
+        ).values_list(f"{field}_id", "stock_type_id", "transaction_type", "ctn_quantity", "piece_quantity")
+        for line_id, stock_type_id, transaction_type, ctn, pcs in ledger.iterator(
+            chunk_size=LINE_CHUNK_SIZE
+        ):
+            signed = _signed(transaction_type, ctn, pcs)
+            actual[(line_id, stock_type_id)][0] += signed[0]
+            actual[(line_id, stock_type_id)][1] += signed[1]
+
+        drifted_lines = set()
+        for key in expected.keys() | actual.keys():
+            if expected.get(key, [0, 0]) == actual.get(key, [0, 0]):
+                continue
+            line_id, stock_type_id = key
+            drifted_lines.add(line_id)
+            discrepancies.append(
+                {
+                    "check": "order_lines",
+                    "line_type": field,
+                    "line": line_id,
+                    "order": lines[line_id].order_id,
+                    "product": lines[line_id].product_id,
+                    "stock_type": stock_type_id,
+                    "expected_ctn_quantity": expected.get(key, [0, 0])[0],
+                    "actual_ctn_quantity": actual.get(key, [0, 0])[0],
+                    "expected_piece_quantity": expected.get(key, [0, 0])[1],
+                    "actual_piece_quantity": actual.get(key, [0, 0])[1],
+                }
+            )
+        if repair and drifted_lines:
+            _repair_lines(field, [lines[line_id] for line_id in drifted_lines], build, stock_type_ids)
+    return discrepancies
+
+
+def _repair_lines(field, lines, build, stock_type_ids):
+    """Post compensating adjustments that bring each line's legs back to what it implies."""
+    posted = defaultdict(list)
+    rows = StockTransaction.objects.filter(**{f"{field}__in": lines}).select_related(
+        "product_price", "order_item", "damage_order_item", "free_offer_item"
+    )
+    for row in rows:
+        posted[getattr(row, f"{field}_id")].append(row)
+
+    adjustments = []
+    for line in lines:
+        adjustments.extend(
+            build_adjustment_transactions(
+                posted[line.pk],
+                build(line, stock_type_ids),
+                f"Integrity repair for order {line.order.order_number}",
+            )
+        )
+    with transaction.atomic():
+        StockTransaction.objects.bulk_post(adjustments)
+
+
+def check_stock_balances(lo, hi, repair=False):
+    """Compare StockBalance rows of products ``lo``..``hi`` with the ledger totals."""
+    product_range = {"product_id__gte": lo, "product_id__lte": hi}
+    stored = {
+        (row["product_id"], row["stock_type_id"]): (
+            row["ctn_quantity"],
+            row["piece_quantity"],
+            row["total_price"],
+        )
+        for row in StockBalance.objects.filter(**product_range).values(
+            "product_id", "stock_type_id", "ctn_quantity", "piece_quantity", "total_price"
+        )
+    }
+    ledger = {
+        (row["product_id"], row["stock_type_id"]): (
+            row["ctn_total"] or 0,
+            row["piece_total"] or 0,
+            row["price_total"] or 0,
+        )
+        for row in ledger_totals(StockTransaction.objects.filter(**product_range))
+    }
+
+    discrepancies = []
+    zero = (0, 0, 0)
+    for key in stored.keys() | ledger.keys():
+        if stored.get(key, zero) == ledger.get(key, zero):
+            continue
+        product_id, stock_type_id = key
+        (ctn, pcs, value), (ledger_ctn, ledger_pcs, ledger_value) = (
+            stored.get(key, zero),
+            ledger.get(key, zero),
+        )
+        discrepancies.append(
+            {
+                "check": "stock_balances",
+                "product": product_id,
+                "stock_type": stock_type_id,
+                "stored_ctn_quantity": ctn,
+                "ledger_ctn_quantity": ledger_ctn,
+                "stored_piece_quantity": pcs,
+                "ledger_piece_quantity": ledger_pcs,
+                "stored_total_price": value,
+                "ledger_total_price": ledger_value,
+            }
+        )
+    if repair and discrepancies:
+        rebuild_balances(product_ids={row["product"] for row in discrepancies})
+    return discrepancies
+
+
+def check_customer_balances(lo, hi, repair=False):
+    """Compare the stored totals of customers ``lo``..``hi`` with their DueSell/DueCollection rows."""
+    customer_ids = Customer.objects.filter(pk__gte=lo, pk__lte=hi).values("pk")
+    discrepancies = []
+    for customer in drifted_customers(customer_ids):
+        for field in BALANCE_SOURCES:
+            stored, ledger = getattr(customer, field), getattr(customer, f"ledger_{field}")
+            if stored != ledger:
+                discrepancies.append(
+                    {
+                        "check": "customer_balances",
+                        "customer": customer.pk,
+                        "field": field,
+                        "stored": stored,
+                        "ledger": ledger,
+                    }
+                )
+    if repair and discrepancies:
+        reconcile_balances({row["customer"] for row in discrepancies})
+    return discrepancies
+
+
+# Check name -> (model whose primary keys are chunked, check function).
+CHECKS = {
+    "order_lines": (OrderDelivery, check_order_lines),
+    "stock_balances": (Product, check_stock_balances),
+    "customer_balances": (Customer, check_customer_balances),
+}
+
+
+def key_ranges(model, chunk_size):
+    """Inclusive (first pk, last pk) ranges covering ``model`` in chunks of ``chunk_size`` rows."""
+    first = last = None
+    count = 0
+    for pk in model.objects.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=10000):
+        if first is None:
+            first = pk
+        last = pk
+        count += 1
+        if count == chunk_size:
+            yield first, last
+            first, count = None, 0
+    if first is not None:
+        yield first, last
+
+
+def run_check(check, lo, hi, repair=False):
+    """Pool entry point: run one check on one chunk."""
+    return check, CHECKS[check][1](lo, hi, repair=repair)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses past their expiry"
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired idempotency key(s)."))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.delta import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete change feed tombstones older than TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {deleted} tombstone(s) older than {settings.TOMBSTONE_RETENTION_DAYS} day(s)."
+            )
+        )
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:45
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('prefix', models.CharField(max_length=50)),
+                ('year', models.PositiveIntegerField(default=0)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequence',
+                'verbose_name_plural': 'Sequences',
+                'ordering': ['prefix', '-year'],
+                'constraints': [models.UniqueConstraint(fields=('prefix', 'year'), name='unique_sequence_prefix_year')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:38
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('model', models.CharField(help_text='app_label.model_name of the deleted row', max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('deleted_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Tombstone',
+                'verbose_name_plural': 'Tombstones',
+                'ordering': ['-deleted_at'],
+                'indexes': [models.Index(fields=['model', 'deleted_at'], name='core_tombst_model_d38920_idx'), models.Index(fields=['deleted_at'], name='core_tombst_deleted_51085d_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,10 @@
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 import uuid
 
+User = get_user_model()
+
 
 # Create your models here.
 class BaseModel(models.Model):
@@ -9,4 +13,94 @@ class BaseModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class Sequence(BaseModel):
+    """
+    Named counter used to hand out document numbers (orders, SKUs, vouchers).
+
+    One row per (prefix, year); ``year`` is 0 for sequences that never reset.
+    Each value is taken under a row lock, so numbers stay unique across
+    workers; inside a transaction it is taken on a separate connection (see
+    next_sequence_value). Values are never handed back, so a rolled-back
+    transaction may leave a gap.
+    """
+
+    prefix = models.CharField(max_length=50)
+    year = models.PositiveIntegerField(default=0)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Sequence"
+        verbose_name_plural = "Sequences"
+        ordering = ["prefix", "-year"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["prefix", "year"], name="unique_sequence_prefix_year"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.prefix}-{self.year}: {self.last_value}" if self.year else f"{self.prefix}: {self.last_value}"
+
+
+class IdempotencyKey(BaseModel):
+    """
+    Stored outcome of a POST sent with an ``Idempotency-Key`` header.
+
+    A retry with the same key (per user) gets the stored response back
+    instead of running the request again; ``fingerprint`` hashes the method,
+    path and body, so a key reused for a different request is rejected.
+    Rows expire at ``expires_at`` and are deleted by purge_idempotency_keys.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Idempotency Key"
+        verbose_name_plural = "Idempotency Keys"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key_per_user"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.method} {self.path})"
+
+
+class Tombstone(BaseModel):
+    """
+    Marks a deleted row for the ``changes/`` feeds (apps.core.delta), so
+    clients syncing with ``?updated_since=`` learn about deletions. Rows
+    older than TOMBSTONE_RETENTION_DAYS are deleted by purge_tombstones.
+    """
+
+    model = models.CharField(max_length=100, help_text="app_label.model_name of the deleted row")
+    object_id = models.CharField(max_length=64)
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Tombstone"
+        verbose_name_plural = "Tombstones"
+        ordering = ["-deleted_at"]
+        indexes = [
+            models.Index(fields=["model", "deleted_at"]),
+            models.Index(fields=["deleted_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
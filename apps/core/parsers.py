@@ -0,0 +1,85 @@
+import codecs
+import csv
+import gzip
+import io
+import json
+import zlib
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+def read_csv_rows(stream, encoding=None):
+    """
+    Rows of a CSV file (header line first) as dicts. Empty cells are left
+    out so the serializer applies its defaults; a UTF-8 BOM is ignored.
+    """
+    encoding = encoding or settings.DEFAULT_CHARSET
+    if encoding.lower().replace("-", "") == "utf8":
+        encoding = "utf-8-sig"
+    try:
+        reader = csv.DictReader(codecs.getreader(encoding)(stream))
+        rows = [
+            {
+                key.strip(): value.strip()
+                for key, value in row.items()
+                if key and isinstance(value, str) and value.strip()
+            }
+            for row in reader
+        ]
+    except (csv.Error, UnicodeDecodeError, LookupError) as exc:
+        raise ParseError(f"CSV parse error - {exc}")
+    return rows
+
+
+class CSVParser(BaseParser):
+    """Parses a text/csv body into a list of row dicts."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        return read_csv_rows(stream, parser_context.get("encoding"))
+
+
+class NDJSONParser(BaseParser):
+    """Parses a newline-delimited JSON body (one object per line) into a list."""
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        rows = []
+        number = 0
+        try:
+            for number, line in enumerate(codecs.getreader(encoding)(stream), start=1):
+                if line.strip():
+                    rows.append(json.loads(line))
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f"NDJSON parse error on line {number} - {exc}")
+        return rows
+
+
+class GzipJSONParser(JSONParser):
+    """
+    JSONParser that also takes a body sent with ``Content-Encoding: gzip``.
+    The inflated body may not exceed DATA_UPLOAD_MAX_MEMORY_SIZE.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context.get("request")
+        encoding = request.META.get("HTTP_CONTENT_ENCODING", "") if request is not None else ""
+        if stream is not None and encoding.strip().lower() == "gzip":
+            limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+            try:
+                with gzip.GzipFile(fileobj=stream) as inflated:
+                    body = inflated.read(-1 if limit is None else limit + 1)
+            except (OSError, EOFError, zlib.error) as exc:
+                raise ParseError(f"Gzip decode error - {exc}")
+            if limit is not None and len(body) > limit:
+                raise ParseError("Decompressed request body is too large.")
+            stream = io.BytesIO(body)
+        return super().parse(stream, media_type, parser_context)
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from django.apps import apps
+from django.db import transaction
+
+# Lookup tables held in memory: registry name -> model label. All are small,
+# keyed by a unique ``name`` and only change through setup or the admin.
+LOOKUP_MODELS = {
+    "stock_types": "inventory.StockType",
+    "working_days": "area.WorkingDay",
+    "groups": "auth.Group",
+}
+# Writes clear the table in the writing process at once; other worker
+# processes pick them up when their copy expires, or on a lookup of a name or
+# id their copy lacks (e.g. a row added by ``manage.py setup``).
+LOOKUP_TTL = 300
+# A copy is reloaded for a missing name at most this often, so lookups of a
+# row that really does not exist do not query on every call.
+LOOKUP_MISS_RELOAD = 1
+
+
+class LookupRegistry:
+    """
+    Process-wide name <-> id maps of the LOOKUP_MODELS tables.
+
+    Each table is read with one query on first use and kept for LOOKUP_TTL
+    seconds, so hot paths resolve names to ids (and back) without touching
+    the database. apps.core.signals clears a table when it is written; a
+    lookup that misses reloads the table once first, so rows written by
+    another process are found before their copy expires.
+    """
+
+    def __init__(self, models=LOOKUP_MODELS, ttl=LOOKUP_TTL, miss_reload=LOOKUP_MISS_RELOAD):
+        self.models = models
+        self.ttl = ttl
+        self.miss_reload = miss_reload
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _table(self, table, max_age=None):
+        entry = self._tables.get(table)
+        max_age = self.ttl if max_age is None else max_age
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            model = apps.get_model(self.models[table])
+            ids = dict(model.objects.values_list("name", "id"))
+            entry = (time.monotonic(), ids, {pk: name for name, pk in ids.items()})
+            with self._lock:
+                self._tables[table] = entry
+        return entry
+
+    def _lookup(self, table, index, keys):
+        """Table ``index`` (1: by name, 2: by id), reloaded once if any of ``keys`` is missing."""
+        mapping = self._table(table)[index]
+        if any(key not in mapping for key in keys):
+            mapping = self._table(table, max_age=self.miss_reload)[index]
+        return mapping
+
+    def ids(self, table, required=()) -> dict:
+        """name -> id for every row of ``table``; reloaded first when a ``required`` name is missing."""
+        return dict(self._lookup(table, 1, required))
+
+    def names(self, table, required=()) -> dict:
+        """id -> name for every row of ``table``; reloaded first when a ``required`` id is missing."""
+        return dict(self._lookup(table, 2, required))
+
+    def id_for(self, table, name):
+        """Id of the row called ``name`` (None when there is none)."""
+        return self._lookup(table, 1, (name,)).get(name)
+
+    def name_for(self, table, pk):
+        """Name of the row with id ``pk`` (None when there is none)."""
+        return self._lookup(table, 2, (pk,)).get(pk)
+
+    def invalidate(self, table=None):
+        """Drop one table (or all) so the next lookup reloads it."""
+        with self._lock:
+            if table is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(table, None)
+
+
+registry = LookupRegistry()
+
+
+def invalidate_lookup(table):
+    """Clear ``table`` now and again on commit, so a rolled back write never sticks."""
+    registry.invalidate(table)
+    transaction.on_commit(lambda: registry.invalidate(table))
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+
+from apps.area.serializers import AreaSerializer, WorkingDaySerializer, ZoneSerializer
+from apps.inventory.serializers import StockTypeOptionSerializer
+from apps.product.serializers import ProductCatalogSerializer
+from apps.user.serializers import GroupSerializer
+
+
+class BootstrapSerializer(serializers.Serializer):
+    """Shape of the /core/bootstrap/ payload (used for the API schema)."""
+
+    version = serializers.CharField()
+    zones = ZoneSerializer(many=True)
+    areas = AreaSerializer(many=True)
+    working_days = WorkingDaySerializer(many=True)
+    groups = GroupSerializer(many=True)
+    stock_types = StockTypeOptionSerializer(many=True)
+    products = ProductCatalogSerializer(many=True)
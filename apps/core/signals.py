@@ -0,0 +1,126 @@
+from django.contrib.auth.models import Group, User
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from apps.area.models import Area, WorkingDay, Zone
+from apps.core.bootstrap import bump_bootstrap_version
+from apps.core.delta import record_tombstone, touch
+from apps.core.registry import LOOKUP_MODELS, invalidate_lookup
+from apps.core.utils import close_sequence_connection
+from apps.crm.models import Customer
+from apps.inventory.models import StockType
+from apps.product.models import Brand, Product, ProductPrice
+from apps.user.models import Profile
+
+# Models served by the bootstrap endpoint; any write to them invalidates it.
+BOOTSTRAP_MODELS = (Zone, Area, WorkingDay, Group, StockType, Brand, Product, ProductPrice)
+
+
+def bump_bootstrap_version_on_change(sender, **kwargs):
+    bump_bootstrap_version()
+
+
+def bump_bootstrap_version_on_m2m_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_bootstrap_version()
+
+
+for model in BOOTSTRAP_MODELS:
+    post_save.connect(
+        bump_bootstrap_version_on_change,
+        sender=model,
+        dispatch_uid=f"bootstrap_version_save_{model._meta.label_lower}",
+    )
+    post_delete.connect(
+        bump_bootstrap_version_on_change,
+        sender=model,
+        dispatch_uid=f"bootstrap_version_delete_{model._meta.label_lower}",
+    )
+
+m2m_changed.connect(
+    bump_bootstrap_version_on_m2m_change,
+    sender=Area.working_days.through,
+    dispatch_uid="bootstrap_version_area_working_days",
+)
+
+
+def invalidate_lookup_on_change(sender, **kwargs):
+    for table, label in LOOKUP_MODELS.items():
+        if sender._meta.label == label:
+            invalidate_lookup(table)
+
+
+for model in (StockType, WorkingDay, Group):
+    post_save.connect(
+        invalidate_lookup_on_change,
+        sender=model,
+        dispatch_uid=f"lookup_registry_save_{model._meta.label_lower}",
+    )
+    post_delete.connect(
+        invalidate_lookup_on_change,
+        sender=model,
+        dispatch_uid=f"lookup_registry_delete_{model._meta.label_lower}",
+    )
+
+
+# Models served by the ?updated_since= change feeds; deletions leave a
+# Tombstone behind. Users stand for the staff/delivery person feeds.
+DELTA_MODELS = (Customer, Product, Zone, Area, User)
+
+# Nested model -> FK to the parent whose feed row embeds it; a change to
+# the nested row moves the parent's updated_at.
+DELTA_PARENTS = {ProductPrice: "product", Area: "zone"}
+
+
+for model in DELTA_MODELS:
+    post_delete.connect(
+        record_tombstone,
+        sender=model,
+        dispatch_uid=f"delta_tombstone_{model._meta.label_lower}",
+    )
+
+
+def touch_delta_parent(sender, instance, **kwargs):
+    field = sender._meta.get_field(DELTA_PARENTS[sender])
+    touch(field.related_model, getattr(instance, field.attname))
+
+
+for model in DELTA_PARENTS:
+    post_save.connect(
+        touch_delta_parent,
+        sender=model,
+        dispatch_uid=f"delta_parent_save_{model._meta.label_lower}",
+    )
+    post_delete.connect(
+        touch_delta_parent,
+        sender=model,
+        dispatch_uid=f"delta_parent_delete_{model._meta.label_lower}",
+    )
+
+
+def touch_profile_on_user_save(sender, instance, update_fields=None, **kwargs):
+    # Logins only move last_login, which no feed serves.
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    Profile.objects.filter(user=instance).update(updated_at=timezone.now())
+
+
+def touch_on_m2m_change(sender, instance, action, reverse, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear") and not reverse:
+        touch(type(instance), instance.pk)
+
+
+post_save.connect(
+    touch_profile_on_user_save,
+    sender=User,
+    dispatch_uid="delta_profile_user_save",
+)
+for through in (Profile.areas.through, Area.working_days.through):
+    m2m_changed.connect(
+        touch_on_m2m_change,
+        sender=through,
+        dispatch_uid=f"delta_m2m_{through._meta.label_lower}",
+    )
+
+request_finished.connect(close_sequence_connection, dispatch_uid="close_sequence_connection")
@@ -1,7 +1,355 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import itertools
+import json
+import threading
+import uuid
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    IntegrityError,
+    InterfaceError,
+    OperationalError,
+    connection,
+    connections,
+    transaction,
+)
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
     page_size = 50
     page_size_query_param = "page_size"
     max_page_size = 50
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over the queryset's full ordering.
+
+    The cursor carries the ordering values of the last row served, and the
+    next page is fetched with a lexicographic "after this row" filter plus
+    LIMIT, so deep pages cost the same as the first one and no COUNT(*) is
+    run. The primary key is appended as a tie-breaker, so orderings with
+    duplicate values (dates) are still walked exactly once. Backed by a
+    composite index on the same columns.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = DefaultPagination.page_size
+    page_size_query_param = DefaultPagination.page_size_query_param
+    max_page_size = DefaultPagination.max_page_size
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_ordering_fields(queryset)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = [
+            ("-" if descending != reverse else "") + field.attname
+            for field, descending in self.fields
+        ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering_fields(self, queryset):
+        """[(model field, descending)] for the queryset ordering plus the pk."""
+        meta = queryset.model._meta
+        ordering = list(queryset.query.order_by or meta.ordering)
+        fields = []
+        for name in ordering:
+            if not isinstance(name, str):
+                raise ValidationError({"ordering": "This ordering cannot be used with a cursor."})
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            try:
+                field = meta.pk if name == "pk" else meta.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or not field.concrete or field.null:
+                raise ValidationError(
+                    {"ordering": f"Ordering by '{name}' cannot be used with a cursor."}
+                )
+            fields.append((field, descending))
+        if not any(field.primary_key for field, _ in fields):
+            fields.append((meta.pk, fields[-1][1] if fields else False))
+        return fields
+
+    def after(self, position, reverse):
+        """
+        Lexicographic "strictly after position" filter for the ordering.
+
+        The OR-chain alone gives the planner no bound on the leading column,
+        so it is ANDed with a range on that column (``<=`` / ``>=`` the
+        cursor value); that range is what seeks into the composite index.
+        """
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.fields, position):
+            lookup = "lt" if descending != reverse else "gt"
+            condition |= equal & Q(**{f"{field.attname}__{lookup}": value})
+            equal &= Q(**{field.attname: value})
+        (field, descending), value = self.fields[0], position[0]
+        bound = "lte" if descending != reverse else "gte"
+        return Q(**{f"{field.attname}__{bound}": value}) & condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            values = payload["p"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value) for (field, _), value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get("r"))
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for field, _ in self.fields:
+            value = getattr(row, field.attname)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        payload = json.dumps({"p": values, "r": int(reverse)}, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(payload.encode("ascii")).decode("ascii")
+        url = remove_query_param(self.base_url, "page")
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class LedgerPagination(DefaultPagination):
+    """
+    Page-number pagination by default; switches to KeysetPagination when the
+    request carries ``?cursor=`` (an empty value starts at the first page).
+    Keyset pages have no ``count`` and follow the list ordering, including
+    ``?ordering=``.
+    """
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.keyset_class.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor; pass it empty to start. Replaces page numbers and skips the count.",
+                "schema": {"type": "string"},
+            }
+        ]
+
+
+# Per-thread connections that sequence values are taken on while the
+# caller is inside a transaction (see next_sequence_value).
+_sequence_connections = threading.local()
+
+
+def _sequence_connection():
+    """
+    This thread's own connection to the default database, opened on first
+    use and kept until close_sequence_connection(). It runs in autocommit.
+    """
+    side = getattr(_sequence_connections, "connection", None)
+    if side is None:
+        side = connections.create_connection(DEFAULT_DB_ALIAS)
+        _sequence_connections.connection = side
+    return side
+
+
+def close_sequence_connection(**kwargs):
+    """
+    Close this thread's sequence connection, if it has one.
+
+    Connected to request_finished, so a request never leaves it open on a
+    pooled worker thread. Code that takes sequence values outside a request
+    (management commands, worker threads) calls it when done.
+    """
+    side = getattr(_sequence_connections, "connection", None)
+    if side is not None:
+        _sequence_connections.connection = None
+        side.close()
+
+
+def _take_sequence_value(side, prefix, year, seed):
+    """Bump the (prefix, year) counter on ``side`` with single autocommitted statements."""
+    from apps.core.models import Sequence
+
+    meta = Sequence._meta
+    table = side.ops.quote_name(meta.db_table)
+    column = {field.name: side.ops.quote_name(field.column) for field in meta.concrete_fields}
+    now = timezone.now()
+    update = (
+        f"UPDATE {table} SET {column['last_value']} = {column['last_value']} + 1, "
+        f"{column['updated_at']} = %s WHERE {column['prefix']} = %s AND {column['year']} = %s "
+        f"RETURNING {column['last_value']}"
+    )
+    with side.cursor() as cursor:
+        cursor.execute(update, [now, prefix, year])
+        row = cursor.fetchone()
+        if row is None:
+            names = ["id", "created_at", "updated_at", "prefix", "year", "last_value"]
+            values = [
+                meta.pk.get_db_prep_value(uuid.uuid4(), side),
+                now,
+                now,
+                prefix,
+                year,
+                seed() if seed else 0,
+            ]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(column[name] for name in names)}) "
+                f"VALUES ({', '.join(['%s'] * len(names))}) "
+                f"ON CONFLICT ({column['prefix']}, {column['year']}) DO NOTHING",
+                values,
+            )
+            cursor.execute(update, [now, prefix, year])
+            row = cursor.fetchone()
+    return row[0]
+
+
+def peek_sequence_value(prefix, year=0, seed=None):
+    """
+    The value next_sequence_value() would take now, without taking it.
+
+    Only a preview: a concurrent caller may take the same value first.
+    """
+    from apps.core.models import Sequence
+
+    last_value = (
+        Sequence.objects.filter(prefix=prefix, year=year)
+        .values_list("last_value", flat=True)
+        .first()
+    )
+    if last_value is None:
+        last_value = seed() if seed else 0
+    return last_value + 1
+
+
+def sequence_values(prefix, year=0, seed=None, peek=False):
+    """
+    Successive values of the (prefix, year) sequence, for callers that skip
+    values already in use. Each one is taken with next_sequence_value(), or
+    with ``peek`` counted up from peek_sequence_value() without writing.
+    """
+    if peek:
+        yield from itertools.count(peek_sequence_value(prefix, year, seed))
+    while True:
+        yield next_sequence_value(prefix, year, seed)
+
+
+def next_sequence_value(prefix, year=0, seed=None):
+    """
+    Take the next value of the (prefix, year) sequence.
+
+    ``seed`` is an optional callable returning the value to start from when
+    the counter row does not exist yet (e.g. the highest number already in
+    use); it runs once per sequence.
+
+    Inside a transaction the value is taken on a separate autocommit
+    connection, so the counter row is locked for one statement rather than
+    until the caller commits, and concurrent callers (e.g. every order
+    being posted) do not queue behind each other. The value is kept if the
+    caller rolls back, leaving a gap. SQLite allows one writer at a time,
+    so there the counter is bumped in the caller's transaction.
+    """
+    from apps.core.models import Sequence
+
+    if connection.in_atomic_block and connection.vendor != "sqlite":
+        side = _sequence_connection()
+        try:
+            return _take_sequence_value(side, prefix, year, seed)
+        except (InterfaceError, OperationalError):
+            # The kept connection went away (server restart, idle timeout).
+            side.close()
+            return _take_sequence_value(side, prefix, year, seed)
+
+    with transaction.atomic():
+        sequence = (
+            Sequence.objects.select_for_update().filter(prefix=prefix, year=year).first()
+        )
+        if sequence is None:
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(
+                        prefix=prefix, year=year, last_value=seed() if seed else 0
+                    )
+            except IntegrityError:
+                # Another worker created the row first; lock theirs instead.
+                pass
+            sequence = Sequence.objects.select_for_update().get(prefix=prefix, year=year)
+
+        sequence.last_value += 1
+        sequence.save(update_fields=["last_value", "updated_at"])
+        return sequence.last_value
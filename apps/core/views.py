@@ -1,3 +1,45 @@
-from django.shortcuts import render
+from django.utils.http import parse_etags, quote_etag
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework import status, views
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from .bootstrap import bootstrap_version, get_bootstrap
+from .serializers import BootstrapSerializer
+
+
+@extend_schema(tags=["Bootstrap"])
+class BootstrapView(views.APIView):
+    """
+    All reference data a client needs on launch, in one payload: zones,
+    areas with working days, working days, groups, stock types and the
+    product catalog with prices.
+
+    The payload is cached per data version and served with an ETag; send it
+    back in If-None-Match to get a 304 when nothing changed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Reference data bundle",
+        responses={
+            200: BootstrapSerializer,
+            304: OpenApiResponse(description="Not modified since the given ETag"),
+        },
+    )
+    def get(self, request):
+        etag = quote_etag(bootstrap_version())
+        if_none_match = request.headers.get("If-None-Match")
+        # Compared weakly: proxies that compress the body mark the tag W/.
+        if if_none_match and etag in [
+            tag.removeprefix("W/") for tag in parse_etags(if_none_match)
+        ]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            version, payload = get_bootstrap()
+            etag = quote_etag(version)
+            response = Response(payload)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
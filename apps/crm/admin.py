@@ -13,6 +13,7 @@ class CustomerAdmin(admin.ModelAdmin):
         'area',
         'fridge_type',
         'opening_balance',
+        'balance',
         'due_limit',
         'order_discount_in_persentage',
         'have_special_discount',
@@ -33,7 +34,7 @@ class CustomerAdmin(admin.ModelAdmin):
         'contact_number',
         'address'
     ]
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['due_sell', 'due_collection', 'balance', 'created_at', 'updated_at']
     fieldsets = (
         ('Customer Information', {
             'fields': ('customer_id', 'name', 'shop_name_en', 'shop_name', 'contact_number', 'address', 'fridge_type')
@@ -42,7 +43,7 @@ class CustomerAdmin(admin.ModelAdmin):
             'fields': ('area',)
         }),
         ('Financial Information', {
-            'fields': ('opening_balance', 'due_limit', 'order_discount_in_persentage')
+            'fields': ('opening_balance', 'due_limit', 'order_discount_in_persentage', 'due_sell', 'due_collection', 'balance')
         }),
         ('Discount Information', {
             'fields': ('have_special_discount', 'special_discount_in_persentage')
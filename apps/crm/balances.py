@@ -0,0 +1,78 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.crm.models import Customer
+from apps.sales.models import DueCollection, DueSell
+
+# Customer running total -> the ledger model it sums.
+BALANCE_SOURCES = {
+    "due_sell": DueSell,
+    "due_collection": DueCollection,
+}
+
+
+def apply_amounts(field, rows, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) (customer_id, amount) rows on Customer.<field>.
+
+    All touched customers are moved with a single UPDATE of the form
+    field = field + CASE ..., so concurrent writers never lose an increment.
+    updated_at moves too, so the customer change feed picks up the balance.
+    """
+    deltas = defaultdict(Decimal)
+    for customer_id, amount in rows:
+        deltas[customer_id] += sign * Decimal(amount or 0)
+    deltas = {customer_id: delta for customer_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    delta = Case(
+        *[When(pk=customer_id, then=Value(value)) for customer_id, value in deltas.items()],
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    return Customer.objects.filter(pk__in=deltas).update(
+        **{field: F(field) + delta}, updated_at=timezone.now()
+    )
+
+
+def _ledger_total(model):
+    totals = (
+        model.objects.filter(customer=OuterRef("pk"))
+        .order_by()
+        .values("customer")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    return Coalesce(
+        Subquery(totals, output_field=DecimalField(max_digits=14, decimal_places=2)),
+        Value(Decimal("0.00")),
+    )
+
+
+def drifted_customers(customer_ids=None):
+    """Customers whose stored totals differ from their DueSell/DueCollection rows."""
+    customers = Customer.objects.all()
+    if customer_ids:
+        customers = customers.filter(pk__in=customer_ids)
+    customers = customers.annotate(
+        **{f"ledger_{field}": _ledger_total(model) for field, model in BALANCE_SOURCES.items()}
+    )
+    drift = Q()
+    for field in BALANCE_SOURCES:
+        drift |= ~Q(**{field: F(f"ledger_{field}")})
+    return customers.filter(drift)
+
+
+def reconcile_balances(customer_ids=None):
+    """Recompute the stored totals from the ledgers. Returns the number of customers updated."""
+    customers = Customer.objects.all()
+    if customer_ids:
+        customers = customers.filter(pk__in=customer_ids)
+    return customers.update(
+        **{field: _ledger_total(model) for field, model in BALANCE_SOURCES.items()},
+        updated_at=timezone.now(),
+    )
@@ -0,0 +1,29 @@
+import django_filters
+from django.db.models import F, Q
+
+from .models import Customer
+
+
+class CustomerFilter(django_filters.FilterSet):
+    """Filter customers, including stored balance ranges and due-limit status."""
+
+    balance_min = django_filters.NumberFilter(field_name="balance", lookup_expr="gte")
+    balance_max = django_filters.NumberFilter(field_name="balance", lookup_expr="lte")
+    over_due_limit = django_filters.BooleanFilter(method="filter_over_due_limit")
+
+    class Meta:
+        model = Customer
+        fields = {
+            "area": ["exact", "in"],
+            "fridge_type": ["exact"],
+            "have_special_discount": ["exact"],
+        }
+
+    def filter_over_due_limit(self, queryset, name, value):
+        """
+        Customers owing more than their due_limit (a negative balance beyond
+        the limit). Customers without a limit (due_limit = 0) never qualify.
+        """
+        queryset = queryset.alias(due_headroom=F("balance") + F("due_limit"))
+        over = Q(due_limit__gt=0, due_headroom__lt=0)
+        return queryset.filter(over) if value else queryset.exclude(over)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from apps.crm.balances import drifted_customers, reconcile_balances
+
+
+class Command(BaseCommand):
+    help = "Check Customer due_sell/due_collection totals against DueSell and DueCollection and repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--customer",
+            action="append",
+            dest="customers",
+            help="Customer UUID to reconcile (repeatable). Defaults to all customers.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report customers whose stored totals drifted",
+        )
+
+    def handle(self, *args, **options):
+        customer_ids = options["customers"]
+        drifted = list(
+            drifted_customers(customer_ids).values_list(
+                "id", "name", "due_sell", "ledger_due_sell", "due_collection", "ledger_due_collection"
+            )
+        )
+        for customer_id, name, due_sell, ledger_due_sell, due_collection, ledger_due_collection in drifted:
+            self.stdout.write(
+                f"{customer_id} {name}: due_sell {due_sell} -> {ledger_due_sell}, "
+                f"due_collection {due_collection} -> {ledger_due_collection}"
+            )
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(drifted)} customer(s) drifted (dry run)"))
+            return
+
+        if drifted:
+            reconcile_balances([customer_id for customer_id, *_ in drifted])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(drifted)} customer(s)"))
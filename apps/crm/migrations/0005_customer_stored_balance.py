@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:53
+
+from decimal import Decimal
+
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_customer_totals(apps, schema_editor):
+    Customer = apps.get_model("crm", "Customer")
+    DueSell = apps.get_model("sales", "DueSell")
+    DueCollection = apps.get_model("sales", "DueCollection")
+
+    def ledger_total(model):
+        totals = (
+            model.objects.filter(customer=OuterRef("pk"))
+            .order_by()
+            .values("customer")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        )
+        return Coalesce(
+            Subquery(totals, output_field=DecimalField(max_digits=14, decimal_places=2)),
+            Value(Decimal("0.00")),
+        )
+
+    Customer.objects.update(
+        due_sell=ledger_total(DueSell),
+        due_collection=ledger_total(DueCollection),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('area', '0003_alter_workingday_options'),
+        ('crm', '0004_customer_shop_name_en'),
+        ('sales', '0023_order_stored_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='due_collection',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total collected amount against due sells for this customer', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='due_sell',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total due sell amount for this customer', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='balance',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('opening_balance'), '+', models.F('due_collection')), '-', models.F('due_sell')), help_text='(opening balance + total collection) - total due sell', output_field=models.DecimalField(decimal_places=2, max_digits=14)),
+        ),
+        migrations.RunPython(backfill_customer_totals, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['balance'], name='crm_custome_balance_63578a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('balance'), '+', models.F('due_limit')), name='crm_customer_due_headroom_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('area', '0004_area_zone_updated_at_index'),
+        ('crm', '0005_customer_stored_balance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['updated_at', 'id'], name='crm_custome_updated_54921e_idx'),
+        ),
+    ]
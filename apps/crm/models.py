@@ -1,6 +1,5 @@
-from decimal import Decimal
-
 from django.db import models
+from django.db.models import F
 from apps.core.models import BaseModel
 from apps.area.models import Area
 
@@ -40,38 +39,56 @@ class Customer(BaseModel):
         max_length=50, choices=CustomerType.choices, null=True, blank=True
     )
 
-    @property
-    def due_sell(self):
-        """Total due sell amount for this customer."""
-        from django.db import models as dj_models
-
-        return (
-            self.due_sells.aggregate(total=dj_models.Sum("amount"))["total"]
-            or Decimal("0.00")
-        )
-
-    @property
-    def due_collection(self):
-        """Total collected amount against due sells for this customer."""
-        from django.db import models as dj_models
-
-        return (
-            self.due_collections.aggregate(total=dj_models.Sum("amount"))["total"]
-            or Decimal("0.00")
-        )
+    # Running totals maintained by apps.crm.balances from DueSell and
+    # DueCollection; "manage.py reconcile_customer_balances" rebuilds them.
+    due_sell = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total due sell amount for this customer",
+    )
+    due_collection = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total collected amount against due sells for this customer",
+    )
+    balance = models.GeneratedField(
+        expression=F("opening_balance") + F("due_collection") - F("due_sell"),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+        db_persist=True,
+        help_text="(opening balance + total collection) - total due sell",
+    )
 
-    @property
-    def balance(self):
-        """
-        Customer balance =
-        total due sell - (opening balance + total collection)
-        """
-        return (self.opening_balance + self.due_collection) - self.due_sell
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # due_sell/due_collection are moved with F() updates; never write
+            # back a possibly stale in-memory copy.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and not field.generated
+                and field.name not in ("due_sell", "due_collection")
+            ]
+        super().save(*args, **kwargs)
+        # balance is computed by the database; drop any stale copy so the next
+        # read loads the stored value.
+        self.__dict__.pop("balance", None)
 
     class Meta:
         verbose_name = "Customer"
         verbose_name_plural = "Customers"
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["balance"]),
+            models.Index(fields=["updated_at", "id"]),
+            models.Index(
+                F("balance") + F("due_limit"), name="crm_customer_due_headroom_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.shop_name}"
@@ -5,6 +5,7 @@ from apps.area.serializers.area import AreaSerializer
 
 class CustomerSerializer(serializers.ModelSerializer):
     area_details = AreaSerializer(source="area", read_only=True)
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
     
     class Meta:
         model = Customer
@@ -1,3 +1,82 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.crm.balances import drifted_customers, reconcile_balances
+from apps.crm.models import Customer
+from apps.sales.models import DueCollection, DueSell
+
+
+class CustomerTotalsTests(TestCase):
+    """Customer.due_sell / due_collection follow every DueSell and DueCollection write."""
+
+    def setUp(self):
+        self.user = User.objects.create(username="collector")
+        self.first = Customer.objects.create(name="First", shop_name="First Shop")
+        self.second = Customer.objects.create(name="Second", shop_name="Second Shop")
+
+    def assertTotalsMatchLedger(self):
+        self.assertFalse(drifted_customers().exists())
+
+    def totals(self, customer):
+        customer.refresh_from_db()
+        return customer.due_sell, customer.due_collection
+
+    def test_due_sell_create_update_delete(self):
+        sale = DueSell.objects.create(customer=self.first, deliver_by=self.user, amount=Decimal("30"))
+        self.assertEqual(self.totals(self.first), (Decimal("30"), Decimal("0")))
+        self.assertTotalsMatchLedger()
+
+        sale.amount = Decimal("45")
+        sale.save()
+        self.assertTotalsMatchLedger()
+
+        sale.customer = self.second
+        sale.save()
+        self.assertEqual(self.totals(self.first), (Decimal("0"), Decimal("0")))
+        self.assertEqual(self.totals(self.second), (Decimal("45"), Decimal("0")))
+        self.assertTotalsMatchLedger()
+
+        sale.delete()
+        self.assertEqual(self.totals(self.second), (Decimal("0"), Decimal("0")))
+        self.assertTotalsMatchLedger()
+
+    def test_due_collection_create_update_delete(self):
+        collection = DueCollection.objects.create(
+            customer=self.first, collected_by=self.user, amount=Decimal("25")
+        )
+        self.assertEqual(self.totals(self.first), (Decimal("0"), Decimal("25")))
+
+        collection.amount = Decimal("10")
+        collection.customer = self.second
+        collection.save()
+        self.assertTotalsMatchLedger()
+
+        collection.delete()
+        self.assertTotalsMatchLedger()
+        self.assertEqual(self.totals(self.second), (Decimal("0"), Decimal("0")))
+
+    def test_bulk_create(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        rows = [
+            {"customer": str(customer.pk), "deliver_by": self.user.pk, "amount": "10.50"}
+            for customer in (self.first, self.second, self.first)
+        ]
+        response = client.post(
+            "/sales/due-sells/bulk-create/?compact=true", {"due_sells": rows}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.totals(self.first), (Decimal("21.00"), Decimal("0")))
+        self.assertTotalsMatchLedger()
+
+    def test_reconcile_repairs_drift(self):
+        DueSell.objects.create(customer=self.first, deliver_by=self.user, amount=Decimal("12"))
+        Customer.objects.update(due_sell=0)
+        self.assertTrue(drifted_customers().exists())
 
-# Create your tests here.
+        reconcile_balances()
+        self.assertTotalsMatchLedger()
+        self.assertEqual(self.totals(self.first), (Decimal("12"), Decimal("0")))
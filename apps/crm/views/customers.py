@@ -1,15 +1,14 @@
-import csv
-from io import StringIO
-
-from django.http import HttpResponse
 from rest_framework import viewsets, mixins, filters
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
+from apps.crm.filters import CustomerFilter
 from apps.crm.models import Customer
 from apps.crm.serializers import CustomerSerializer
 from apps.core.utils import DefaultPagination
+from apps.core.delta import DeltaSyncMixin
+from apps.core.exports import ExportMixin, export_response
 
 # utils
 from drf_spectacular.utils import extend_schema
@@ -17,6 +16,8 @@ from drf_spectacular.utils import extend_schema
 
 @extend_schema(tags=["Customers"])
 class CustomerViewSet(
+    DeltaSyncMixin,
+    ExportMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -30,11 +31,19 @@ class CustomerViewSet(
 
     http_method_names = ["get", "post", "patch", "delete"]
 
-    queryset = Customer.objects.select_related("area", "area__zone").all()
+    queryset = (
+        Customer.objects.select_related("area", "area__zone")
+        .prefetch_related("area__working_days")
+        .all()
+    )
     serializer_class = CustomerSerializer
     pagination_class = DefaultPagination
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [
+        DjangoFilterBackend,
+        filters.SearchFilter,
+        filters.OrderingFilter,
+    ]
     search_fields = [
         "customer_id",
         "name",
@@ -43,14 +52,32 @@ class CustomerViewSet(
         "contact_number",
         "address",
     ]
-    filterset_fields = {
-        "area": ["exact", "in"],
-        "fridge_type": ["exact"],
-        "have_special_discount": ["exact"],
-    }
-    ordering_fields = ["name", "shop_name", "created_at"]
+    filterset_class = CustomerFilter
+    ordering_fields = [
+        "name",
+        "shop_name",
+        "due_sell",
+        "due_collection",
+        "balance",
+        "created_at",
+    ]
     ordering = ["name"]
 
+    export_filename = "customers"
+    export_columns = [
+        ("customer_id", "customer_id"),
+        ("shop_name", "shop_name"),
+        ("name", "name"),
+        ("contact_number", "contact_number"),
+        ("address", "address"),
+        ("area_name", "area__name"),
+        ("due_limit", "due_limit"),
+        ("opening_balance", "opening_balance"),
+        ("due_sell", "due_sell"),
+        ("due_collection", "due_collection"),
+        ("balance", "balance"),
+    ]
+
     def get_permissions(self):
         if self.request.method == "GET":
             return [AllowAny()]
@@ -58,48 +85,11 @@ class CustomerViewSet(
 
     @extend_schema(
         summary="Download customers as Excel (CSV)",
-        description="Export filtered customer list as CSV (opens in Excel). Uses CustomerSerializer.",
+        description="Export filtered customer list as CSV (opens in Excel). Same as export/?export_format=csv.",
     )
-    @action(detail=False, methods=["get"], url_path="download-excel")
+    @action(detail=False, methods=["get"], url_path="download-excel", pagination_class=None)
     def download_excel(self, request):
-        """Export customer data as CSV using CustomerSerializer. Respects list filters and search."""
-        queryset = self.filter_queryset(self.get_queryset())
-        data = CustomerSerializer(queryset, many=True).data
-
-        # CSV columns: serializer fields, with area_details flattened to area_name
-        csv_columns = [
-            "customer_id",
-            "shop_name",
-            "name",
-            "contact_number",
-            "address",
-            "area_name",  # flattened from area_details.name
-            "due_limit",
-            "opening_balance",
-            "due_sell",
-            "due_collection",
-            "balance",
-        ]
-        buffer = StringIO()
-        writer = csv.writer(buffer)
-        writer.writerow(csv_columns)
-        for row in data:
-            area_details = row.pop("area_details", None)
-            area_name = (area_details.get("name") or "") if area_details else ""
-            flat_row = []
-            for key in csv_columns:
-                if key == "area_name":
-                    flat_row.append(area_name)
-                else:
-                    value = row.get(key, "")
-                    if value is None:
-                        value = ""
-                    flat_row.append(value)
-            writer.writerow(flat_row)
-        csv_content = buffer.getvalue()
-        response = HttpResponse(
-            "\ufeff" + csv_content,
-            content_type="text/csv; charset=utf-8",
+        """Stream customer data as CSV. Respects list filters and search."""
+        return export_response(
+            self.get_export_queryset(), self.export_columns, "csv", self.export_filename
         )
-        response["Content-Disposition"] = 'attachment; filename="customers.csv"'
-        return response
@@ -1,6 +1,13 @@
 from django.contrib import admin
 
-from .models import StockTransaction, StockType
+from .models import (
+    DailyStockMovement,
+    StockBalance,
+    StockCheckpoint,
+    StockTransaction,
+    StockType,
+    StockValuation,
+)
 
 
 @admin.register(StockType)
@@ -106,3 +113,115 @@ class StockTransactionAdmin(admin.ModelAdmin):
         return "-"
 
     source_item.short_description = "Source"
+
+
+@admin.register(StockBalance)
+class StockBalanceAdmin(admin.ModelAdmin):
+    list_display = [
+        "product",
+        "stock_type",
+        "ctn_quantity",
+        "piece_quantity",
+        "total_price",
+        "updated_at",
+    ]
+    list_filter = ["stock_type"]
+    list_select_related = ["product", "stock_type"]
+    search_fields = ["product__name", "product__sku", "stock_type__name"]
+    readonly_fields = [
+        "product",
+        "stock_type",
+        "ctn_quantity",
+        "piece_quantity",
+        "total_price",
+        "created_at",
+        "updated_at",
+    ]
+    ordering = ["product__name", "stock_type__name"]
+
+
+@admin.register(StockCheckpoint)
+class StockCheckpointAdmin(admin.ModelAdmin):
+    list_display = [
+        "period_end",
+        "product",
+        "stock_type",
+        "ctn_quantity",
+        "piece_quantity",
+        "total_price",
+    ]
+    list_filter = ["period_end", "stock_type"]
+    list_select_related = ["product", "stock_type"]
+    search_fields = ["product__name", "product__sku", "stock_type__name"]
+    readonly_fields = [
+        "product",
+        "stock_type",
+        "period_end",
+        "ctn_quantity",
+        "piece_quantity",
+        "total_price",
+        "created_at",
+        "updated_at",
+    ]
+    ordering = ["-period_end", "product__name", "stock_type__name"]
+
+
+@admin.register(DailyStockMovement)
+class DailyStockMovementAdmin(admin.ModelAdmin):
+    list_display = [
+        "date",
+        "product",
+        "stock_type",
+        "in_ctn_quantity",
+        "in_piece_quantity",
+        "in_value",
+        "out_ctn_quantity",
+        "out_piece_quantity",
+        "out_value",
+    ]
+    list_filter = ["date", "stock_type"]
+    list_select_related = ["product", "stock_type"]
+    search_fields = ["product__name", "product__sku", "stock_type__name"]
+    readonly_fields = [
+        "date",
+        "product",
+        "stock_type",
+        "in_ctn_quantity",
+        "in_piece_quantity",
+        "in_value",
+        "out_ctn_quantity",
+        "out_piece_quantity",
+        "out_value",
+        "created_at",
+        "updated_at",
+    ]
+    ordering = ["-date", "product__name", "stock_type__name"]
+
+
+@admin.register(StockValuation)
+class StockValuationAdmin(admin.ModelAdmin):
+    list_display = [
+        "product",
+        "stock_type",
+        "method",
+        "quantity",
+        "value",
+        "stale",
+        "updated_at",
+    ]
+    list_filter = ["method", "stock_type", "stale"]
+    list_select_related = ["product", "stock_type"]
+    search_fields = ["product__name", "product__sku", "stock_type__name"]
+    readonly_fields = [
+        "product",
+        "stock_type",
+        "method",
+        "quantity",
+        "value",
+        "last_unit_cost",
+        "layers",
+        "stale",
+        "created_at",
+        "updated_at",
+    ]
+    ordering = ["product__name", "stock_type__name", "method"]
@@ -5,6 +5,10 @@ class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
 
+    def ready(self):
+        """Import signals when the app is ready"""
+        import apps.inventory.signals  # noqa
+
     # def ready(self):
     #     """Initialize default stock types when app starts"""
     #     from .models import StockType
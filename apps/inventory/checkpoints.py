@@ -0,0 +1,149 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from apps.inventory.models import StockCheckpoint, StockTransaction
+from apps.inventory.summaries import ledger_between, ledger_totals
+
+CHECKPOINT_PERIODS = ("daily", "monthly")
+
+
+def checkpoint_period():
+    period = settings.STOCK_CHECKPOINT_PERIOD
+    if period not in CHECKPOINT_PERIODS:
+        raise ImproperlyConfigured(
+            f"STOCK_CHECKPOINT_PERIOD must be one of {', '.join(CHECKPOINT_PERIODS)}."
+        )
+    return period
+
+
+def period_end(day, period):
+    """Last day of the period that contains ``day``."""
+    if period == "daily":
+        return day
+    next_month = (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return next_month - datetime.timedelta(days=1)
+
+
+def period_ends(first, last, period):
+    """Period end dates of every period from the one containing ``first`` up to ``last``."""
+    end = period_end(first, period)
+    while end <= last:
+        yield end
+        end = period_end(end + datetime.timedelta(days=1), period)
+
+
+def last_closed_period_end(period, today=None):
+    """End of the latest period that is already over."""
+    today = today or timezone.localdate()
+    current_start = today if period == "daily" else today.replace(day=1)
+    return current_start - datetime.timedelta(days=1)
+
+
+def nearest_checkpoint(day):
+    """period_end of the latest checkpoint on or before ``day`` (or None)."""
+    return StockCheckpoint.objects.filter(period_end__lte=day).aggregate(
+        latest=Max("period_end")
+    )["latest"]
+
+
+def _checkpoint_rows(day):
+    rows = defaultdict(lambda: [0, 0, Decimal("0")])
+    if day:
+        for product_id, stock_type_id, ctn, pcs, value in StockCheckpoint.objects.filter(
+            period_end=day
+        ).values_list("product_id", "stock_type_id", "ctn_quantity", "piece_quantity", "total_price"):
+            rows[(product_id, stock_type_id)] = [ctn, pcs, value]
+    return rows
+
+
+def _add_ledger(running, after, through):
+    for row in ledger_totals(ledger_between(after, through)):
+        totals = running[(row["product_id"], row["stock_type_id"])]
+        totals[0] += row["ctn_total"] or 0
+        totals[1] += row["piece_total"] or 0
+        totals[2] += row["price_total"] or Decimal("0")
+
+
+def _first_ledger_day():
+    first = StockTransaction.objects.aggregate(first=Min("created_at"))["first"]
+    return timezone.localdate(first) if first else None
+
+
+def build_checkpoints(through=None, period=None, since=None):
+    """
+    Write the missing checkpoints for closed periods up to ``through``.
+
+    Each period starts from the previous checkpoint and adds one grouped
+    query over that period's transactions, so building never rescans the
+    whole ledger. With ``since``, checkpoints from that day on are dropped
+    and rebuilt. Returns the period end dates written.
+    """
+    period = period or checkpoint_period()
+    last_closed = last_closed_period_end(period)
+    through = min(through, last_closed) if through else last_closed
+    if since:
+        StockCheckpoint.objects.filter(period_end__gte=since).delete()
+
+    first_day = _first_ledger_day()
+    if first_day is None:
+        return []
+    previous = nearest_checkpoint(through)
+    running = _checkpoint_rows(previous)
+    start = previous + datetime.timedelta(days=1) if previous else first_day
+
+    written = []
+    for end in period_ends(start, through, period):
+        _add_ledger(running, previous, end)
+        rows = [
+            StockCheckpoint(
+                product_id=product_id,
+                stock_type_id=stock_type_id,
+                period_end=end,
+                ctn_quantity=ctn,
+                piece_quantity=pcs,
+                total_price=value,
+            )
+            for (product_id, stock_type_id), (ctn, pcs, value) in running.items()
+            if ctn or pcs or value
+        ]
+        with transaction.atomic():
+            StockCheckpoint.objects.filter(period_end=end).delete()
+            StockCheckpoint.objects.bulk_create(rows, batch_size=1000)
+        written.append(end)
+        previous = end
+    return written
+
+
+def first_invalid_checkpoint():
+    """
+    Walk the stored checkpoints in order against the ledger and return the
+    first period_end whose rows disagree with it (or None).
+    """
+    running = _checkpoint_rows(None)
+    previous = None
+    days = (
+        StockCheckpoint.objects.order_by("period_end")
+        .values_list("period_end", flat=True)
+        .distinct()
+    )
+    for day in days:
+        _add_ledger(running, previous, day)
+        expected = {key: tuple(value) for key, value in running.items() if any(value)}
+        stored = {key: tuple(value) for key, value in _checkpoint_rows(day).items()}
+        if expected != stored:
+            return day
+        previous = day
+    return None
+
+
+def invalidate_checkpoints(day):
+    """Drop the checkpoints that include ``day`` (a ledger change on that day)."""
+    if day <= last_closed_period_end("daily"):
+        StockCheckpoint.objects.filter(period_end__gte=day).delete()
@@ -14,6 +14,7 @@ class StockTransactionFilter(django_filters.FilterSet):
         fields = [
             "transaction_type",
             "have_transfer",
+            "transfer_id",
             "stock_type",
             "stock_type__name",
             "product",
@@ -0,0 +1,66 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.checkpoints import (
+    CHECKPOINT_PERIODS,
+    build_checkpoints,
+    first_invalid_checkpoint,
+)
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Write closing StockCheckpoint rows for every closed period that does not have one "
+        "yet (run after each period end, e.g. from cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--through",
+            type=_date,
+            help="Last day to checkpoint (YYYY-MM-DD). Defaults to the latest closed period.",
+        )
+        parser.add_argument(
+            "--period",
+            choices=CHECKPOINT_PERIODS,
+            help="Override STOCK_CHECKPOINT_PERIOD for this run",
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Check stored checkpoints against the ledger and rebuild from the first bad one",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop all checkpoints and rebuild them from the ledger",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["rebuild"]:
+            since = datetime.date.min
+        elif options["repair"]:
+            since = first_invalid_checkpoint()
+            if since:
+                self.stdout.write(self.style.WARNING(f"Checkpoints from {since} disagree with the ledger"))
+
+        written = build_checkpoints(
+            through=options["through"], period=options["period"], since=since
+        )
+        if written:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Wrote {len(written)} checkpoint period(s), {written[0]} to {written[-1]}."
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Checkpoints are up to date."))
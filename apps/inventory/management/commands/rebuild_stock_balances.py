@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.summaries import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Rebuild StockBalance rows from the full StockTransaction ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--product",
+            action="append",
+            dest="products",
+            help="Only rebuild balances for this product id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        """Recompute per-product, per-stock-type balances from the ledger"""
+        products = options.get("products")
+        written = rebuild_balances(product_ids=products)
+        scope = f"{len(products)} product(s)" if products else "all products"
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} stock balance row(s) for {scope}.")
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.summaries import rebuild_movements
+
+
+class Command(BaseCommand):
+    help = "Rebuild DailyStockMovement rows from the full StockTransaction ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--product",
+            action="append",
+            dest="products",
+            help="Only rebuild movements for this product id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        """Recompute per-day, per-product, per-stock-type IN/OUT totals from the ledger"""
+        products = options.get("products")
+        written = rebuild_movements(product_ids=products)
+        scope = f"{len(products)} product(s)" if products else "all products"
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} daily stock movement row(s) for {scope}.")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.valuation import update_valuations
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the FIFO / weighted-average stock valuation over the ledger rows added since "
+        "the last run. Schedule it (e.g. every few minutes from cron): the valuation "
+        "report only reads its result"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Discard the stored valuation and replay the whole ledger",
+        )
+
+    def handle(self, *args, **options):
+        """Process new (and stale products') transactions in one ordered pass"""
+        written = update_valuations(rebuild=options["rebuild"])
+        self.stdout.write(self.style.SUCCESS(f"Updated {written} stock valuation row(s)."))
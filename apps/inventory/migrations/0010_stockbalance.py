@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:43
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, When
+
+
+def backfill_stock_balances(apps, schema_editor):
+    StockTransaction = apps.get_model("inventory", "StockTransaction")
+    StockBalance = apps.get_model("inventory", "StockBalance")
+
+    sign = Case(When(transaction_type="OUT", then=-1), default=1)
+    totals = (
+        StockTransaction.objects.order_by()
+        .values("product_id", "stock_type_id")
+        .annotate(
+            ctn_total=Sum(sign * F("ctn_quantity"), output_field=IntegerField()),
+            piece_total=Sum(sign * F("piece_quantity"), output_field=IntegerField()),
+            price_total=Sum(
+                sign
+                * (
+                    F("ctn_price") * F("ctn_quantity")
+                    + F("piece_price") * F("piece_quantity")
+                ),
+                output_field=DecimalField(max_digits=16, decimal_places=2),
+            ),
+        )
+    )
+    StockBalance.objects.bulk_create(
+        [
+            StockBalance(
+                id=uuid.uuid4(),
+                product_id=row["product_id"],
+                stock_type_id=row["stock_type_id"],
+                ctn_quantity=row["ctn_total"] or 0,
+                piece_quantity=row["piece_total"] or 0,
+                total_price=row["price_total"] or 0,
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_stocktransaction_product_price'),
+        ('product', '0003_alter_product_sku'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('ctn_quantity', models.IntegerField(default=0, help_text='Carton balance (IN minus OUT)')),
+                ('piece_quantity', models.IntegerField(default=0, help_text='Piece balance (IN minus OUT)')),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, help_text='Value balance (IN minus OUT)', max_digits=16)),
+                ('product', models.ForeignKey(help_text='Product this balance belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='stock_balances', to='product.product')),
+                ('stock_type', models.ForeignKey(help_text='Stock type this balance belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='inventory.stocktype')),
+            ],
+            options={
+                'verbose_name': 'Stock Balance',
+                'verbose_name_plural': 'Stock Balances',
+                'ordering': ['product', 'stock_type'],
+                'constraints': [models.UniqueConstraint(fields=('product', 'stock_type'), name='unique_stock_balance_per_product_type')],
+            },
+        ),
+        migrations.RunPython(backfill_stock_balances, migrations.RunPython.noop),
+    ]
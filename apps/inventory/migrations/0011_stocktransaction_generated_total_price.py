@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:51
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_stockbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stocktransaction',
+            name='total_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('ctn_price'), '*', models.F('ctn_quantity')), '+', django.db.models.expressions.CombinedExpression(models.F('piece_price'), '*', models.F('piece_quantity'))), help_text='Total price: (ctn_price * ctn_quantity) + (piece_price * piece_quantity)', output_field=models.DecimalField(decimal_places=2, max_digits=16)),
+        ),
+    ]
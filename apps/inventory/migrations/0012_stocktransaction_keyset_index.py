@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_stocktransaction_generated_total_price'),
+        ('product', '0003_alter_product_sku'),
+        ('sales', '0024_ledger_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stocktransaction',
+            name='inventory_s_created_ff5dbb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='stocktransaction',
+            index=models.Index(fields=['-created_at', '-id'], name='inventory_s_created_77fb62_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:07
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_stocktransaction_keyset_index'),
+        ('product', '0003_alter_product_sku'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period_end', models.DateField(help_text='Last day (inclusive) covered by this checkpoint')),
+                ('ctn_quantity', models.IntegerField(default=0, help_text='Carton balance (IN minus OUT) at the end of the period')),
+                ('piece_quantity', models.IntegerField(default=0, help_text='Piece balance (IN minus OUT) at the end of the period')),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, help_text='Value balance (IN minus OUT) at the end of the period', max_digits=16)),
+                ('product', models.ForeignKey(help_text='Product this checkpoint belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='product.product')),
+                ('stock_type', models.ForeignKey(help_text='Stock type this checkpoint belongs to', on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='inventory.stocktype')),
+            ],
+            options={
+                'verbose_name': 'Stock Checkpoint',
+                'verbose_name_plural': 'Stock Checkpoints',
+                'ordering': ['-period_end', 'product', 'stock_type'],
+                'constraints': [models.UniqueConstraint(fields=('period_end', 'product', 'stock_type'), name='unique_stock_checkpoint_per_period')],
+            },
+        ),
+    ]
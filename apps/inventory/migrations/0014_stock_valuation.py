@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:09
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_stockcheckpoint'),
+        ('product', '0003_alter_product_sku'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockValuationCursor',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_created_at', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.UUIDField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Stock Valuation Cursor',
+                'verbose_name_plural': 'Stock Valuation Cursor',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockValuation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('method', models.CharField(choices=[('FIFO', 'First in, first out'), ('WAC', 'Moving weighted average')], max_length=10)),
+                ('quantity', models.BigIntegerField(default=0, help_text='Pieces on hand')),
+                ('value', models.DecimalField(decimal_places=4, default=0, help_text='Cost of the pieces on hand', max_digits=20)),
+                ('last_unit_cost', models.DecimalField(decimal_places=6, default=0, help_text='Cost per piece of the latest IN (prices shortfalls)', max_digits=20)),
+                ('layers', models.JSONField(blank=True, default=list, help_text='FIFO cost layers, oldest first: [pieces, unit cost]')),
+                ('stale', models.BooleanField(default=False, help_text='Ledger history changed; replay on the next run')),
+                ('product', models.ForeignKey(help_text='Product being valued', on_delete=django.db.models.deletion.CASCADE, related_name='stock_valuations', to='product.product')),
+                ('stock_type', models.ForeignKey(help_text='Stock type being valued', on_delete=django.db.models.deletion.CASCADE, related_name='valuations', to='inventory.stocktype')),
+            ],
+            options={
+                'verbose_name': 'Stock Valuation',
+                'verbose_name_plural': 'Stock Valuations',
+                'ordering': ['product', 'stock_type', 'method'],
+                'indexes': [models.Index(fields=['stale'], name='inventory_s_stale_f7e97d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'stock_type', 'method'), name='unique_stock_valuation_per_method')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_stock_valuation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stocktransaction',
+            name='transfer_id',
+            field=models.UUIDField(blank=True, db_index=True, help_text='Shared by the OUT and IN legs of one transfer', null=True),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stock_movements(apps, schema_editor):
+    StockTransaction = apps.get_model("inventory", "StockTransaction")
+    DailyStockMovement = apps.get_model("inventory", "DailyStockMovement")
+
+    def total(kind, field, output_field):
+        return Sum(
+            Case(
+                When(transaction_type=kind, then=F(field)),
+                default=Value(0),
+                output_field=output_field,
+            )
+        )
+
+    money = DecimalField(max_digits=16, decimal_places=2)
+    rows = (
+        StockTransaction.objects.order_by()
+        .annotate(date=TruncDate("created_at"))
+        .values("date", "product_id", "stock_type_id")
+        .annotate(
+            in_ctn=total("IN", "ctn_quantity", IntegerField()),
+            in_pcs=total("IN", "piece_quantity", IntegerField()),
+            in_value=total("IN", "total_price", money),
+            out_ctn=total("OUT", "ctn_quantity", IntegerField()),
+            out_pcs=total("OUT", "piece_quantity", IntegerField()),
+            out_value=total("OUT", "total_price", money),
+        )
+    )
+    DailyStockMovement.objects.bulk_create(
+        [
+            DailyStockMovement(
+                id=uuid.uuid4(),
+                date=row["date"],
+                product_id=row["product_id"],
+                stock_type_id=row["stock_type_id"],
+                in_ctn_quantity=row["in_ctn"] or 0,
+                in_piece_quantity=row["in_pcs"] or 0,
+                in_value=row["in_value"] or 0,
+                out_ctn_quantity=row["out_ctn"] or 0,
+                out_piece_quantity=row["out_pcs"] or 0,
+                out_value=row["out_value"] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_stocktransaction_transfer_id'),
+        ('product', '0003_alter_product_sku'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStockMovement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField(help_text='Day the transactions were created')),
+                ('in_ctn_quantity', models.IntegerField(default=0, help_text='Cartons in')),
+                ('in_piece_quantity', models.IntegerField(default=0, help_text='Pieces in')),
+                ('in_value', models.DecimalField(decimal_places=2, default=0, help_text='Value in', max_digits=16)),
+                ('out_ctn_quantity', models.IntegerField(default=0, help_text='Cartons out')),
+                ('out_piece_quantity', models.IntegerField(default=0, help_text='Pieces out')),
+                ('out_value', models.DecimalField(decimal_places=2, default=0, help_text='Value out', max_digits=16)),
+                ('product', models.ForeignKey(help_text='Product that moved', on_delete=django.db.models.deletion.CASCADE, related_name='daily_movements', to='product.product')),
+                ('stock_type', models.ForeignKey(help_text='Stock type that moved', on_delete=django.db.models.deletion.CASCADE, related_name='daily_movements', to='inventory.stocktype')),
+            ],
+            options={
+                'verbose_name': 'Daily Stock Movement',
+                'verbose_name_plural': 'Daily Stock Movements',
+                'ordering': ['-date', 'product', 'stock_type'],
+                'indexes': [models.Index(fields=['product', 'date'], name='inventory_d_product_76f809_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product', 'stock_type'), name='unique_daily_stock_movement')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_stock_movements, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_dailystockmovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockvaluationcursor',
+            name='recent_ids',
+            field=models.JSONField(blank=True, help_text='Ids of the valued transactions created in the late-commit window before the cursor', null=True),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from apps.core.models import BaseModel
 from apps.product.models import Product, ProductPrice
-from django.db.models import Sum, F, ExpressionWrapper
+from django.db.models import Sum
 from decimal import Decimal
 from apps.sales.models import OrderItem, DamageOrderItem, FreeOfferItem
 
@@ -19,66 +19,23 @@ class StockType(BaseModel):
     def __str__(self):
         return self.name
 
+    def _balance_total(self, field):
+        return self.balances.aggregate(total=Sum(field))["total"]
+
     @property
     def total_ctn_quantity(self) -> int:
-        # Sum IN transactions
-        in_total = (
-            self.transactions.filter(transaction_type="IN").aggregate(
-                total=Sum("ctn_quantity")
-            )["total"]
-            or 0
-        )
-
-        # Subtract OUT transactions
-        out_total = (
-            self.transactions.filter(transaction_type="OUT").aggregate(
-                total=Sum("ctn_quantity")
-            )["total"]
-            or 0
-        )
-
-        return in_total - out_total
+        """Carton quantity (IN minus OUT) across all products, read from StockBalance."""
+        return self._balance_total("ctn_quantity") or 0
 
     @property
     def total_piece_quantity(self) -> int:
-        # Sum IN transactions
-        in_total = (
-            self.transactions.filter(transaction_type="IN").aggregate(
-                total=Sum("piece_quantity")
-            )["total"]
-            or 0
-        )
-
-        # Subtract OUT transactions
-        out_total = (
-            self.transactions.filter(transaction_type="OUT").aggregate(
-                total=Sum("piece_quantity")
-            )["total"]
-            or 0
-        )
-
-        return in_total - out_total
+        """Piece quantity (IN minus OUT) across all products, read from StockBalance."""
+        return self._balance_total("piece_quantity") or 0
 
     @property
     def total_price(self) -> Decimal:
         """Total value: sum of (ctn_price*ctn_quantity + piece_price*piece_quantity) for IN minus OUT."""
-        value_expr = ExpressionWrapper(
-            F("ctn_price") * F("ctn_quantity") + F("piece_price") * F("piece_quantity"),
-            output_field=models.DecimalField(max_digits=14, decimal_places=2),
-        )
-        in_total = (
-            self.transactions.filter(transaction_type="IN").aggregate(
-                total=Sum(value_expr)
-            )["total"]
-            or Decimal("0")
-        )
-        out_total = (
-            self.transactions.filter(transaction_type="OUT").aggregate(
-                total=Sum(value_expr)
-            )["total"]
-            or Decimal("0")
-        )
-        return in_total - out_total
+        return self._balance_total("total_price") or Decimal("0")
 
 
 class TransactionType(models.TextChoices):
@@ -88,6 +45,30 @@ class TransactionType(models.TextChoices):
     OUT = "OUT", "Out"
 
 
+class StockTransactionQuerySet(models.QuerySet):
+    """Custom queryset for StockTransaction with set-based posting."""
+
+    def bulk_post(self, transactions, check_stock=False):
+        """
+        Insert transactions with one bulk INSERT and move the maintained stock
+        summaries in the same atomic block. Save signals do not fire for these
+        rows, so this is the only place their effect is applied.
+
+        ``check_stock`` rejects the whole batch with InsufficientStock when it
+        would take a guarded stock type negative (see apply_transactions).
+        """
+        from django.db import transaction
+
+        from apps.inventory import summaries
+
+        if not transactions:
+            return []
+        with transaction.atomic():
+            created = self.bulk_create(transactions)
+            summaries.apply_transactions(created, check_stock=check_stock)
+        return created
+
+
 class StockTransaction(BaseModel):
     """Model to track stock transactions (in/out) and transfers"""
 
@@ -141,6 +122,12 @@ class StockTransaction(BaseModel):
         blank=True,
         help_text="Destination stock type for transfer (if applicable)",
     )
+    transfer_id = models.UUIDField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Shared by the OUT and IN legs of one transfer",
+    )
     note = models.TextField(
         blank=True, help_text="Additional notes about the transaction"
     )
@@ -188,12 +175,17 @@ class StockTransaction(BaseModel):
         help_text="Free offer item for this transaction",
     )
 
-    @property
-    def total_price(self) -> Decimal:
-        """Calculate total price: (ctn_price * ctn_quantity) + (piece_price * piece_quantity)"""
-        ctn_total = Decimal(self.ctn_price) * Decimal(self.ctn_quantity)
-        piece_total = Decimal(self.piece_price) * Decimal(self.piece_quantity)
-        return ctn_total + piece_total
+    total_price = models.GeneratedField(
+        expression=(
+            models.F("ctn_price") * models.F("ctn_quantity")
+            + models.F("piece_price") * models.F("piece_quantity")
+        ),
+        output_field=models.DecimalField(max_digits=16, decimal_places=2),
+        db_persist=True,
+        help_text="Total price: (ctn_price * ctn_quantity) + (piece_price * piece_quantity)",
+    )
+
+    objects = StockTransactionQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         """Set product_price from product's latest price when not provided."""
@@ -202,6 +194,9 @@ class StockTransaction(BaseModel):
             if latest:
                 self.product_price = latest
         super().save(*args, **kwargs)
+        # total_price is computed by the database; drop any stale copy so the
+        # next read loads the stored value.
+        self.__dict__.pop("total_price", None)
 
     class Meta:
         verbose_name = "Stock Transaction"
@@ -210,8 +205,251 @@ class StockTransaction(BaseModel):
         indexes = [
             models.Index(fields=["stock_type", "transaction_type"]),
             models.Index(fields=["product"]),
-            models.Index(fields=["created_at"]),
+            # Keyset pagination over the default ordering (-created_at, -id).
+            models.Index(fields=["-created_at", "-id"]),
         ]
 
     def __str__(self):
         return f"{self.product.name} - {self.get_transaction_type_display()} - {self.stock_type.name}"
+
+
+class StockBalance(BaseModel):
+    """
+    Running IN minus OUT totals per (product, stock type).
+
+    Maintained incrementally from StockTransaction writes (see
+    ``apps.inventory.summaries``) so stock figures can be read without
+    scanning the ledger. Rebuild with ``manage.py rebuild_stock_balances``.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_balances",
+        help_text="Product this balance belongs to",
+    )
+    stock_type = models.ForeignKey(
+        StockType,
+        on_delete=models.CASCADE,
+        related_name="balances",
+        help_text="Stock type this balance belongs to",
+    )
+    ctn_quantity = models.IntegerField(
+        default=0, help_text="Carton balance (IN minus OUT)"
+    )
+    piece_quantity = models.IntegerField(
+        default=0, help_text="Piece balance (IN minus OUT)"
+    )
+    total_price = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        help_text="Value balance (IN minus OUT)",
+    )
+
+    class Meta:
+        verbose_name = "Stock Balance"
+        verbose_name_plural = "Stock Balances"
+        ordering = ["product", "stock_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "stock_type"],
+                name="unique_stock_balance_per_product_type",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} - {self.stock_type.name}"
+
+
+class StockCheckpoint(BaseModel):
+    """
+    Closing stock per (product, stock type) at the end of a period.
+
+    Written by ``manage.py build_stock_checkpoints`` for closed periods
+    (daily or monthly, see ``STOCK_CHECKPOINT_PERIOD``). "Stock as of a day"
+    reads the nearest checkpoint on or before it and adds only the ledger
+    rows after it. Editing or deleting a transaction dated inside a
+    checkpointed period drops the checkpoints from that day on.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_checkpoints",
+        help_text="Product this checkpoint belongs to",
+    )
+    stock_type = models.ForeignKey(
+        StockType,
+        on_delete=models.CASCADE,
+        related_name="checkpoints",
+        help_text="Stock type this checkpoint belongs to",
+    )
+    period_end = models.DateField(
+        help_text="Last day (inclusive) covered by this checkpoint"
+    )
+    ctn_quantity = models.IntegerField(
+        default=0, help_text="Carton balance (IN minus OUT) at the end of the period"
+    )
+    piece_quantity = models.IntegerField(
+        default=0, help_text="Piece balance (IN minus OUT) at the end of the period"
+    )
+    total_price = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        help_text="Value balance (IN minus OUT) at the end of the period",
+    )
+
+    class Meta:
+        verbose_name = "Stock Checkpoint"
+        verbose_name_plural = "Stock Checkpoints"
+        ordering = ["-period_end", "product", "stock_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period_end", "product", "stock_type"],
+                name="unique_stock_checkpoint_per_period",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.product.name} - {self.stock_type.name} @ {self.period_end}"
+
+
+class DailyStockMovement(BaseModel):
+    """
+    IN and OUT totals of one day per (product, stock type).
+
+    Maintained incrementally from StockTransaction writes next to
+    StockBalance (see ``apps.inventory.summaries``), so movement charts read
+    at most one row per day and product instead of the ledger. Rebuild with
+    ``manage.py rebuild_stock_movements``.
+    """
+
+    date = models.DateField(help_text="Day the transactions were created")
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="daily_movements",
+        help_text="Product that moved",
+    )
+    stock_type = models.ForeignKey(
+        StockType,
+        on_delete=models.CASCADE,
+        related_name="daily_movements",
+        help_text="Stock type that moved",
+    )
+    in_ctn_quantity = models.IntegerField(default=0, help_text="Cartons in")
+    in_piece_quantity = models.IntegerField(default=0, help_text="Pieces in")
+    in_value = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, help_text="Value in"
+    )
+    out_ctn_quantity = models.IntegerField(default=0, help_text="Cartons out")
+    out_piece_quantity = models.IntegerField(default=0, help_text="Pieces out")
+    out_value = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0, help_text="Value out"
+    )
+
+    class Meta:
+        verbose_name = "Daily Stock Movement"
+        verbose_name_plural = "Daily Stock Movements"
+        ordering = ["-date", "product", "stock_type"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product", "stock_type"],
+                name="unique_daily_stock_movement",
+            )
+        ]
+        indexes = [models.Index(fields=["product", "date"])]
+
+    def __str__(self):
+        return f"{self.product.name} - {self.stock_type.name} @ {self.date}"
+
+
+class ValuationMethod(models.TextChoices):
+    """Inventory costing methods"""
+
+    FIFO = "FIFO", "First in, first out"
+    WAC = "WAC", "Moving weighted average"
+
+
+class StockValuation(BaseModel):
+    """
+    Cost valuation state per (product, stock type, method).
+
+    Quantities are in pieces (cartons converted with the transaction price's
+    carton size). IN transactions add stock at their own recorded cost; OUT
+    transactions consume it at FIFO layer cost or at the moving average, so
+    ``value`` is the cost of what is on hand, not the prices of the rows.
+    Maintained incrementally by ``apps.inventory.valuation``; ``stale`` rows
+    are replayed from the start of the ledger on the next run.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_valuations",
+        help_text="Product being valued",
+    )
+    stock_type = models.ForeignKey(
+        StockType,
+        on_delete=models.CASCADE,
+        related_name="valuations",
+        help_text="Stock type being valued",
+    )
+    method = models.CharField(max_length=10, choices=ValuationMethod.choices)
+    quantity = models.BigIntegerField(default=0, help_text="Pieces on hand")
+    value = models.DecimalField(
+        max_digits=20, decimal_places=4, default=0, help_text="Cost of the pieces on hand"
+    )
+    last_unit_cost = models.DecimalField(
+        max_digits=20,
+        decimal_places=6,
+        default=0,
+        help_text="Cost per piece of the latest IN (prices shortfalls)",
+    )
+    layers = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="FIFO cost layers, oldest first: [pieces, unit cost]",
+    )
+    stale = models.BooleanField(
+        default=False, help_text="Ledger history changed; replay on the next run"
+    )
+
+    class Meta:
+        verbose_name = "Stock Valuation"
+        verbose_name_plural = "Stock Valuations"
+        ordering = ["product", "stock_type", "method"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "stock_type", "method"],
+                name="unique_stock_valuation_per_method",
+            )
+        ]
+        indexes = [models.Index(fields=["stale"])]
+
+    def __str__(self):
+        return f"{self.product.name} - {self.stock_type.name} ({self.method})"
+
+
+class StockValuationCursor(BaseModel):
+    """
+    Position of the valuation run in the ledger: the last (created_at, id)
+    processed. There is a single row.
+    """
+
+    last_created_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.UUIDField(null=True, blank=True)
+    recent_ids = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Ids of the valued transactions created in the late-commit window before the cursor",
+    )
+
+    class Meta:
+        verbose_name = "Stock Valuation Cursor"
+        verbose_name_plural = "Stock Valuation Cursor"
+
+    def __str__(self):
+        return f"Valued through {self.last_created_at or '-'}"
@@ -0,0 +1,230 @@
+import datetime
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, When
+
+from apps.inventory.checkpoints import nearest_checkpoint
+from apps.inventory.models import (
+    DailyStockMovement,
+    StockBalance,
+    StockCheckpoint,
+    StockType,
+    TransactionType,
+)
+from apps.inventory.summaries import MOVEMENT_FIELDS, ledger_between
+
+# group_by value -> extra grouping columns (besides stock_type_id) and the
+# key names they are reported under.
+REPORT_GROUPINGS = {
+    None: {},
+    "product": {
+        "product": "product_id",
+        "product_name": "product__name",
+        "sku": "product__sku",
+        "brand": "product__brand_id",
+        "brand_name": "product__brand__name",
+    },
+    "brand": {
+        "brand": "product__brand_id",
+        "brand_name": "product__brand__name",
+    },
+}
+
+_TOTALS = ("total_ctn_quantity", "total_piece_quantity", "total_price")
+
+
+def _ledger_source(queryset):
+    """Signed IN/OUT sums over ``queryset``."""
+    sign = Case(When(transaction_type=TransactionType.OUT, then=-1), default=1)
+    return queryset, {
+        "total_ctn_quantity": Sum(sign * F("ctn_quantity"), output_field=IntegerField()),
+        "total_piece_quantity": Sum(sign * F("piece_quantity"), output_field=IntegerField()),
+        "total_price": Sum(
+            sign * F("total_price"),
+            output_field=DecimalField(max_digits=16, decimal_places=2),
+        ),
+    }
+
+
+def _snapshot_source(queryset):
+    """Sums over stored running totals (StockBalance or StockCheckpoint rows)."""
+    return queryset, {
+        "total_ctn_quantity": Sum("ctn_quantity"),
+        "total_piece_quantity": Sum("piece_quantity"),
+        "total_price": Sum("total_price"),
+    }
+
+
+def report_sources(date_from=None, date_to=None):
+    """
+    (queryset, totals) pairs whose grouped sums add up to the requested figures.
+
+    - no bounds: the maintained StockBalance rows;
+    - ``date_to`` only (stock as of a day): the nearest StockCheckpoint on or
+      before it plus the transactions after that checkpoint;
+    - ``date_from``: the net movement of the transactions in the range.
+    """
+    if date_from:
+        return [_ledger_source(ledger_between(date_from - datetime.timedelta(days=1), date_to))]
+    if date_to:
+        checkpoint = nearest_checkpoint(date_to)
+        sources = [_ledger_source(ledger_between(checkpoint, date_to))]
+        if checkpoint:
+            sources.append(
+                _snapshot_source(StockCheckpoint.objects.filter(period_end=checkpoint))
+            )
+        return sources
+    return [_snapshot_source(StockBalance.objects.all())]
+
+
+def stock_report(
+    date_from=None, date_to=None, brand_ids=None, product_ids=None, group_by=None
+):
+    """
+    Net stock (IN minus OUT) per stock type, optionally broken down per
+    product or brand.
+
+    Each source from report_sources() is read with one grouped query over
+    (stock_type[, product | brand]) and the rows are rolled up per stock
+    type in Python. Returns one dict per stock type, with a ``products`` or
+    ``brands`` list when ``group_by`` is set.
+    """
+    columns = REPORT_GROUPINGS[group_by]
+    grouped = {}
+    for queryset, totals in report_sources(date_from, date_to):
+        if brand_ids:
+            queryset = queryset.filter(product__brand_id__in=brand_ids)
+        if product_ids:
+            queryset = queryset.filter(product_id__in=product_ids)
+        rows = (
+            queryset.order_by()
+            .values("stock_type_id", *columns.values())
+            .annotate(**totals)
+        )
+        for row in rows:
+            key = (row["stock_type_id"], *(row[lookup] for lookup in columns.values()))
+            if key not in grouped:
+                grouped[key] = row
+                continue
+            for total in _TOTALS:
+                grouped[key][total] = (grouped[key][total] or 0) + (row[total] or 0)
+
+    report = {
+        stock_type.pk: {
+            "id": stock_type.pk,
+            "name": stock_type.name,
+            "total_ctn_quantity": 0,
+            "total_piece_quantity": 0,
+            "total_price": Decimal("0"),
+        }
+        for stock_type in StockType.objects.order_by("name")
+    }
+    breakdown_key = f"{group_by}s" if group_by else None
+    if breakdown_key:
+        for entry in report.values():
+            entry[breakdown_key] = []
+
+    for row in grouped.values():
+        entry = report.get(row["stock_type_id"])
+        if entry is None:
+            continue
+        values = {total: row[total] or 0 for total in _TOTALS}
+        for total, value in values.items():
+            entry[total] += value
+        if breakdown_key and any(values.values()):
+            entry[breakdown_key].append(
+                {key: row[lookup] for key, lookup in columns.items()} | values
+            )
+
+    if breakdown_key:
+        sort_key = "product_name" if group_by == "product" else "brand_name"
+        for entry in report.values():
+            entry[breakdown_key].sort(key=lambda item: item[sort_key] or "")
+    return list(report.values())
+
+
+# Running balance column -> (IN column, OUT column) of DailyStockMovement.
+BALANCE_COLUMNS = {
+    "balance_ctn_quantity": ("in_ctn_quantity", "out_ctn_quantity"),
+    "balance_piece_quantity": ("in_piece_quantity", "out_piece_quantity"),
+    "balance_value": ("in_value", "out_value"),
+}
+
+
+def _filtered(queryset, product_ids=None, stock_type_ids=None, brand_ids=None):
+    if product_ids:
+        queryset = queryset.filter(product_id__in=product_ids)
+    if stock_type_ids:
+        queryset = queryset.filter(stock_type_id__in=stock_type_ids)
+    if brand_ids:
+        queryset = queryset.filter(product__brand_id__in=brand_ids)
+    return queryset
+
+
+def opening_balance(day, **filters):
+    """
+    Stock (ctn, pcs, value) at the start of ``day``: the nearest checkpoint
+    before it plus the daily movements between that checkpoint and ``day``.
+    """
+    previous_day = day - datetime.timedelta(days=1)
+    checkpoint = nearest_checkpoint(previous_day)
+    opening = dict.fromkeys(BALANCE_COLUMNS, 0)
+    if checkpoint:
+        totals = _filtered(
+            StockCheckpoint.objects.filter(period_end=checkpoint), **filters
+        ).aggregate(
+            balance_ctn_quantity=Sum("ctn_quantity"),
+            balance_piece_quantity=Sum("piece_quantity"),
+            balance_value=Sum("total_price"),
+        )
+        opening = {column: totals[column] or 0 for column in opening}
+
+    movements = DailyStockMovement.objects.filter(date__lt=day)
+    if checkpoint:
+        movements = movements.filter(date__gt=checkpoint)
+    totals = _filtered(movements, **filters).aggregate(
+        **{field: Sum(field) for field in MOVEMENT_FIELDS}
+    )
+    for column, (in_field, out_field) in BALANCE_COLUMNS.items():
+        opening[column] += (totals[in_field] or 0) - (totals[out_field] or 0)
+    return opening
+
+
+def movement_series(date_from, date_to, product_ids=None, stock_type_ids=None, brand_ids=None):
+    """
+    One entry per day from ``date_from`` to ``date_to`` with that day's IN
+    and OUT totals and the running balance at the end of the day.
+
+    Reads one grouped query over DailyStockMovement for the range (at most
+    one row per day, product and stock type) and accumulates the balances
+    from opening_balance(); days without movement repeat the balance.
+    Returns (opening, days).
+    """
+    filters = {
+        "product_ids": product_ids,
+        "stock_type_ids": stock_type_ids,
+        "brand_ids": brand_ids,
+    }
+    opening = opening_balance(date_from, **filters)
+    rows = (
+        _filtered(
+            DailyStockMovement.objects.filter(date__gte=date_from, date__lte=date_to),
+            **filters,
+        )
+        .order_by("date")
+        .values("date")
+        .annotate(**{field: Sum(field) for field in MOVEMENT_FIELDS})
+    )
+    by_day = {row["date"]: row for row in rows}
+
+    balance = dict(opening)
+    days = []
+    day = date_from
+    while day <= date_to:
+        row = by_day.get(day, {})
+        entry = {"date": day} | {field: row.get(field) or 0 for field in MOVEMENT_FIELDS}
+        for column, (in_field, out_field) in BALANCE_COLUMNS.items():
+            balance[column] += entry[in_field] - entry[out_field]
+        days.append(entry | balance)
+        day += datetime.timedelta(days=1)
+    return opening, days
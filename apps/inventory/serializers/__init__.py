@@ -1,3 +1,4 @@
 from .stock_type import *
 from .stock_transaction import *
-
+from .valuation import *
+from .stock_movement import *
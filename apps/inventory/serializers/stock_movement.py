@@ -0,0 +1,68 @@
+import datetime
+
+from django.utils import timezone
+from rest_framework import serializers
+
+# Longest range one chart request may ask for.
+MAX_CHART_DAYS = 731
+
+
+class StockMovementQuerySerializer(serializers.Serializer):
+    """Query parameters of the stock movement chart."""
+
+    date_from = serializers.DateField(
+        required=False, help_text="First day (YYYY-MM-DD); defaults to 29 days before date_to"
+    )
+    date_to = serializers.DateField(
+        required=False, help_text="Last day (YYYY-MM-DD); defaults to today"
+    )
+    product = serializers.ListField(
+        child=serializers.UUIDField(), required=False, help_text="Limit to these products"
+    )
+    stock_type = serializers.ListField(
+        child=serializers.UUIDField(), required=False, help_text="Limit to these stock types"
+    )
+    brand = serializers.ListField(
+        child=serializers.UUIDField(), required=False, help_text="Limit to these brands"
+    )
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", timezone.localdate())
+        attrs.setdefault("date_from", attrs["date_to"] - datetime.timedelta(days=29))
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError({"date_to": "Must not be before date_from."})
+        if (attrs["date_to"] - attrs["date_from"]).days >= MAX_CHART_DAYS:
+            raise serializers.ValidationError(
+                {"date_from": f"The range may cover at most {MAX_CHART_DAYS} days."}
+            )
+        return attrs
+
+
+class StockMovementBalanceSerializer(serializers.Serializer):
+    balance_ctn_quantity = serializers.IntegerField(read_only=True)
+    balance_piece_quantity = serializers.IntegerField(read_only=True)
+    balance_value = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+
+
+class StockMovementDaySerializer(serializers.Serializer):
+    """IN/OUT totals of one day and the balance at the end of it."""
+
+    date = serializers.DateField(read_only=True)
+    in_ctn_quantity = serializers.IntegerField(read_only=True)
+    in_piece_quantity = serializers.IntegerField(read_only=True)
+    in_value = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    out_ctn_quantity = serializers.IntegerField(read_only=True)
+    out_piece_quantity = serializers.IntegerField(read_only=True)
+    out_value = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    balance_ctn_quantity = serializers.IntegerField(read_only=True)
+    balance_piece_quantity = serializers.IntegerField(read_only=True)
+    balance_value = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+
+
+class StockMovementChartSerializer(serializers.Serializer):
+    date_from = serializers.DateField(read_only=True)
+    date_to = serializers.DateField(read_only=True)
+    opening = StockMovementBalanceSerializer(
+        read_only=True, help_text="Balance at the start of date_from"
+    )
+    days = StockMovementDaySerializer(many=True, read_only=True)
@@ -1,7 +1,51 @@
+import uuid
+
 from rest_framework import serializers
 
-from apps.inventory.models import StockTransaction, StockType
-from apps.product.serializers import ProductPriceSerializer, ProductSerializer
+from apps.core.batching import BatchedListSerializer, BatchedPrimaryKeyRelatedField
+from apps.inventory.models import StockTransaction, StockType, TransactionType
+from apps.product.models import PriceFor, Product, ProductPrice
+from apps.product.serializers import (
+    ProductPriceSerializer,
+    ProductSummarySerializer,
+    validate_price_product,
+)
+
+# Largest number of rows accepted by one bulk-create request.
+BULK_MAX_ROWS = 1000
+
+
+def validate_transfer(data):
+    """
+    Transfers are posted through the transfer endpoint as paired OUT/IN
+    legs; single rows only carry the transfer fields of those legs.
+    """
+    if data.get("have_transfer"):
+        raise serializers.ValidationError(
+            {
+                "have_transfer": "Post transfers through /inventory/stock-transactions/transfer/."
+            }
+        )
+    data["transfer_from"] = None
+    data["transfer_to"] = None
+    return data
+
+
+def fill_latest_prices(rows):
+    """Give rows without a product_price their product's latest price (one query)."""
+    product_ids = {attrs["product"].pk for attrs in rows if not attrs.get("product_price")}
+    if not product_ids:
+        return rows
+    latest_prices = {
+        price.product_id: price
+        for price in ProductPrice.objects.filter(
+            product_id__in=product_ids, price_for=PriceFor.PRODUCT, is_latest=True
+        )
+    }
+    for attrs in rows:
+        if not attrs.get("product_price"):
+            attrs["product_price"] = latest_prices.get(attrs["product"].pk)
+    return rows
 
 
 class StockTypeNestedSerializer(serializers.ModelSerializer):
@@ -16,7 +60,7 @@ class StockTransactionSerializer(serializers.ModelSerializer):
     """Serializer for stock transactions with nested details."""
 
     stock_type_details = StockTypeNestedSerializer(read_only=True, source="stock_type")
-    product_details = ProductSerializer(read_only=True, source="product")
+    product_details = ProductSummarySerializer(read_only=True, source="product")
     product_price_details = ProductPriceSerializer(
         read_only=True, source="product_price"
     )
@@ -26,6 +70,9 @@ class StockTransactionSerializer(serializers.ModelSerializer):
     transfer_to_details = StockTypeNestedSerializer(
         read_only=True, source="transfer_to"
     )
+    total_price = serializers.DecimalField(
+        max_digits=16, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = StockTransaction
@@ -51,6 +98,7 @@ class StockTransactionSerializer(serializers.ModelSerializer):
             "transfer_from_details",
             "transfer_to",
             "transfer_to_details",
+            "transfer_id",
             "note",
             "batch_number",
             "created_at",
@@ -63,6 +111,7 @@ class StockTransactionSerializer(serializers.ModelSerializer):
             "product_price_details",
             "transfer_from_details",
             "transfer_to_details",
+            "transfer_id",
             "total_price",
             "created_at",
             "updated_at",
@@ -70,21 +119,147 @@ class StockTransactionSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """Validate transfer fields when have_transfer is True."""
-        have_transfer = data.get("have_transfer", False)
-        transfer_from = data.get("transfer_from")
-        transfer_to = data.get("transfer_to")
-
-        if have_transfer:
-            if not transfer_from or not transfer_to:
-                raise serializers.ValidationError(
-                    "Both transfer_from and transfer_to are required when have_transfer is True"
-                )
-            if transfer_from == transfer_to:
-                raise serializers.ValidationError(
-                    "transfer_from and transfer_to cannot be the same"
-                )
-        else:
-            data["transfer_from"] = None
-            data["transfer_to"] = None
+        return validate_transfer(data)
+
+
+class StockTransactionBulkListSerializer(BatchedListSerializer):
+    """Creates all validated rows with one bulk INSERT (see StockTransactionQuerySet.bulk_post)."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", BULK_MAX_ROWS)
+        kwargs.setdefault("allow_empty", False)
+        super().__init__(*args, **kwargs)
+
+    def create(self, validated_data):
+        return StockTransaction.objects.bulk_post(
+            [StockTransaction(**attrs) for attrs in fill_latest_prices(validated_data)]
+        )
+
+
+class StockTransactionBulkSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk stock transaction upload (goods receipts, counts).
+
+    Used with ``many=True``: product, stock type and price references of all
+    rows are resolved with one query per field, rows without a product_price
+    get the product's latest price from a single lookup, and everything is
+    inserted in one atomic bulk_post.
+    """
+
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
+    class Meta:
+        model = StockTransaction
+        list_serializer_class = StockTransactionBulkListSerializer
+        fields = [
+            "id",
+            "stock_type",
+            "product",
+            "product_price",
+            "transaction_type",
+            "ctn_quantity",
+            "piece_quantity",
+            "ctn_price",
+            "piece_price",
+            "have_transfer",
+            "transfer_from",
+            "transfer_to",
+            "transfer_id",
+            "note",
+            "batch_number",
+            "created_at",
+        ]
+        read_only_fields = ("id", "transfer_id", "created_at")
+
+    def validate(self, data):
+        validate_price_product(data, "product_price")
+        return validate_transfer(data)
+
+
+class StockTransferItemSerializer(serializers.Serializer):
+    """One product moved by a transfer. Prices default to the product price's."""
+
+    product = BatchedPrimaryKeyRelatedField(queryset=Product.objects.all())
+    product_price = BatchedPrimaryKeyRelatedField(
+        queryset=ProductPrice.objects.all(), required=False, allow_null=True
+    )
+    ctn_quantity = serializers.IntegerField(min_value=0, default=0)
+    piece_quantity = serializers.IntegerField(min_value=0, default=0)
+    ctn_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    piece_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+    class Meta:
+        list_serializer_class = BatchedListSerializer
 
+    def validate(self, data):
+        validate_price_product(data, "product_price")
+        if not data["ctn_quantity"] and not data["piece_quantity"]:
+            raise serializers.ValidationError("Transfer at least one carton or piece.")
         return data
+
+
+class StockTransferSerializer(serializers.Serializer):
+    """
+    Moves products from one stock type to another.
+
+    Every item is posted as an OUT leg on ``transfer_from`` and an IN leg on
+    ``transfer_to`` sharing one ``transfer_id``, all in a single bulk insert,
+    so stock balances stay plain IN minus OUT sums per stock type.
+    """
+
+    transfer_id = serializers.UUIDField(read_only=True)
+    transfer_from = serializers.PrimaryKeyRelatedField(queryset=StockType.objects.all())
+    transfer_to = serializers.PrimaryKeyRelatedField(queryset=StockType.objects.all())
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+    batch_number = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True, max_length=100
+    )
+    items = StockTransferItemSerializer(many=True, write_only=True, allow_empty=False)
+    legs = StockTransactionBulkSerializer(many=True, read_only=True)
+
+    def validate(self, data):
+        if data["transfer_from"] == data["transfer_to"]:
+            raise serializers.ValidationError(
+                {"transfer_to": "transfer_from and transfer_to cannot be the same"}
+            )
+        return data
+
+    def create(self, validated_data):
+        transfer_id = uuid.uuid4()
+        shared = {
+            "have_transfer": True,
+            "transfer_id": transfer_id,
+            "transfer_from": validated_data["transfer_from"],
+            "transfer_to": validated_data["transfer_to"],
+            "note": validated_data["note"],
+            "batch_number": validated_data.get("batch_number"),
+        }
+        legs = []
+        for item in fill_latest_prices(validated_data["items"]):
+            price = item.get("product_price")
+            line = {
+                "product": item["product"],
+                "product_price": price,
+                "ctn_quantity": item["ctn_quantity"],
+                "piece_quantity": item["piece_quantity"],
+                "ctn_price": item.get("ctn_price", getattr(price, "ctn_price", None) or 0),
+                "piece_price": item.get("piece_price", getattr(price, "piece_price", None) or 0),
+            }
+            legs.append(
+                StockTransaction(
+                    **shared,
+                    **line,
+                    stock_type=validated_data["transfer_from"],
+                    transaction_type=TransactionType.OUT,
+                )
+            )
+            legs.append(
+                StockTransaction(
+                    **shared,
+                    **line,
+                    stock_type=validated_data["transfer_to"],
+                    transaction_type=TransactionType.IN,
+                )
+            )
+        legs = StockTransaction.objects.bulk_post(legs)
+        return {**shared, "legs": legs}
@@ -19,23 +19,83 @@ class StockTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "total_ctn_quantity", "total_piece_quantity", "created_at", "updated_at")
 
 
-class StockTypeReportSerializer(serializers.ModelSerializer):
-    """Serializer for Stock Type report: name, quantities, and total price per type."""
-
-    total_ctn_quantity = serializers.ReadOnlyField()
-    total_piece_quantity = serializers.ReadOnlyField()
-    total_price = serializers.DecimalField(
-        max_digits=14, decimal_places=2, read_only=True
-    )
+class StockTypeOptionSerializer(serializers.ModelSerializer):
+    """Stock type without its running totals, for reference-data payloads."""
 
     class Meta:
         model = StockType
-        fields = [
-            "id",
-            "name",
-            "total_ctn_quantity",
-            "total_piece_quantity",
-            "total_price",
-        ]
+        fields = ["id", "name", "created_at", "updated_at"]
         read_only_fields = fields
 
+
+class StockAsOfQuerySerializer(serializers.Serializer):
+    """``?as_of=`` query parameter of stock endpoints."""
+
+    as_of = serializers.DateField(
+        required=False, help_text="Stock at the end of this day (YYYY-MM-DD)"
+    )
+
+
+class StockReportQuerySerializer(StockAsOfQuerySerializer):
+    """Query parameters of the stock type report."""
+
+    date_from = serializers.DateField(
+        required=False, help_text="Only movements on or after this day (YYYY-MM-DD)"
+    )
+    date_to = serializers.DateField(
+        required=False, help_text="Only movements on or before this day (YYYY-MM-DD)"
+    )
+    brand = serializers.ListField(
+        child=serializers.UUIDField(), required=False, help_text="Limit to these brands"
+    )
+    group_by = serializers.ChoiceField(
+        choices=["product", "brand"],
+        required=False,
+        help_text="Add a per-product or per-brand breakdown to each stock type",
+    )
+
+    def validate(self, attrs):
+        if "as_of" in attrs:
+            if "date_from" in attrs or "date_to" in attrs:
+                raise serializers.ValidationError(
+                    {"as_of": "Cannot be combined with date_from/date_to."}
+                )
+            attrs["date_to"] = attrs.pop("as_of")
+        if attrs.get("date_from") and attrs.get("date_to") and attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError({"date_to": "Must not be before date_from."})
+        return attrs
+
+
+class StockReportBrandSerializer(serializers.Serializer):
+    brand = serializers.UUIDField(read_only=True)
+    brand_name = serializers.CharField(read_only=True)
+    total_ctn_quantity = serializers.IntegerField(read_only=True)
+    total_piece_quantity = serializers.IntegerField(read_only=True)
+    total_price = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+
+
+class StockReportProductSerializer(serializers.Serializer):
+    product = serializers.UUIDField(read_only=True)
+    product_name = serializers.CharField(read_only=True)
+    sku = serializers.CharField(read_only=True)
+    brand = serializers.UUIDField(read_only=True)
+    brand_name = serializers.CharField(read_only=True)
+    total_ctn_quantity = serializers.IntegerField(read_only=True)
+    total_piece_quantity = serializers.IntegerField(read_only=True)
+    total_price = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+
+
+class StockTypeReportSerializer(serializers.Serializer):
+    """
+    Serializer for Stock Type report: name, quantities, and total price per type,
+    plus a ``products`` or ``brands`` breakdown when one was asked for.
+    Expects the rows built by apps.inventory.reports.stock_report.
+    """
+
+    id = serializers.UUIDField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    total_ctn_quantity = serializers.IntegerField(read_only=True)
+    total_piece_quantity = serializers.IntegerField(read_only=True)
+    total_price = serializers.DecimalField(max_digits=16, decimal_places=2, read_only=True)
+    products = StockReportProductSerializer(many=True, read_only=True, required=False)
+    brands = StockReportBrandSerializer(many=True, read_only=True, required=False)
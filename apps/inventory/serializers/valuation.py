@@ -0,0 +1,44 @@
+from rest_framework import serializers
+
+from apps.inventory.models import ValuationMethod
+
+
+class ValuationQuerySerializer(serializers.Serializer):
+    """Query parameters of the valuation report."""
+
+    method = serializers.ChoiceField(
+        choices=ValuationMethod.choices,
+        default=ValuationMethod.FIFO,
+        help_text="Costing method",
+    )
+    group_by = serializers.ChoiceField(
+        choices=["stock_type", "product", "brand"],
+        default="stock_type",
+        help_text="Report one row per stock type, product or brand",
+    )
+    stock_type = serializers.ListField(
+        child=serializers.UUIDField(), required=False, help_text="Limit to these stock types"
+    )
+    brand = serializers.ListField(
+        child=serializers.UUIDField(), required=False, help_text="Limit to these brands"
+    )
+
+
+class StockValuationReportSerializer(serializers.Serializer):
+    """
+    One valuation report row. Only the key columns of the requested
+    grouping are present.
+    """
+
+    stock_type = serializers.UUIDField(read_only=True, required=False)
+    stock_type_name = serializers.CharField(read_only=True, required=False)
+    product = serializers.UUIDField(read_only=True, required=False)
+    product_name = serializers.CharField(read_only=True, required=False)
+    sku = serializers.CharField(read_only=True, required=False)
+    brand = serializers.UUIDField(read_only=True, required=False)
+    brand_name = serializers.CharField(read_only=True, required=False)
+    quantity = serializers.IntegerField(read_only=True, help_text="Pieces on hand")
+    value = serializers.DecimalField(max_digits=20, decimal_places=2, read_only=True)
+    unit_cost = serializers.DecimalField(
+        max_digits=20, decimal_places=4, read_only=True, allow_null=True
+    )
@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.inventory import summaries
+from apps.inventory.checkpoints import invalidate_checkpoints
+from apps.inventory.valuation import mark_stale
+from apps.inventory.models import StockTransaction
+
+_BALANCE_FIELDS = (
+    "product_id",
+    "stock_type_id",
+    "transaction_type",
+    "ctn_quantity",
+    "piece_quantity",
+    "ctn_price",
+    "piece_price",
+    "created_at",
+)
+
+
+@receiver(pre_save, sender=StockTransaction)
+def remember_previous_stock_transaction(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of an edited transaction so its effect can be reversed."""
+    instance._previous_balance_state = None
+    if raw or instance._state.adding:
+        return
+    previous = (
+        StockTransaction.objects.filter(pk=instance.pk).values(*_BALANCE_FIELDS).first()
+    )
+    if previous:
+        instance._previous_balance_state = StockTransaction(**previous)
+
+
+@receiver(post_save, sender=StockTransaction)
+def update_stock_balance_on_save(sender, instance, created, raw=False, **kwargs):
+    """Move StockBalance by the difference between the old and new transaction."""
+    if raw:
+        return
+    previous = getattr(instance, "_previous_balance_state", None)
+    if previous is not None:
+        summaries.apply_transactions([previous], sign=-1)
+    summaries.apply_transactions([instance])
+
+
+@receiver(post_delete, sender=StockTransaction)
+def update_stock_balance_on_delete(sender, instance, **kwargs):
+    """Remove a deleted transaction's effect from StockBalance."""
+    summaries.apply_transactions([instance], sign=-1)
+
+
+@receiver(post_save, sender=StockTransaction)
+@receiver(post_delete, sender=StockTransaction)
+def invalidate_stock_checkpoints(sender, instance, raw=False, **kwargs):
+    """A change to a transaction inside a checkpointed period makes those checkpoints stale."""
+    if raw or instance.created_at is None:
+        return
+    invalidate_checkpoints(timezone.localdate(instance.created_at))
+
+
+@receiver(post_save, sender=StockTransaction)
+@receiver(post_delete, sender=StockTransaction)
+def mark_stock_valuation_stale(sender, instance, created=False, raw=False, **kwargs):
+    """Editing or deleting an already valued transaction makes its product replay."""
+    if raw or created:
+        return
+    product_ids = {instance.product_id}
+    previous = getattr(instance, "_previous_balance_state", None)
+    if previous is not None:
+        product_ids.add(previous.product_id)
+    for product_id in product_ids:
+        mark_stale(product_id, instance.created_at)
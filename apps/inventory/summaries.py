@@ -0,0 +1,413 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.core.registry import registry
+from apps.inventory.models import (
+    DailyStockMovement,
+    StockBalance,
+    StockTransaction,
+    TransactionType,
+)
+from apps.product.models import PriceFor, Product, ProductPrice
+
+CENT = Decimal("0.01")
+MOVEMENT_FIELDS = (
+    "in_ctn_quantity",
+    "in_piece_quantity",
+    "in_value",
+    "out_ctn_quantity",
+    "out_piece_quantity",
+    "out_value",
+)
+
+
+class InsufficientStock(serializers.ValidationError):
+    """
+    Posting would take a guarded stock type below zero. ``shortages`` holds
+    one dict per affected line with the requested and available quantities.
+    """
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(
+            {
+                "stock": [
+                    f'{row["product_name"]}: {row["requested_ctn"]} ctn / '
+                    f'{row["requested_piece"]} pcs requested from {row["stock_type_name"]}, '
+                    f'{row["available_ctn"]} ctn / {row["available_piece"]} pcs '
+                    f'({row["available_pieces"]} pcs) available.'
+                    for row in shortages
+                ]
+            }
+        )
+
+
+def transaction_value(stock_transaction) -> Decimal:
+    """Value of one transaction, rounded the same way the DB stores its prices."""
+    ctn_price = Decimal(str(stock_transaction.ctn_price or 0)).quantize(CENT)
+    piece_price = Decimal(str(stock_transaction.piece_price or 0)).quantize(CENT)
+    return (
+        ctn_price * stock_transaction.ctn_quantity
+        + piece_price * stock_transaction.piece_quantity
+    )
+
+
+def _balance_deltas(transactions, sign):
+    """Sum signed (ctn, piece, value) deltas per (product_id, stock_type_id)."""
+    deltas = defaultdict(lambda: [0, 0, Decimal("0")])
+    for tx in transactions:
+        direction = sign if tx.transaction_type == TransactionType.IN else -sign
+        delta = deltas[(tx.product_id, tx.stock_type_id)]
+        delta[0] += direction * tx.ctn_quantity
+        delta[1] += direction * tx.piece_quantity
+        delta[2] += direction * transaction_value(tx)
+    return deltas
+
+
+def _movement_deltas(transactions, sign):
+    """
+    Sum signed (in ctn, in pcs, in value, out ctn, out pcs, out value)
+    deltas per (day, product_id, stock_type_id).
+    """
+    deltas = defaultdict(lambda: [0, 0, Decimal("0"), 0, 0, Decimal("0")])
+    for tx in transactions:
+        day = timezone.localdate(tx.created_at) if tx.created_at else timezone.localdate()
+        delta = deltas[(day, tx.product_id, tx.stock_type_id)]
+        offset = 0 if tx.transaction_type == TransactionType.IN else 3
+        delta[offset] += sign * tx.ctn_quantity
+        delta[offset + 1] += sign * tx.piece_quantity
+        delta[offset + 2] += sign * transaction_value(tx)
+    return {key: delta for key, delta in deltas.items() if any(delta)}
+
+
+def _locked_rows(model, key_fields, keys):
+    """
+    Lock the ``model`` rows for ``keys`` (tuples of ``key_fields`` values) in
+    a stable order, creating the missing ones first.
+    """
+    filters = {
+        f"{field}__in": {key[position] for key in keys}
+        for position, field in enumerate(key_fields)
+    }
+
+    def locked():
+        rows = model.objects.select_for_update().filter(**filters).order_by(*key_fields)
+        return {tuple(getattr(row, field) for field in key_fields): row for row in rows}
+
+    if not keys:
+        return {}
+    rows = locked()
+    missing = [key for key in keys if key not in rows]
+    if missing:
+        model.objects.bulk_create(
+            [model(**dict(zip(key_fields, key))) for key in missing],
+            ignore_conflicts=True,
+        )
+        rows = locked()
+    return rows
+
+
+def guarded_stock_type_ids():
+    """Ids of the stock types named in STOCK_GUARDED_TYPES."""
+    names = registry.ids("stock_types", required=settings.STOCK_GUARDED_TYPES)
+    return {names[name] for name in settings.STOCK_GUARDED_TYPES if name in names}
+
+
+def _pieces(ctn, pcs, ctn_size):
+    return ctn * ctn_size + pcs
+
+
+def _ctn_sizes(transactions, keys):
+    """
+    Carton size per (product_id, stock_type_id) in ``keys``: the one of the
+    price the transactions were posted at, else the product's latest price,
+    else 1.
+    """
+    sizes = {}
+    price_ids = {}
+    price_field = StockTransaction._meta.get_field("product_price")
+    for tx in transactions:
+        key = (tx.product_id, tx.stock_type_id)
+        if key not in keys or key in sizes or not tx.product_price_id:
+            continue
+        if price_field.is_cached(tx):
+            if tx.product_price.ctn_size:
+                sizes[key] = tx.product_price.ctn_size
+        else:
+            price_ids.setdefault(key, tx.product_price_id)
+
+    price_ids = {key: pk for key, pk in price_ids.items() if key not in sizes}
+    if price_ids:
+        stored = dict(
+            ProductPrice.objects.filter(pk__in=price_ids.values()).values_list("id", "ctn_size")
+        )
+        for key, pk in price_ids.items():
+            if stored.get(pk):
+                sizes[key] = stored[pk]
+
+    missing = {key[0] for key in keys if key not in sizes}
+    if missing:
+        latest = dict(
+            ProductPrice.objects.filter(
+                product_id__in=missing, price_for=PriceFor.PRODUCT, is_latest=True
+            ).values_list("product_id", "ctn_size")
+        )
+        for key in keys:
+            sizes.setdefault(key, latest.get(key[0]) or 1)
+    return sizes
+
+
+def _line_id(tx):
+    return tx.order_item_id or tx.damage_order_item_id or tx.free_offer_item_id
+
+
+def _shortage_report(transactions, short, balances, sizes):
+    """Per-line shortage rows for the (product_id, stock_type_id) keys in ``short``."""
+    keys = set(short)
+    names = registry.names("stock_types", required={stock_type_id for _, stock_type_id in keys})
+    products = dict(
+        Product.objects.filter(
+            pk__in={product_id for product_id, _ in keys}
+        ).values_list("id", "name")
+    )
+
+    # Lines that draw on a short key; unlinked transactions share one row.
+    lines = defaultdict(lambda: [0, 0])
+    for tx in transactions:
+        key = (tx.product_id, tx.stock_type_id)
+        if key in keys and tx.transaction_type == TransactionType.OUT:
+            requested = lines[(key, _line_id(tx))]
+            requested[0] += tx.ctn_quantity
+            requested[1] += tx.piece_quantity
+
+    return [
+        {
+            "line": line_id,
+            "product": product_id,
+            "product_name": products.get(product_id, str(product_id)),
+            "stock_type": stock_type_id,
+            "stock_type_name": names.get(stock_type_id, str(stock_type_id)),
+            "requested_ctn": ctn,
+            "requested_piece": pcs,
+            "available_ctn": balances[(product_id, stock_type_id)].ctn_quantity,
+            "available_piece": balances[(product_id, stock_type_id)].piece_quantity,
+            "available_pieces": _pieces(
+                balances[(product_id, stock_type_id)].ctn_quantity,
+                balances[(product_id, stock_type_id)].piece_quantity,
+                sizes[(product_id, stock_type_id)],
+            ),
+        }
+        for ((product_id, stock_type_id), line_id), (ctn, pcs) in lines.items()
+    ]
+
+
+def apply_transactions(transactions, sign=1, check_stock=False):
+    """
+    Add (sign=1) or remove (sign=-1) the effect of transactions on StockBalance
+    and DailyStockMovement.
+
+    The touched rows are locked in a stable order, adjusted in Python and
+    written back with one bulk update, so the query count does not depend on
+    how many transactions or products are involved. The products whose
+    balances moved get a new updated_at, so the product change feed sends
+    their stock totals again.
+
+    With ``check_stock``, a stock type listed in STOCK_GUARDED_TYPES may not
+    be taken below zero, counted in pieces (cartons times the posted price's
+    carton size, plus loose pieces), so selling loose pieces out of full
+    cartons is allowed. The check runs against the locked rows, so
+    concurrent postings of the same product queue behind each other instead
+    of overselling; on a shortage nothing is written and InsufficientStock
+    is raised.
+    """
+    deltas = {
+        key: delta
+        for key, delta in _balance_deltas(transactions, sign).items()
+        if any(delta)
+    }
+    movements = _movement_deltas(transactions, sign)
+    if not deltas and not movements:
+        return
+
+    stock_type_ids = {stock_type_id for _, stock_type_id in deltas}
+    guarded = guarded_stock_type_ids() & stock_type_ids if check_stock else set()
+
+    with transaction.atomic():
+        balances = _locked_rows(StockBalance, ("product_id", "stock_type_id"), deltas)
+
+        drawn = {
+            key for key, (ctn, pcs, _) in deltas.items() if key[1] in guarded and (ctn < 0 or pcs < 0)
+        }
+        sizes = _ctn_sizes(transactions, drawn) if drawn else {}
+        short = [
+            key
+            for key in drawn
+            if _pieces(*deltas[key][:2], sizes[key]) < 0
+            and _pieces(
+                balances[key].ctn_quantity + deltas[key][0],
+                balances[key].piece_quantity + deltas[key][1],
+                sizes[key],
+            )
+            < 0
+        ]
+        if short:
+            raise InsufficientStock(_shortage_report(transactions, short, balances, sizes))
+
+        now = timezone.now()
+        changed = []
+        for key, (ctn, pcs, value) in deltas.items():
+            balance = balances[key]
+            balance.ctn_quantity += ctn
+            balance.piece_quantity += pcs
+            balance.total_price += value
+            balance.updated_at = now
+            changed.append(balance)
+        StockBalance.objects.bulk_update(
+            changed, ["ctn_quantity", "piece_quantity", "total_price", "updated_at"]
+        )
+        if changed:
+            Product.objects.filter(pk__in={product_id for product_id, _ in deltas}).update(
+                updated_at=now
+            )
+
+        days = _locked_rows(
+            DailyStockMovement, ("date", "product_id", "stock_type_id"), movements
+        )
+        changed = []
+        for key, delta in movements.items():
+            day = days[key]
+            for field, amount in zip(MOVEMENT_FIELDS, delta):
+                setattr(day, field, getattr(day, field) + amount)
+            day.updated_at = now
+            changed.append(day)
+        DailyStockMovement.objects.bulk_update(changed, [*MOVEMENT_FIELDS, "updated_at"])
+        emptied = [
+            day.pk
+            for day in changed
+            if not any(getattr(day, field) for field in MOVEMENT_FIELDS)
+        ]
+        if emptied:
+            DailyStockMovement.objects.filter(pk__in=emptied).delete()
+
+
+def day_start(day: datetime.date) -> datetime.datetime:
+    """Midnight at the start of ``day`` in the server timezone."""
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def ledger_between(after=None, through=None):
+    """
+    Transactions created after the day ``after`` up to and including the day
+    ``through`` (either bound optional). Bounds are turned into a created_at
+    range, rather than created_at__date, so the created_at index applies.
+    """
+    queryset = StockTransaction.objects.all()
+    if after:
+        queryset = queryset.filter(
+            created_at__gte=day_start(after + datetime.timedelta(days=1))
+        )
+    if through:
+        queryset = queryset.filter(
+            created_at__lt=day_start(through + datetime.timedelta(days=1))
+        )
+    return queryset
+
+
+def ledger_totals(queryset=None):
+    """Grouped IN minus OUT totals per (product, stock_type) straight from the ledger."""
+    queryset = StockTransaction.objects.all() if queryset is None else queryset
+    sign = Case(When(transaction_type=TransactionType.OUT, then=-1), default=1)
+    return (
+        queryset.order_by()
+        .values("product_id", "stock_type_id")
+        .annotate(
+            ctn_total=Sum(sign * F("ctn_quantity"), output_field=IntegerField()),
+            piece_total=Sum(sign * F("piece_quantity"), output_field=IntegerField()),
+            price_total=Sum(
+                sign * F("total_price"),
+                output_field=DecimalField(max_digits=16, decimal_places=2),
+            ),
+        )
+    )
+
+
+def rebuild_balances(product_ids=None):
+    """Recompute StockBalance rows from the full ledger. Returns the number of rows written."""
+    ledger = StockTransaction.objects.all()
+    balances = StockBalance.objects.all()
+    if product_ids:
+        ledger = ledger.filter(product_id__in=product_ids)
+        balances = balances.filter(product_id__in=product_ids)
+
+    rows = [
+        StockBalance(
+            product_id=row["product_id"],
+            stock_type_id=row["stock_type_id"],
+            ctn_quantity=row["ctn_total"] or 0,
+            piece_quantity=row["piece_total"] or 0,
+            total_price=row["price_total"] or Decimal("0"),
+        )
+        for row in ledger_totals(ledger)
+    ]
+    with transaction.atomic():
+        balances.delete()
+        StockBalance.objects.bulk_create(rows, batch_size=1000)
+        products = Product.objects.all()
+        if product_ids:
+            products = products.filter(pk__in=product_ids)
+        products.update(updated_at=timezone.now())
+    return len(rows)
+
+
+def rebuild_movements(product_ids=None):
+    """Recompute DailyStockMovement rows from the full ledger. Returns the number of rows written."""
+    ledger = StockTransaction.objects.all()
+    movements = DailyStockMovement.objects.all()
+    if product_ids:
+        ledger = ledger.filter(product_id__in=product_ids)
+        movements = movements.filter(product_id__in=product_ids)
+
+    def total(kind, field, output_field):
+        return Sum(
+            Case(
+                When(transaction_type=kind, then=F(field)),
+                default=Value(0),
+                output_field=output_field,
+            )
+        )
+
+    money = DecimalField(max_digits=16, decimal_places=2)
+    rows = (
+        ledger.order_by()
+        .annotate(date=TruncDate("created_at"))
+        .values("date", "product_id", "stock_type_id")
+        .annotate(
+            in_ctn_quantity=total(TransactionType.IN, "ctn_quantity", IntegerField()),
+            in_piece_quantity=total(TransactionType.IN, "piece_quantity", IntegerField()),
+            in_value=total(TransactionType.IN, "total_price", money),
+            out_ctn_quantity=total(TransactionType.OUT, "ctn_quantity", IntegerField()),
+            out_piece_quantity=total(TransactionType.OUT, "piece_quantity", IntegerField()),
+            out_value=total(TransactionType.OUT, "total_price", money),
+        )
+    )
+    days = [
+        DailyStockMovement(
+            date=row["date"],
+            product_id=row["product_id"],
+            stock_type_id=row["stock_type_id"],
+            **{field: row[field] or 0 for field in MOVEMENT_FIELDS},
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        movements.delete()
+        DailyStockMovement.objects.bulk_create(days, batch_size=1000)
+    return len(days)
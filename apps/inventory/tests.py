@@ -1,4 +1,457 @@
-from django.test import TestCase
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
 
+from apps.inventory.checkpoints import build_checkpoints, first_invalid_checkpoint
+from apps.inventory.models import (
+    DailyStockMovement,
+    StockBalance,
+    StockCheckpoint,
+    StockTransaction,
+    StockType,
+    StockValuation,
+    TransactionType,
+    ValuationMethod,
+)
+from apps.inventory.summaries import InsufficientStock, ledger_totals, rebuild_movements
+from apps.inventory.valuation import update_valuations
+from apps.product.models import Brand, Product, ProductPrice
+
+
+def make_product(name):
+    brand, _ = Brand.objects.get_or_create(name="Brand")
+    product = Product.objects.create(name=name, brand=brand, sku=f"SKU-{name}")
+    price = ProductPrice.objects.create(
+        product=product,
+        ctn_size=12,
+        ctn_price=Decimal("120.00"),
+        piece_price=Decimal("10.00"),
+    )
+    return product, price
+
+
+def stock_transaction(product, price, stock_type, transaction_type, ctn=0, pcs=0):
+    return StockTransaction(
+        stock_type=stock_type,
+        product=product,
+        product_price=price,
+        transaction_type=transaction_type,
+        ctn_quantity=ctn,
+        piece_quantity=pcs,
+        ctn_price=price.ctn_price,
+        piece_price=price.piece_price,
+    )
+
+
+def stored_balances():
+    return {
+        (row.product_id, row.stock_type_id): (row.ctn_quantity, row.piece_quantity, row.total_price)
+        for row in StockBalance.objects.all()
+        if row.ctn_quantity or row.piece_quantity or row.total_price
+    }
+
+
+def ledger_balances():
+    return {
+        (row["product_id"], row["stock_type_id"]): (
+            row["ctn_total"],
+            row["piece_total"],
+            row["price_total"],
+        )
+        for row in ledger_totals()
+        if row["ctn_total"] or row["piece_total"] or row["price_total"]
+    }
+
+
+def stored_movements():
+    return sorted(
+        DailyStockMovement.objects.values_list(
+            "date",
+            "product_id",
+            "stock_type_id",
+            "in_ctn_quantity",
+            "in_piece_quantity",
+            "in_value",
+            "out_ctn_quantity",
+            "out_piece_quantity",
+            "out_value",
+        )
+    )
+
+
+class LedgerSummaryTestCase(TestCase):
+    """Asserts the maintained stock summaries against a recomputation from the ledger."""
+
+    def setUp(self):
+        call_command("setup", stdout=StringIO())
+        self.regular = StockType.objects.get(name="Regular Stock")
+        self.free = StockType.objects.get(name="Free Stock")
+
+    def assertSummariesMatchLedger(self):
+        self.assertEqual(stored_balances(), ledger_balances())
+        maintained = stored_movements()
+        rebuild_movements()
+        self.assertEqual(maintained, stored_movements())
+
+
+class StockSummaryTests(LedgerSummaryTestCase):
+    """StockBalance and DailyStockMovement follow every ledger write."""
+
+    def setUp(self):
+        super().setUp()
+        self.soap, self.soap_price = make_product("Soap")
+        self.rice, self.rice_price = make_product("Rice")
+
+    def test_create_update_delete(self):
+        received = stock_transaction(
+            self.soap, self.soap_price, self.regular, TransactionType.IN, ctn=10, pcs=5
+        )
+        received.save()
+        sold = stock_transaction(
+            self.soap, self.soap_price, self.regular, TransactionType.OUT, ctn=3, pcs=1
+        )
+        sold.save()
+        self.assertEqual(stored_balances()[(self.soap.pk, self.regular.pk)][:2], (7, 4))
+        self.assertSummariesMatchLedger()
+
+        received.ctn_quantity = 20
+        received.save()
+        self.assertSummariesMatchLedger()
+
+        # Moving a row to another product, stock type and direction.
+        sold.product, sold.product_price = self.rice, self.rice_price
+        sold.stock_type = self.free
+        sold.transaction_type = TransactionType.IN
+        sold.save()
+        self.assertSummariesMatchLedger()
+
+        received.delete()
+        sold.delete()
+        self.assertEqual(stored_balances(), {})
+        self.assertSummariesMatchLedger()
+
+    def test_bulk_post(self):
+        StockTransaction.objects.bulk_post(
+            [
+                stock_transaction(self.soap, self.soap_price, self.regular, TransactionType.IN, ctn=5),
+                stock_transaction(self.soap, self.soap_price, self.regular, TransactionType.OUT, pcs=7),
+                stock_transaction(self.soap, self.soap_price, self.free, TransactionType.OUT, ctn=1),
+                stock_transaction(self.rice, self.rice_price, self.regular, TransactionType.IN, pcs=30),
+            ]
+        )
+        self.assertEqual(StockTransaction.objects.count(), 4)
+        self.assertSummariesMatchLedger()
+
+        StockTransaction.objects.filter(product=self.rice).first().delete()
+        self.assertSummariesMatchLedger()
+
+
+class StockCheckpointTests(LedgerSummaryTestCase):
+    """Stored checkpoints agree with the ledger after edits inside closed periods."""
+
+    def setUp(self):
+        super().setUp()
+        product, price = make_product("Soap")
+        now = timezone.now()
+        self.transactions = []
+        for days_ago, transaction_type, ctn in ((40, "IN", 9), (30, "OUT", 2), (20, "IN", 4), (10, "OUT", 3)):
+            row = stock_transaction(product, price, self.regular, transaction_type, ctn=ctn)
+            row.save()
+            StockTransaction.objects.filter(pk=row.pk).update(
+                created_at=now - datetime.timedelta(days=days_ago)
+            )
+            row.refresh_from_db()
+            self.transactions.append(row)
+        build_checkpoints(period="daily")
+
+    def test_checkpoints_match_ledger(self):
+        self.assertTrue(StockCheckpoint.objects.exists())
+        self.assertIsNone(first_invalid_checkpoint())
+
+    def test_update_and_delete_in_a_closed_period(self):
+        edited = self.transactions[1]
+        edited.ctn_quantity = 5
+        edited.save()
+        self.assertFalse(
+            StockCheckpoint.objects.filter(
+                period_end__gte=timezone.localdate(edited.created_at)
+            ).exists()
+        )
+        self.assertIsNone(first_invalid_checkpoint())
+
+        self.transactions[0].delete()
+        self.assertIsNone(first_invalid_checkpoint())
+
+        build_checkpoints(period="daily")
+        self.assertIsNone(first_invalid_checkpoint())
+        self.assertEqual(stored_balances(), ledger_balances())
+
+    def test_new_transaction(self):
+        product, price = make_product("Rice")
+        stock_transaction(product, price, self.regular, TransactionType.IN, ctn=1).save()
+        build_checkpoints(period="daily")
+        self.assertIsNone(first_invalid_checkpoint())
+
+
+@override_settings(STOCK_GUARDED_TYPES=["Regular Stock"])
+class StockGuardTests(TestCase):
+    """bulk_post(check_stock=True) against a guarded stock type."""
+
+    def setUp(self):
+        call_command("setup", stdout=StringIO())
+        self.stock_type = StockType.objects.get(name="Regular Stock")
+        self.product, self.price = make_product("Soap")
+        # 7 ctn / 2 pcs on hand: 86 pieces.
+        self.post(TransactionType.IN, 7, 2)
+
+    def post(self, transaction_type, ctn, pcs, check_stock=False):
+        return StockTransaction.objects.bulk_post(
+            [
+                stock_transaction(
+                    self.product, self.price, self.stock_type, transaction_type, ctn, pcs
+                )
+            ],
+            check_stock=check_stock,
+        )
+
+    def balance(self):
+        row = StockBalance.objects.get(product=self.product, stock_type=self.stock_type)
+        return row.ctn_quantity, row.piece_quantity
+
+    def test_sale_within_stock_is_posted(self):
+        self.post(TransactionType.OUT, 3, 1, check_stock=True)
+        self.assertEqual(self.balance(), (4, 1))
+
+    def test_shortage_is_rejected_without_writing(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            self.post(TransactionType.OUT, 7, 3, check_stock=True)
+        self.assertEqual(raised.exception.shortages[0]["available_pieces"], 86)
+        self.assertEqual(self.balance(), (7, 2))
+        self.assertEqual(StockTransaction.objects.count(), 1)
+
+    def test_loose_pieces_are_taken_out_of_cartons(self):
+        self.post(TransactionType.OUT, 0, 6, check_stock=True)
+        self.assertEqual(self.balance(), (7, -4))
+
+        # What is left is 80 pieces, however it is split.
+        self.post(TransactionType.OUT, 6, 8, check_stock=True)
+        with self.assertRaises(InsufficientStock):
+            self.post(TransactionType.OUT, 0, 1, check_stock=True)
+
+    def test_unguarded_stock_type_may_go_negative(self):
+        with override_settings(STOCK_GUARDED_TYPES=[]):
+            self.post(TransactionType.OUT, 10, 0, check_stock=True)
+        self.assertEqual(self.balance(), (-3, 2))
+
+
+class StockValuationTests(LedgerSummaryTestCase):
+    """Incremental valuation runs agree with a full replay of the ledger."""
+
+    def setUp(self):
+        super().setUp()
+        self.soap, self.soap_price = make_product("Soap")
+        self.rice, self.rice_price = make_product("Rice")
+        self.start = timezone.now() - datetime.timedelta(hours=3)
+
+    def post(self, product, price, transaction_type, minute, ctn=0, pcs=0, ctn_price=0, piece_price=0):
+        row = stock_transaction(product, price, self.regular, transaction_type, ctn, pcs)
+        row.ctn_price, row.piece_price = ctn_price, piece_price
+        row.save()
+        StockTransaction.objects.filter(pk=row.pk).update(
+            created_at=self.start + datetime.timedelta(minutes=minute)
+        )
+        row.refresh_from_db()
+        return row
+
+    def valuations(self):
+        return sorted(
+            StockValuation.objects.values_list("product__name", "method", "quantity", "value", "stale")
+        )
+
+    def assertMatchesReplay(self):
+        incremental = self.valuations()
+        update_valuations(rebuild=True)
+        self.assertEqual(incremental, self.valuations())
+
+    def test_fifo_and_wac_after_partial_consumption(self):
+        # 12 pieces at 10, 12 pieces at 15, then 18 pieces out.
+        self.post(self.soap, self.soap_price, TransactionType.IN, 0, ctn=1, ctn_price=120)
+        self.post(self.soap, self.soap_price, TransactionType.IN, 1, pcs=12, piece_price=15)
+        self.post(self.soap, self.soap_price, TransactionType.OUT, 2, pcs=18, piece_price=20)
+        update_valuations()
+
+        values = dict(
+            StockValuation.objects.filter(product=self.soap).values_list("method", "value")
+        )
+        # FIFO keeps the last 6 pieces at 15; WAC values them at the 12.50 average.
+        self.assertEqual(values[ValuationMethod.FIFO], Decimal("90"))
+        self.assertEqual(values[ValuationMethod.WAC], Decimal("75"))
+        self.assertEqual(
+            set(StockValuation.objects.filter(product=self.soap).values_list("quantity", flat=True)),
+            {6},
+        )
+        self.assertMatchesReplay()
+
+    def test_late_commit_inside_the_window_is_replayed(self):
+        for minute in range(5):
+            self.post(self.soap, self.soap_price, TransactionType.IN, minute, ctn=1, ctn_price=100 + minute)
+            self.post(self.rice, self.rice_price, TransactionType.IN, minute, ctn=1, ctn_price=100 + minute)
+        update_valuations()
+        rice = [row for row in self.valuations() if row[0] == "Rice"]
+
+        # Committed now, created 1.5 minutes behind the cursor: inside LATE_COMMIT_WINDOW.
+        self.post(self.soap, self.soap_price, TransactionType.IN, 2.5, ctn=3, ctn_price=999)
+        update_valuations()
+
+        soap = StockValuation.objects.get(product=self.soap, method=ValuationMethod.WAC)
+        self.assertEqual(soap.quantity, 8 * 12)
+        # Only the soap was replayed.
+        self.assertEqual([row for row in self.valuations() if row[0] == "Rice"], rice)
+        self.assertMatchesReplay()
+
+    def test_edit_behind_the_cursor_marks_the_product_stale(self):
+        self.post(self.soap, self.soap_price, TransactionType.IN, 0, ctn=1, ctn_price=120)
+        received = self.post(self.soap, self.soap_price, TransactionType.IN, 1, pcs=12, piece_price=15)
+        self.post(self.soap, self.soap_price, TransactionType.OUT, 2, pcs=18)
+        self.post(self.rice, self.rice_price, TransactionType.IN, 3, ctn=2, ctn_price=100)
+        update_valuations()
+
+        received.piece_price = 5
+        received.save()
+        stale = dict(StockValuation.objects.values_list("product__name", "stale").distinct())
+        self.assertEqual(stale, {"Soap": True, "Rice": False})
+
+        update_valuations()
+        self.assertFalse(StockValuation.objects.filter(stale=True).exists())
+        fifo = StockValuation.objects.get(product=self.soap, method=ValuationMethod.FIFO)
+        self.assertEqual(fifo.value, Decimal("30"))
+        self.assertMatchesReplay()
+
+
+class StockMovementChartTests(LedgerSummaryTestCase):
+    """The DailyStockMovement rollup and the chart built on it agree with the raw ledger."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="storekeeper"))
+        self.soap, self.soap_price = make_product("Soap")
+        self.rice, self.rice_price = make_product("Rice")
+        self.today = timezone.localdate()
+        self.date_from = self.today - datetime.timedelta(days=14)
+        self.rows = {}
+        for name, days_ago, transaction_type, ctn, pcs in (
+            ("opening", 20, TransactionType.IN, 10, 6),
+            ("sale", 12, TransactionType.OUT, 3, 1),
+            ("restock", 8, TransactionType.IN, 4, 0),
+            ("late sale", 3, TransactionType.OUT, 2, 5),
+            ("other stock type", 8, TransactionType.IN, 1, 0),
+        ):
+            stock_type = self.free if name == "other stock type" else self.regular
+            row = stock_transaction(self.soap, self.soap_price, stock_type, transaction_type, ctn, pcs)
+            row.save()
+            self.back_date(row, days_ago)
+            self.rows[name] = row
+        # Another product on the same day.
+        rice = stock_transaction(self.rice, self.rice_price, self.regular, TransactionType.IN, ctn=5)
+        rice.save()
+        self.back_date(rice, 8)
+
+    def back_date(self, row, days_ago):
+        # Saved through the model, so the rollup follows the move.
+        row.created_at = timezone.now() - datetime.timedelta(days=days_ago)
+        row.save()
+
+    def raw_days(self):
+        """(IN ctn, IN pcs, IN value, OUT ctn, OUT pcs, OUT value) per day for soap in Regular Stock."""
+        days = defaultdict(lambda: [0, 0, Decimal("0"), 0, 0, Decimal("0")])
+        for row in StockTransaction.objects.filter(product=self.soap, stock_type=self.regular):
+            offset = 0 if row.transaction_type == TransactionType.IN else 3
+            day = days[timezone.localdate(row.created_at)]
+            day[offset] += row.ctn_quantity
+            day[offset + 1] += row.piece_quantity
+            day[offset + 2] += row.total_price
+        return days
+
+    def chart(self):
+        response = self.client.get(
+            "/inventory/stock-movements/",
+            {
+                "date_from": self.date_from.isoformat(),
+                "date_to": self.today.isoformat(),
+                "product": str(self.soap.pk),
+                "stock_type": str(self.regular.pk),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertChartMatchesLedger(self):
+        self.assertSummariesMatchLedger()
+        raw = self.raw_days()
+        chart = self.chart()
+
+        def moved(balance, day):
+            return [balance[i] + day[i] - day[i + 3] for i in range(3)]
+
+        def balance_of(entry):
+            return [
+                entry["balance_ctn_quantity"],
+                entry["balance_piece_quantity"],
+                Decimal(entry["balance_value"]),
+            ]
+
+        balance = [0, 0, Decimal("0")]
+        for day, movement in raw.items():
+            if day < self.date_from:
+                balance = moved(balance, movement)
+        self.assertEqual(balance_of(chart["opening"]), balance)
+
+        self.assertEqual(len(chart["days"]), 15)
+        for entry in chart["days"]:
+            day = datetime.date.fromisoformat(entry["date"])
+            expected = raw.get(day, [0, 0, Decimal("0"), 0, 0, Decimal("0")])
+            self.assertEqual(
+                [
+                    entry["in_ctn_quantity"],
+                    entry["in_piece_quantity"],
+                    Decimal(entry["in_value"]),
+                    entry["out_ctn_quantity"],
+                    entry["out_piece_quantity"],
+                    Decimal(entry["out_value"]),
+                ],
+                expected,
+                day,
+            )
+            balance = moved(balance, expected)
+            self.assertEqual(balance_of(entry), balance, day)
+
+    def test_chart_matches_ledger(self):
+        self.assertChartMatchesLedger()
+        self.assertEqual(self.chart()["opening"]["balance_ctn_quantity"], 10)
+
+    def test_back_dated_edit(self):
+        # Out of the range into the opening balance, with a new quantity.
+        sale = self.rows["late sale"]
+        sale.ctn_quantity = 4
+        self.back_date(sale, 18)
+        self.assertChartMatchesLedger()
+        self.assertEqual(self.chart()["opening"]["balance_ctn_quantity"], 6)
+
+        # And back into the range, on another day.
+        self.back_date(sale, 5)
+        self.assertChartMatchesLedger()
+
+    def test_delete(self):
+        self.rows["restock"].delete()
+        self.assertChartMatchesLedger()
+        self.rows["opening"].delete()
+        self.assertChartMatchesLedger()
+        self.assertEqual(self.chart()["opening"]["balance_ctn_quantity"], 0)
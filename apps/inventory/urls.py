@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StockTypeViewSet, StockTransactionViewSet, StockTypeReportView
+from .views import (
+    StockTypeViewSet,
+    StockTransactionViewSet,
+    StockTypeReportView,
+    StockValuationReportView,
+    StockMovementChartView,
+)
 
 router = DefaultRouter()
 router.register(r"stock-types", StockTypeViewSet)
@@ -8,5 +14,7 @@ router.register(r"stock-transactions", StockTransactionViewSet)
 
 urlpatterns = [
     path("stock-type-report/", StockTypeReportView.as_view(), name="stock-type-report"),
+    path("stock-valuation/", StockValuationReportView.as_view(), name="stock-valuation"),
+    path("stock-movements/", StockMovementChartView.as_view(), name="stock-movements"),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,281 @@
+import datetime
+from collections import deque
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.inventory.models import (
+    StockTransaction,
+    StockValuation,
+    StockValuationCursor,
+    TransactionType,
+    ValuationMethod,
+)
+from apps.product.models import PriceFor, ProductPrice
+
+# Rows younger than this are left for the next run, so a transaction that
+# commits a little after its created_at is usually not yet behind the cursor.
+SETTLE_DELAY = datetime.timedelta(minutes=5)
+# Rows created this long before the cursor are checked again on every run; one
+# that was not there last time committed late and its product is replayed.
+# Rows committed later than this after their created_at are only picked up by
+# a rebuild.
+LATE_COMMIT_WINDOW = datetime.timedelta(hours=1)
+STREAM_CHUNK_SIZE = 2000
+ZERO = Decimal("0")
+# Stored precision; running values are rounded to it after every step so an
+# incremental run gives exactly the same figures as a full replay.
+VALUE_PLACES = Decimal("0.0001")
+UNIT_COST_PLACES = Decimal("0.000001")
+
+
+class CostState:
+    """Running quantity/value of one (product, stock type) under one method."""
+
+    def __init__(self, method, quantity=0, value=ZERO, last_unit_cost=ZERO, layers=()):
+        self.method = method
+        self.quantity = quantity
+        self.value = Decimal(value)
+        self.last_unit_cost = Decimal(last_unit_cost)
+        self.layers = deque([qty, Decimal(cost)] for qty, cost in layers)
+
+    def receive(self, pieces, cost):
+        if pieces <= 0:
+            return
+        unit_cost = (cost / pieces).quantize(UNIT_COST_PLACES)
+        self.last_unit_cost = unit_cost
+        if self.method == ValuationMethod.FIFO:
+            # A shortfall (negative layer) is filled before a new layer opens.
+            if self.layers and self.layers[0][0] < 0:
+                filled = min(pieces, -self.layers[0][0])
+                self.layers[0][0] += filled
+                pieces -= filled
+                if self.layers[0][0] == 0:
+                    self.layers.popleft()
+            if pieces:
+                self.layers.append([pieces, unit_cost])
+            self._revalue_layers()
+        elif self.quantity >= 0:
+            self.quantity += pieces
+            self.value += cost
+        else:
+            self.quantity += pieces
+            self.value = (unit_cost * self.quantity).quantize(VALUE_PLACES)
+
+    def issue(self, pieces):
+        if pieces <= 0:
+            return
+        if self.method == ValuationMethod.FIFO:
+            while pieces and self.layers and self.layers[0][0] > 0:
+                layer = self.layers[0]
+                taken = min(pieces, layer[0])
+                layer[0] -= taken
+                pieces -= taken
+                if layer[0] == 0:
+                    self.layers.popleft()
+            if pieces:
+                # More out than in: carry the shortfall at the latest cost.
+                if self.layers:
+                    self.layers[0][0] -= pieces
+                else:
+                    self.layers.append([-pieces, self.last_unit_cost])
+            self._revalue_layers()
+            return
+        average = self.value / self.quantity if self.quantity > 0 else self.last_unit_cost
+        self.quantity -= pieces
+        self.value = (average * self.quantity).quantize(VALUE_PLACES)
+
+    def _revalue_layers(self):
+        self.quantity = sum(qty for qty, _ in self.layers)
+        self.value = sum((qty * cost for qty, cost in self.layers), ZERO).quantize(VALUE_PLACES)
+
+    def serialized_layers(self):
+        return [[qty, str(cost)] for qty, cost in self.layers]
+
+
+def _ledger_rows():
+    """Ledger rows with their carton size, for the streaming pass."""
+    latest_ctn_size = ProductPrice.objects.filter(
+        product=OuterRef("product_id"), price_for=PriceFor.PRODUCT, is_latest=True
+    ).values("ctn_size")[:1]
+    return StockTransaction.objects.annotate(
+        ctn_size=Coalesce(
+            "product_price__ctn_size",
+            Subquery(latest_ctn_size, output_field=IntegerField()),
+            Value(1),
+        )
+    ).order_by("created_at", "id")
+
+
+def _load_states(exclude_product_ids):
+    states = {}
+    rows = StockValuation.objects.exclude(product_id__in=exclude_product_ids)
+    for row in rows:
+        states[(row.product_id, row.stock_type_id, row.method)] = CostState(
+            row.method, row.quantity, row.value, row.last_unit_cost, row.layers
+        )
+    return states
+
+
+def _valuation_row(key, state):
+    product_id, stock_type_id, method = key
+    return StockValuation(
+        product_id=product_id,
+        stock_type_id=stock_type_id,
+        method=method,
+        quantity=state.quantity,
+        value=state.value,
+        last_unit_cost=state.last_unit_cost,
+        layers=state.serialized_layers(),
+    )
+
+
+@transaction.atomic
+def update_valuations(rebuild=False):
+    """
+    Bring StockValuation up to date with the ledger in one pass ordered by
+    (created_at, id).
+
+    Only rows after the stored cursor are read, plus the full history of
+    products whose valuation was marked stale by a ledger edit, or that got
+    a row behind the cursor since the last run (a transaction that committed
+    long after its created_at; see LATE_COMMIT_WINDOW). The cursor row is
+    locked for the run, so concurrent runs queue instead of double-counting.
+    Returns the number of valuation rows written.
+    """
+    cursor = StockValuationCursor.objects.select_for_update().first()
+    if cursor is None:
+        cursor = StockValuationCursor.objects.create()
+        cursor = StockValuationCursor.objects.select_for_update().get(pk=cursor.pk)
+    if rebuild:
+        StockValuation.objects.all().delete()
+        cursor.last_created_at = cursor.last_id = None
+
+    replay = set(
+        StockValuation.objects.filter(stale=True).values_list("product_id", flat=True)
+    )
+    recent = {}
+    if cursor.last_created_at is not None:
+        window = StockTransaction.objects.filter(
+            Q(created_at__lt=cursor.last_created_at)
+            | Q(created_at=cursor.last_created_at, id__lte=cursor.last_id),
+            created_at__gt=cursor.last_created_at - LATE_COMMIT_WINDOW,
+        )
+        # None on the first run after the window was introduced: nothing to compare.
+        known = set(cursor.recent_ids) if cursor.recent_ids is not None else None
+        for tx_id, created_at, product_id in window.values_list("id", "created_at", "product_id"):
+            recent[tx_id] = created_at
+            if known is not None and str(tx_id) not in known:
+                replay.add(product_id)
+    states = _load_states(replay)
+
+    upper = timezone.now() - SETTLE_DELAY
+    rows = _ledger_rows().filter(created_at__lt=upper)
+    if cursor.last_created_at is not None:
+        after_cursor = Q(created_at__gt=cursor.last_created_at) | Q(
+            created_at=cursor.last_created_at, id__gt=cursor.last_id
+        )
+        rows = rows.filter(after_cursor | Q(product_id__in=replay))
+
+    touched = set()
+    streamed = deque()
+    for tx_id, created_at, product_id, stock_type_id, kind, ctn, pcs, ctn_size, cost in rows.values_list(
+        "id",
+        "created_at",
+        "product_id",
+        "stock_type_id",
+        "transaction_type",
+        "ctn_quantity",
+        "piece_quantity",
+        "ctn_size",
+        "total_price",
+    ).iterator(chunk_size=STREAM_CHUNK_SIZE):
+        pieces = ctn * ctn_size + pcs
+        for method in ValuationMethod.values:
+            key = (product_id, stock_type_id, method)
+            state = states.get(key)
+            if state is None:
+                state = states[key] = CostState(method)
+            if kind == TransactionType.IN:
+                state.receive(pieces, cost or ZERO)
+            else:
+                state.issue(pieces)
+            touched.add(key)
+        # The stream is in created_at order: keep only the trailing window.
+        streamed.append((created_at, tx_id))
+        while streamed[0][0] <= created_at - LATE_COMMIT_WINDOW:
+            streamed.popleft()
+        if cursor.last_created_at is None or (created_at, tx_id) > (
+            cursor.last_created_at,
+            cursor.last_id,
+        ):
+            cursor.last_created_at, cursor.last_id = created_at, tx_id
+
+    if cursor.last_created_at is not None:
+        recent.update((tx_id, created_at) for created_at, tx_id in streamed)
+        horizon = cursor.last_created_at - LATE_COMMIT_WINDOW
+        cursor.recent_ids = sorted(
+            str(tx_id) for tx_id, created_at in recent.items() if created_at > horizon
+        )
+
+    StockValuation.objects.filter(product_id__in=replay).delete()
+    StockValuation.objects.bulk_create(
+        [_valuation_row(key, states[key]) for key in touched],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["product", "stock_type", "method"],
+        update_fields=["quantity", "value", "last_unit_cost", "layers", "stale", "updated_at"],
+    )
+    cursor.save()
+    return len(touched)
+
+
+def mark_stale(product_id, created_at):
+    """A ledger change at ``created_at`` invalidates a product already valued past it."""
+    cursor = StockValuationCursor.objects.values_list("last_created_at", flat=True).first()
+    if cursor is not None and created_at <= cursor:
+        StockValuation.objects.filter(product_id=product_id).update(stale=True)
+
+
+# group_by value -> (key, lookup) columns of the valuation report.
+VALUATION_GROUPINGS = {
+    "stock_type": {"stock_type": "stock_type_id", "stock_type_name": "stock_type__name"},
+    "product": {
+        "product": "product_id",
+        "product_name": "product__name",
+        "sku": "product__sku",
+        "brand": "product__brand_id",
+        "brand_name": "product__brand__name",
+    },
+    "brand": {"brand": "product__brand_id", "brand_name": "product__brand__name"},
+}
+
+
+def valuation_report(method, group_by="stock_type", stock_type_ids=None, brand_ids=None):
+    """Quantity on hand (pieces), cost value and unit cost grouped per stock type, product or brand."""
+    columns = VALUATION_GROUPINGS[group_by]
+    queryset = StockValuation.objects.filter(method=method)
+    if stock_type_ids:
+        queryset = queryset.filter(stock_type_id__in=stock_type_ids)
+    if brand_ids:
+        queryset = queryset.filter(product__brand_id__in=brand_ids)
+    rows = (
+        queryset.order_by(*[lookup for key, lookup in columns.items() if key.endswith("name")])
+        .values(*columns.values())
+        .annotate(total_quantity=Sum("quantity"), total_value=Sum("value"))
+    )
+    report = []
+    for row in rows:
+        quantity, value = row["total_quantity"] or 0, row["total_value"] or ZERO
+        report.append(
+            {key: row[lookup] for key, lookup in columns.items()}
+            | {
+                "quantity": quantity,
+                "value": value,
+                "unit_cost": value / quantity if quantity > 0 else None,
+            }
+        )
+    return report
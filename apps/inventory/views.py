@@ -1,16 +1,32 @@
-from rest_framework import viewsets, mixins, filters, views
+from django.db import transaction
+from rest_framework import viewsets, mixins, filters, status, views
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
 from .filters import StockTransactionFilter
 from .models import StockType, StockTransaction
+from .reports import movement_series, stock_report
+from .valuation import valuation_report
 from .serializers import (
     StockTypeSerializer,
     StockTypeReportSerializer,
+    StockReportQuerySerializer,
     StockTransactionSerializer,
+    StockTransactionBulkSerializer,
+    StockTransferSerializer,
+    StockValuationReportSerializer,
+    ValuationQuerySerializer,
+    StockMovementChartSerializer,
+    StockMovementQuerySerializer,
 )
-from apps.core.utils import DefaultPagination
+from apps.core.utils import DefaultPagination, LedgerPagination
+from apps.core.exports import ExportMixin
+from apps.core.idempotency import IdempotencyMixin
+from apps.core.parsers import CSVParser, read_csv_rows
 
 # utils
 from drf_spectacular.utils import extend_schema
@@ -46,18 +62,94 @@ class StockTypeViewSet(
 class StockTypeReportView(views.APIView):
     """
     Report API: list all stock types with total carton and piece quantities.
+
+    ``?as_of=`` gives the stock at the end of a day (nearest stock checkpoint
+    plus the transactions after it), ``?date_from=`` / ``?date_to=`` the net
+    movement within a range, ``?brand=`` limits the products counted and
+    ``?group_by=product|brand`` adds a breakdown. Each source is read with a
+    single grouped query (see apps.inventory.reports).
     """
 
     permission_classes = [IsAuthenticated]
     serializer_class = StockTypeReportSerializer
 
+    @extend_schema(parameters=[StockReportQuerySerializer])
+    def get(self, request):
+        params = StockReportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        report = stock_report(
+            date_from=params.validated_data.get("date_from"),
+            date_to=params.validated_data.get("date_to"),
+            brand_ids=params.validated_data.get("brand"),
+            group_by=params.validated_data.get("group_by"),
+        )
+        serializer = self.serializer_class(report, many=True)
+        return Response(serializer.data)
+
+
+@extend_schema(tags=["Stock Reports"])
+class StockValuationReportView(views.APIView):
+    """
+    Cost valuation of the stock on hand (FIFO or moving weighted average)
+    per stock type, product or brand. Quantities are in pieces.
+
+    Read-only: the report shows the persisted valuation as of the last
+    ``update_stock_valuation`` run (scheduled with cron; see
+    apps.inventory.valuation), so ledger rows added since then are not in
+    it yet.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockValuationReportSerializer
+
+    @extend_schema(parameters=[ValuationQuerySerializer])
+    def get(self, request):
+        params = ValuationQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        report = valuation_report(
+            params.validated_data["method"],
+            group_by=params.validated_data["group_by"],
+            stock_type_ids=params.validated_data.get("stock_type"),
+            brand_ids=params.validated_data.get("brand"),
+        )
+        serializer = self.serializer_class(report, many=True)
+        return Response(serializer.data)
+
+
+@extend_schema(tags=["Stock Reports"])
+class StockMovementChartView(views.APIView):
+    """
+    Daily IN/OUT totals and running stock balance over a date range, for
+    charts. ``?product=``, ``?stock_type=`` and ``?brand=`` narrow what is
+    summed. Read from the DailyStockMovement rollup, never the raw ledger.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockMovementChartSerializer
+
+    @extend_schema(parameters=[StockMovementQuerySerializer])
     def get(self, request):
-        queryset = StockType.objects.all().order_by("name")
-        serializer = self.serializer_class(queryset, many=True)
+        params = StockMovementQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        date_from = params.validated_data["date_from"]
+        date_to = params.validated_data["date_to"]
+        opening, days = movement_series(
+            date_from,
+            date_to,
+            product_ids=params.validated_data.get("product"),
+            stock_type_ids=params.validated_data.get("stock_type"),
+            brand_ids=params.validated_data.get("brand"),
+        )
+        serializer = self.serializer_class(
+            {"date_from": date_from, "date_to": date_to, "opening": opening, "days": days}
+        )
         return Response(serializer.data)
 
+
 @extend_schema(tags=["Stock Transactions"])
 class StockTransactionViewSet(
+    IdempotencyMixin,
+    ExportMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -67,7 +159,10 @@ class StockTransactionViewSet(
 ):
     """
     API endpoint that allows stock transactions to be viewed or edited.
-    Supports creating transactions with IN/OUT types and transfers.
+    Supports creating transactions with IN/OUT types; transfers are posted
+    through ``transfer/`` as paired OUT/IN legs sharing a ``transfer_id``.
+    Transfer legs cannot be edited one by one, and deleting a leg deletes
+    the whole transfer.
 
     Date range (inclusive, on ``created_at`` date in the server timezone):
     ``?date_from=YYYY-MM-DD`` and/or ``?date_to=YYYY-MM-DD``.
@@ -77,7 +172,7 @@ class StockTransactionViewSet(
 
     queryset = StockTransaction.objects.select_related(
         "stock_type",
-        "product",
+        "product__brand",
         "product_price",
         "order_item",
         "damage_order_item",
@@ -86,7 +181,7 @@ class StockTransactionViewSet(
         "transfer_to",
     ).all()
     serializer_class = StockTransactionSerializer
-    pagination_class = DefaultPagination
+    pagination_class = LedgerPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     search_fields = [
@@ -98,3 +193,81 @@ class StockTransactionViewSet(
     filterset_class = StockTransactionFilter
     ordering_fields = ["created_at", "transaction_type"]
     ordering = ["-created_at"]
+
+    export_filename = "stock_transactions"
+    export_columns = [
+        ("created_at", "created_at"),
+        ("stock_type", "stock_type__name"),
+        ("sku", "product__sku"),
+        ("product", "product__name"),
+        ("transaction_type", "transaction_type"),
+        ("ctn_quantity", "ctn_quantity"),
+        ("piece_quantity", "piece_quantity"),
+        ("ctn_price", "ctn_price"),
+        ("piece_price", "piece_price"),
+        ("total_price", "total_price"),
+        ("batch_number", "batch_number"),
+        ("note", "note"),
+    ]
+
+    @extend_schema(
+        summary="Create many stock transactions",
+        description=(
+            "Creates up to 1000 transactions atomically: a JSON list of rows, a "
+            "text/csv body, or a multipart upload with the CSV in ``file`` (header "
+            "row with the field names). Rows without product_price get the "
+            "product's latest price. Errors are reported per row index."
+        ),
+        request=StockTransactionBulkSerializer(many=True),
+        responses={201: StockTransactionBulkSerializer(many=True)},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-create",
+        serializer_class=StockTransactionBulkSerializer,
+        parser_classes=[JSONParser, CSVParser, MultiPartParser],
+    )
+    def bulk_create(self, request):
+        upload = request.FILES.get("file")
+        rows = read_csv_rows(upload) if upload else request.data
+        serializer = self.get_serializer(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="Transfer stock between stock types",
+        description=(
+            "Posts an OUT leg on transfer_from and an IN leg on transfer_to for "
+            "every item, linked by one transfer_id, in a single atomic insert."
+        ),
+        request=StockTransferSerializer,
+        responses={201: StockTransferSerializer},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="transfer",
+        serializer_class=StockTransferSerializer,
+    )
+    def transfer(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_update(self, serializer):
+        if serializer.instance.transfer_id:
+            raise ValidationError(
+                {"detail": "Transfer legs cannot be edited; delete the transfer and post it again."}
+            )
+        serializer.save()
+
+    def perform_destroy(self, instance):
+        if instance.transfer_id:
+            # Both legs go together so the stock types stay balanced.
+            with transaction.atomic():
+                StockTransaction.objects.filter(transfer_id=instance.transfer_id).delete()
+            return
+        instance.delete()
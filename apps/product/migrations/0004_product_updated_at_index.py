@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_alter_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='product_pro_updated_c1b3bc_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from apps.core.models import BaseModel
 from .product import Product
 
@@ -88,7 +89,9 @@ class ProductPrice(BaseModel):
         if self.is_latest:
             ProductPrice.objects.filter(
                 product=self.product, price_for=self.price_for, is_latest=True
-            ).exclude(pk=self.pk if self.pk else None).update(is_latest=False)
+            ).exclude(pk=self.pk if self.pk else None).update(
+                is_latest=False, updated_at=timezone.now()
+            )
         super().save(*args, **kwargs)
 
 
@@ -1,6 +1,7 @@
 from django.db import models
-from django.db.models import Sum, Case, When, IntegerField
+from django.utils.functional import cached_property
 from apps.core.models import BaseModel
+from apps.core.registry import registry
 from .brand import Brand
 
 
@@ -22,6 +23,11 @@ class Product(BaseModel):
     buy_qty = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     free_qty = models.IntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -29,232 +35,61 @@ class Product(BaseModel):
     def latest_product_price(self):
         return self.prices.filter(is_latest=True, price_for="PRODUCT").first()
 
+    @cached_property
+    def stock_balance_map(self) -> dict:
+        """StockBalance rows for this product keyed by stock_type_id."""
+        return {balance.stock_type_id: balance for balance in self.stock_balances.all()}
+
+    def _stock_quantity(self, stock_type_name: str, field: str) -> int:
+        balance = self.stock_balance_map.get(registry.id_for("stock_types", stock_type_name))
+        return getattr(balance, field) if balance else 0
+
     @property
     def total_regular_stock_ctn_quantity(self) -> int:
-        """Calculate total carton quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Regular Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Regular Stock carton quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Regular Stock", "ctn_quantity")
 
     @property
     def total_regular_stock_piece_quantity(self) -> int:
-        """Calculate total piece quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Regular Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Regular Stock piece quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Regular Stock", "piece_quantity")
 
     @property
     def total_main_stock_ctn_quantity(self) -> int:
-        """Calculate total carton quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Main Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Main Stock carton quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Main Stock", "ctn_quantity")
 
     @property
     def total_main_stock_piece_quantity(self) -> int:
-        """Calculate total piece quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Main Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Main Stock piece quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Main Stock", "piece_quantity")
 
     @property
     def total_free_stock_ctn_quantity(self) -> int:
-        """Calculate total carton quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Free Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Free Stock carton quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Free Stock", "ctn_quantity")
 
     @property
     def total_free_stock_piece_quantity(self) -> int:
-        """Calculate total piece quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Free Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Free Stock piece quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Free Stock", "piece_quantity")
 
     @property
     def total_damage_stock_ctn_quantity(self) -> int:
-        """Calculate total carton quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Damage Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Damage Stock carton quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Damage Stock", "ctn_quantity")
 
     @property
     def total_damage_stock_piece_quantity(self) -> int:
-        """Calculate total piece quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Damage Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Damage Stock piece quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Damage Stock", "piece_quantity")
 
     @property
     def total_advance_stock_ctn_quantity(self) -> int:
-        """Calculate total carton quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Advance Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="ctn_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Advance Stock carton quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Advance Stock", "ctn_quantity")
 
     @property
     def total_advance_stock_piece_quantity(self) -> int:
-        """Calculate total piece quantity: sum of IN transactions minus sum of OUT transactions"""
-        result = self.stock_transactions.filter(stock_type__name="Advance Stock").aggregate(
-            in_total=Sum(
-                Case(
-                    When(transaction_type="IN", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-            out_total=Sum(
-                Case(
-                    When(transaction_type="OUT", then="piece_quantity"),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            ),
-        )
-        in_total = result["in_total"] or 0
-        out_total = result["out_total"] or 0
-        return in_total - out_total
+        """Advance Stock piece quantity (IN minus OUT), read from StockBalance"""
+        return self._stock_quantity("Advance Stock", "piece_quantity")
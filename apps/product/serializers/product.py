@@ -1,8 +1,23 @@
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from apps.product.models import Brand, Product, ProductPrice, PriceFor
 from apps.product.utils import generate_sku
 
 
+def validate_price_product(data, price_field="price"):
+    """
+    Reject a price that belongs to another product. Compares the already
+    resolved instances, so it costs no query.
+    """
+    price = data.get(price_field)
+    product = data.get("product")
+    if price is not None and product is not None and price.product_id != product.pk:
+        raise serializers.ValidationError(
+            {price_field: "This price belongs to a different product."}
+        )
+    return data
+
+
 class BrandSerializer(serializers.ModelSerializer):
     class Meta:
         model = Brand
@@ -93,11 +108,18 @@ class ProductSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         )
+        extra_kwargs = {
+            "sku": {"required": False, "allow_blank": True},
+        }
 
     def create(self, validated_data):
         """Create product and automatically create associated price if provided"""
         price_data = validated_data.pop("latest_product_price", None)
 
+        # Take the next SKU from the sequence when none was supplied
+        if not validated_data.get("sku"):
+            validated_data["sku"] = generate_sku()
+
         # Create the product
         product = Product.objects.create(**validated_data)
 
@@ -139,6 +161,76 @@ class ProductSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ProductCatalogSerializer(serializers.ModelSerializer):
+    """
+    Read-only product catalog entry: the product, its brand and prices,
+    without the stock totals (those change with every transaction).
+    Expects ``brand`` selected and ``prices`` prefetched.
+    """
+
+    brand_details = BrandSerializer(read_only=True, source="brand")
+    prices = ProductPriceSerializer(many=True, read_only=True)
+    price = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "brand",
+            "brand_details",
+            "have_offer",
+            "status",
+            "sku",
+            "buy_qty",
+            "free_qty",
+            "price",
+            "prices",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+    @extend_schema_field(ProductPriceSerializer(allow_null=True))
+    def get_price(self, obj):
+        # Picked from the prefetched prices instead of latest_product_price,
+        # which would run one query per product.
+        for price in obj.prices.all():
+            if price.is_latest and price.price_for == PriceFor.PRODUCT:
+                return ProductPriceSerializer(price).data
+        return None
+
+
+class ProductSummarySerializer(serializers.ModelSerializer):
+    """
+    Compact product for nesting in order lines and stock transactions.
+
+    Representations are memoized in the serializer context keyed by product
+    id, so a response that repeats a product across many lines builds (and
+    queries the brand and latest price for) each distinct product once.
+    """
+
+    memo_key = "product_summaries"
+
+    brand_name = serializers.CharField(read_only=True, source="brand.name")
+    ctn_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ["id", "name", "sku", "brand_name", "ctn_size"]
+        read_only_fields = fields
+
+    def get_ctn_size(self, obj) -> int | None:
+        price = obj.latest_product_price
+        return price.ctn_size if price else None
+
+    def to_representation(self, instance):
+        memo = self.context.setdefault(self.memo_key, {})
+        if instance.pk not in memo:
+            memo[instance.pk] = super().to_representation(instance)
+        return memo[instance.pk]
+
+
 class SkuGenerateSerializer(serializers.Serializer):
     """
     Serializer for generating unique SKU numbers.
@@ -149,7 +241,7 @@ class SkuGenerateSerializer(serializers.Serializer):
 
     def to_representation(self, instance):
         """
-        Override to generate and return the SKU using the utility function.
+        Override to return the SKU the next product would get, without taking it.
         """
-        sku = generate_sku()
+        sku = generate_sku(peek=True)
         return {"sku": sku}
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from apps.core.batching import BatchedListSerializer, BatchedPrimaryKeyRelatedField
 from apps.product.models import Purchase, PurchaseItem, PurchaseStatus
 from apps.product.serializers import SupplierSerializer
 from apps.product.utils import generate_voucher_number
@@ -37,8 +38,11 @@ class PurchaseItemSerializer(serializers.ModelSerializer):
 class PurchaseItemWriteSerializer(serializers.ModelSerializer):
     """Serializer for writing PurchaseItem data (nested in Purchase)"""
 
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
     class Meta:
         model = PurchaseItem
+        list_serializer_class = BatchedListSerializer
         fields = [
             "product",
             "quantity",
@@ -148,12 +152,17 @@ class PurchaseSerializer(serializers.ModelSerializer):
         else:
             validated_data["status"] = PurchaseStatus.DUE
 
+        # Take the next voucher number from the sequence when none was supplied
+        if not validated_data.get("voucher_number"):
+            validated_data["voucher_number"] = generate_voucher_number()
+
         # Create the purchase
         purchase = Purchase.objects.create(**validated_data)
 
-        # Create purchase items
-        for item_data in items_data:
-            PurchaseItem.objects.create(purchase=purchase, **item_data)
+        # Create purchase items with the products resolved during validation
+        PurchaseItem.objects.bulk_create(
+            [PurchaseItem(purchase=purchase, **item_data) for item_data in items_data]
+        )
 
         return purchase
 
@@ -209,8 +218,9 @@ class PurchaseSerializer(serializers.ModelSerializer):
             instance.items.all().delete()
 
             # Create new items
-            for item_data in items_data:
-                PurchaseItem.objects.create(purchase=instance, **item_data)
+            PurchaseItem.objects.bulk_create(
+                [PurchaseItem(purchase=instance, **item_data) for item_data in items_data]
+            )
 
         return instance
 
@@ -224,7 +234,7 @@ class VoucherNumberGenerateSerializer(serializers.Serializer):
 
     def to_representation(self, instance):
         """
-        Override to generate and return the voucher number using the utility function.
+        Override to return the voucher number the next purchase would get, without taking it.
         """
-        voucher_number = generate_voucher_number()
+        voucher_number = generate_voucher_number(peek=True)
         return {"voucher_number": voucher_number}
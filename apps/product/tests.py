@@ -1,3 +1,62 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.inventory.summaries import rebuild_balances
+from apps.inventory.tests import LedgerSummaryTestCase, make_product
+from apps.product.models import Product
+
+
+class ProductChangeFeedTests(LedgerSummaryTestCase):
+    """The product change feed sends a product again when its stock totals move."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="storekeeper"))
+        self.soap, self.soap_price = make_product("Soap")
+        self.rice, _ = make_product("Rice")
+        # Both products were last synced an hour ago.
+        self.since = timezone.now() - datetime.timedelta(minutes=30)
+        Product.objects.update(updated_at=self.since - datetime.timedelta(minutes=30))
+
+    def changes(self):
+        response = self.client.get(
+            "/product/items/changes/", {"updated_since": self.since.isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        return {row["id"]: row for row in response.data["results"]}
+
+    def test_stock_transaction_moves_the_product(self):
+        self.assertEqual(self.changes(), {})
+
+        response = self.client.post(
+            "/inventory/stock-transactions/",
+            {
+                "stock_type": str(self.regular.pk),
+                "product": str(self.soap.pk),
+                "product_price": str(self.soap_price.pk),
+                "transaction_type": "IN",
+                "ctn_quantity": 4,
+                "piece_quantity": 3,
+                "ctn_price": "120.00",
+                "piece_price": "10.00",
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+        changes = self.changes()
+        self.assertEqual(set(changes), {str(self.soap.pk)})
+        row = changes[str(self.soap.pk)]
+        self.assertEqual(
+            (row["total_regular_stock_ctn_quantity"], row["total_regular_stock_piece_quantity"]),
+            (4, 3),
+        )
+        self.assertSummariesMatchLedger()
+
+    def test_rebuild_moves_the_rebuilt_products(self):
+        rebuild_balances(product_ids={self.rice.pk})
+        self.assertEqual(set(self.changes()), {str(self.rice.pk)})
@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import ProtectedError
 
@@ -17,6 +18,10 @@ from .serializers import (
 )
 
 from apps.core.utils import DefaultPagination
+from apps.core.delta import DeltaSyncMixin
+from apps.core.exports import ExportMixin
+from apps.inventory.reports import stock_report
+from apps.inventory.serializers import StockAsOfQuerySerializer, StockTypeReportSerializer
 
 
 # utils
@@ -70,6 +75,7 @@ class BrandViewSet(
 
 @extend_schema(tags=["Products"])
 class ProductViewSet(
+    DeltaSyncMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -83,7 +89,9 @@ class ProductViewSet(
 
     http_method_names = ["get", "post", "patch", "delete"]
 
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related("brand").prefetch_related(
+        "prices", "stock_balances"
+    )
     serializer_class = ProductSerializer
     pagination_class = DefaultPagination
     permission_classes = [IsAuthenticated]
@@ -120,6 +128,25 @@ class ProductViewSet(
                 )
             raise ValidationError({"detail": "Cannot delete this product because it is referenced by other objects."})
 
+    @extend_schema(
+        summary="Product stock per stock type",
+        description=(
+            "Current stock of the product per stock type, or the stock at the end "
+            "of a day with ?as_of=YYYY-MM-DD (read from the nearest stock checkpoint)."
+        ),
+        parameters=[StockAsOfQuerySerializer],
+        responses={200: StockTypeReportSerializer(many=True)},
+    )
+    @action(detail=True, methods=["get"], url_path="stock", pagination_class=None)
+    def stock(self, request, pk=None):
+        product = get_object_or_404(Product, pk=pk)
+        params = StockAsOfQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        report = stock_report(
+            date_to=params.validated_data.get("as_of"), product_ids=[product.pk]
+        )
+        return Response(StockTypeReportSerializer(report, many=True).data)
+
     @extend_schema(
         summary="Generate SKU number",
         description="Generate a unique SKU number for a new product",
@@ -129,7 +156,8 @@ class ProductViewSet(
     def generate_sku(self, request):
         """
         Generate a unique SKU number.
-        Returns a unique SKU in the format: SKU-{YYYYMMDD}-{random_hex}
+        Returns a unique SKU in the format: SKU-0001 (a preview of the SKU sequence;
+        nothing is reserved, so a concurrent create may take it first)
         """
         serializer = self.get_serializer(None)
         return Response(serializer.to_representation(None))
@@ -181,6 +209,7 @@ class SupplierViewSet(
 
 @extend_schema(tags=["Purchases"])
 class PurchaseViewSet(
+    ExportMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -205,6 +234,19 @@ class PurchaseViewSet(
     ordering_fields = ["purchase_date", "total_amount", "created_at"]
     ordering = ["-purchase_date", "-created_at"]
 
+    export_filename = "purchases"
+    export_columns = [
+        ("purchase_date", "purchase_date"),
+        ("voucher_number", "voucher_number"),
+        ("supplier", "supplier__brand_name"),
+        ("total_amount", "total_amount"),
+        ("paid_amount", "paid_amount"),
+        ("due_amount", "due_amount"),
+        ("status", "status"),
+        ("note", "note"),
+        ("created_at", "created_at"),
+    ]
+
     def destroy(self, request, *args, **kwargs):
         """
         Override destroy to handle ProtectedError and format it properly for drf_standardized_errors.
@@ -233,6 +275,7 @@ class PurchaseViewSet(
         """
         Generate a unique voucher number.
         Returns a unique voucher number in the format: PAY-YYYY-0001 (PAY prefix, year, followed by sequential number)
+        A preview only: nothing is reserved, so a concurrent create may take it first.
         """
         serializer = self.get_serializer(None)
         return Response(serializer.to_representation(None))
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:51
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+ZERO = Value(Decimal("0.00"))
+
+
+def backfill_order_totals(apps, schema_editor):
+    """Fill the stored line and order totals with set-based UPDATEs."""
+    ProductPrice = apps.get_model("product", "ProductPrice")
+    OrderDelivery = apps.get_model("sales", "OrderDelivery")
+    OrderItem = apps.get_model("sales", "OrderItem")
+    DamageOrderItem = apps.get_model("sales", "DamageOrderItem")
+    FreeOfferItem = apps.get_model("sales", "FreeOfferItem")
+
+    def price(field):
+        return Coalesce(
+            Subquery(ProductPrice.objects.filter(pk=OuterRef("price_id")).values(field)),
+            ZERO,
+        )
+
+    OrderItem.objects.update(
+        total_amount=(
+            (F("quantity_in_ctn") + F("advanced_in_ctn") - F("return_in_ctn"))
+            * price("ctn_price")
+            + (F("quantity_in_pcs") + F("advanced_in_pcs") - F("return_in_pcs"))
+            * price("piece_price")
+        )
+    )
+    DamageOrderItem.objects.update(
+        total_amount=(
+            F("quantity_in_ctn") * price("ctn_price")
+            + F("quantity_in_pcs") * price("piece_price")
+        )
+        * (Value(Decimal("1")) - F("inventory_damage_deduction_percent") / Value(Decimal("100")))
+    )
+    FreeOfferItem.objects.update(
+        total_amount=(
+            F("quantity_in_ctn") * price("ctn_price")
+            + F("quantity_in_pcs") * price("piece_price")
+        )
+    )
+
+    def line_total(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(order=OuterRef("pk"))
+                .order_by()
+                .values("order")
+                .annotate(total=Sum("total_amount"))
+                .values("total"),
+                output_field=DecimalField(),
+            ),
+            ZERO,
+        )
+
+    OrderDelivery.objects.update(
+        total_order_items=line_total(OrderItem),
+        total_damage_items=line_total(DamageOrderItem),
+        total_free_offer_items=line_total(FreeOfferItem),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0003_alter_product_sku'),
+        ('sales', '0022_rename_sales_dueco_custome_0395f4_idx_sales_dueco_custome_7ff029_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='damageorderitem',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Stored line amount after deduction, see calculate_total_amount()', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='freeofferitem',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Stored notional line amount, see calculate_total_amount()', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='orderdelivery',
+            name='total_damage_items',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total amount of all DamageOrderItem for this order', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='orderdelivery',
+            name='total_free_offer_items',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total amount of all FreeOfferItem for this order', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='orderdelivery',
+            name='total_order_items',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Total amount of all OrderItem for this order', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Stored line amount, see calculate_total_amount()', max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='orderdelivery',
+            index=models.Index(fields=['order_by', 'order_date'], name='sales_order_order_b_538d2f_idx'),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0005_customer_stored_balance'),
+        ('sales', '0023_order_stored_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='duecollection',
+            index=models.Index(fields=['-collection_date', '-created_at', '-id'], name='sales_dueco_collect_ed1eb9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='duesell',
+            index=models.Index(fields=['-sale_date', '-created_at', '-id'], name='sales_duese_sale_da_d93bd7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderdelivery',
+            index=models.Index(fields=['-order_date', '-created_at', '-id'], name='sales_order_order_d_473d32_idx'),
+        ),
+    ]
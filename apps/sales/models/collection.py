@@ -5,10 +5,17 @@ from django.contrib.auth import get_user_model
 
 from apps.core.models import BaseModel
 from apps.crm.models import Customer
+from apps.sales.models.duesell import CustomerLedgerQuerySet
 
 User = get_user_model()
 
 
+class DueCollectionQuerySet(CustomerLedgerQuerySet):
+    """Custom queryset for DueCollection with set-based posting."""
+
+    customer_total_field = "due_collection"
+
+
 class DueCollection(BaseModel):
     """Model to represent collections (payments) against due sells."""
 
@@ -39,12 +46,16 @@ class DueCollection(BaseModel):
         help_text="Additional notes about this collection",
     )
 
+    objects = DueCollectionQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Due Collection"
         verbose_name_plural = "Due Collections"
         ordering = ["-collection_date", "-created_at"]
         indexes = [
             models.Index(fields=["customer", "-collection_date", "-created_at"]),
+            # Keyset pagination over the default list ordering.
+            models.Index(fields=["-collection_date", "-created_at", "-id"]),
         ]
 
     def __str__(self):
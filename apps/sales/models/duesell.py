@@ -10,9 +10,37 @@ from apps.sales.models.order import OrderDelivery
 User = get_user_model()
 
 
-class DueSellQuerySet(models.QuerySet):
+class CustomerLedgerQuerySet(models.QuerySet):
+    """Queryset for the ledgers that move a Customer running total."""
+
+    customer_total_field = None
+
+    def bulk_post(self, rows):
+        """
+        Insert rows with one bulk INSERT and move the customers' running
+        total in the same atomic block. Save signals do not fire for these
+        rows, so this is the only place their effect is applied.
+        """
+        from django.db import transaction
+
+        from apps.crm.balances import apply_amounts
+
+        if not rows:
+            return []
+        with transaction.atomic():
+            created = self.bulk_create(rows)
+            apply_amounts(
+                self.customer_total_field,
+                [(row.customer_id, row.amount) for row in created],
+            )
+        return created
+
+
+class DueSellQuerySet(CustomerLedgerQuerySet):
     """Custom queryset for DueSell with total amount calculation."""
 
+    customer_total_field = "due_sell"
+
     def total_amount(self):
         """Return the sum of amount for this queryset. Returns 0 if no records."""
         from django.db.models import Sum
@@ -67,6 +95,8 @@ class DueSell(BaseModel):
         ordering = ["-sale_date", "-created_at"]
         indexes = [
             models.Index(fields=["customer", "-sale_date", "-created_at"]),
+            # Keyset pagination over the default list ordering.
+            models.Index(fields=["-sale_date", "-created_at", "-id"]),
         ]
 
     def __str__(self):
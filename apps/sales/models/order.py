@@ -1,12 +1,46 @@
 from django.db import models
 from datetime import date
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Coalesce, Round
 from apps.core.models import BaseModel
 from apps.product.models import Product, ProductPrice
 
 User = get_user_model()
 
+CENT = Decimal("0.01")
+ORDER_TOTAL_FIELDS = ("total_order_items", "total_damage_items", "total_free_offer_items")
+
+
+class OrderDeliveryQuerySet(models.QuerySet):
+    """Custom queryset for OrderDelivery."""
+
+    def refresh_totals(self):
+        """
+        Recompute the stored line roll-ups of these orders with one UPDATE.
+
+        Each total is the sum of the stored total_amount of the order's lines.
+        """
+
+        def line_total(model):
+            lines = (
+                model.objects.filter(order=models.OuterRef("pk"))
+                .order_by()
+                .values("order")
+                .annotate(total=models.Sum("total_amount"))
+                .values("total")
+            )
+            return Coalesce(
+                models.Subquery(lines, output_field=models.DecimalField()),
+                models.Value(Decimal("0.00")),
+            )
+
+        return self.update(
+            total_order_items=line_total(OrderItem),
+            total_damage_items=line_total(DamageOrderItem),
+            total_free_offer_items=line_total(FreeOfferItem),
+        )
+
 
 class OrderDelivery(BaseModel):
     """Model to represent order deliveries"""
@@ -36,11 +70,39 @@ class OrderDelivery(BaseModel):
         default=0,
         help_text="Priojon offer amount for the order",
     )
+    total_order_items = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total amount of all OrderItem for this order",
+    )
+    total_damage_items = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total amount of all DamageOrderItem for this order",
+    )
+    total_free_offer_items = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Total amount of all FreeOfferItem for this order",
+    )
+
+    objects = OrderDeliveryQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Order Delivery"
         verbose_name_plural = "Order Deliveries"
         ordering = ["-order_date", "order_number"]
+        indexes = [
+            models.Index(fields=["order_by", "order_date"]),
+            # Keyset pagination over the default list ordering.
+            models.Index(fields=["-order_date", "-created_at", "-id"]),
+        ]
 
     def save(self, *args, **kwargs):
         """Auto-generate order number if not provided"""
@@ -48,33 +110,60 @@ class OrderDelivery(BaseModel):
             from apps.sales.utils import generate_order_number
 
             self.order_number = generate_order_number()
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # The stored totals are maintained by refresh_totals(); never write
+            # back a possibly stale in-memory copy.
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ORDER_TOTAL_FIELDS
+            ]
         super().save(*args, **kwargs)
 
-    @property
-    def total_order_items(self):
-        """Total amount of all OrderItem for this order"""
-        return sum((item.total_amount for item in self.items.all()), Decimal("0.00"))
+    def refresh_totals(self):
+        """Recompute this order's stored totals and reload them"""
+        OrderDelivery.objects.filter(pk=self.pk).refresh_totals()
+        self.refresh_from_db(fields=ORDER_TOTAL_FIELDS)
 
-    @property
-    def total_damage_items(self):
-        """Total amount of all DamageOrderItem for this order"""
-        return sum(
-            (item.total_amount for item in self.damage_items.all()), Decimal("0.00")
-        )
+    def __str__(self):
+        return f"Order {self.order_number} - {self.order_by.username}"
 
-    @property
-    def total_free_offer_items(self):
-        """Total amount of all FreeOfferItem for this order"""
-        return sum(
-            (item.total_amount for item in self.free_offer_items.all()),
-            Decimal("0.00"),
+
+class StoredTotalMixin:
+    """
+    Keeps the stored total_amount of an order line in step with
+    calculate_total_amount(). Bulk writers, which skip save(), call
+    refresh_total_amount() on each line themselves; set-based writers use
+    stored_total_expression(), the same calculation in SQL.
+    """
+
+    def refresh_total_amount(self):
+        # Half away from zero, like ROUND() in stored_total_expression().
+        self.total_amount = self.calculate_total_amount().quantize(CENT, rounding=ROUND_HALF_UP)
+        return self.total_amount
+
+    @classmethod
+    def stored_total_expression(cls, ctn_price, piece_price):
+        """total_amount as a query expression, for lines priced at ``ctn_price`` / ``piece_price``."""
+        money = models.DecimalField(max_digits=14, decimal_places=2)
+        return Round(
+            cls.total_amount_expression(
+                models.Value(Decimal(ctn_price or 0), output_field=money),
+                models.Value(Decimal(piece_price or 0), output_field=money),
+            ),
+            2,
+            output_field=money,
         )
 
-    def __str__(self):
-        return f"Order {self.order_number} - {self.order_by.username}"
+    def save(self, *args, **kwargs):
+        self.refresh_total_amount()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "total_amount" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "total_amount"]
+        super().save(*args, **kwargs)
 
 
-class OrderItem(BaseModel):
+class OrderItem(StoredTotalMixin, BaseModel):
     """Model to represent order items"""
 
     order = models.ForeignKey(
@@ -109,14 +198,27 @@ class OrderItem(BaseModel):
     return_in_pcs = models.IntegerField(
         default=0, help_text="Return quantity in pieces"
     )
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Stored line amount, see calculate_total_amount()",
+    )
 
     class Meta:
         verbose_name = "Order Item"
         verbose_name_plural = "Order Items"
         ordering = ["order", "product"]
 
-    @property
-    def total_amount(self):
+    @staticmethod
+    def total_amount_expression(ctn_price, piece_price):
+        """calculate_total_amount() over the line's columns"""
+        net_ctn = models.F("quantity_in_ctn") + models.F("advanced_in_ctn") - models.F("return_in_ctn")
+        net_pcs = models.F("quantity_in_pcs") + models.F("advanced_in_pcs") - models.F("return_in_pcs")
+        return net_ctn * ctn_price + net_pcs * piece_price
+
+    def calculate_total_amount(self):
         """Calculate total amount using the price field"""
         if not self.price:
             return Decimal("0.00")
@@ -141,7 +243,7 @@ class OrderItem(BaseModel):
         return f"{self.order.order_number} - {self.product.name}"
 
 
-class DamageOrderItem(BaseModel):
+class DamageOrderItem(StoredTotalMixin, BaseModel):
     """Model to represent damaged order items"""
 
     order = models.ForeignKey(
@@ -177,14 +279,35 @@ class DamageOrderItem(BaseModel):
         default=0,
         help_text="Inventory damage deduction as percentage (e.g., 10.50 for 10.5%)",
     )
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Stored line amount after deduction, see calculate_total_amount()",
+    )
 
     class Meta:
         verbose_name = "Damage Order Item"
         verbose_name_plural = "Damage Order Items"
         ordering = ["order", "product"]
 
-    @property
-    def total_amount(self):
+    @staticmethod
+    def total_amount_expression(ctn_price, piece_price):
+        """calculate_total_amount() over the line's columns"""
+        total = models.F("quantity_in_ctn") * ctn_price + models.F("quantity_in_pcs") * piece_price
+        deduction_factor = models.Case(
+            models.When(
+                inventory_damage_deduction_percent__gt=0,
+                then=models.Value(Decimal("1"))
+                - models.F("inventory_damage_deduction_percent") / models.Value(Decimal("100")),
+            ),
+            default=models.Value(Decimal("1")),
+            output_field=models.DecimalField(max_digits=8, decimal_places=6),
+        )
+        return total * deduction_factor
+
+    def calculate_total_amount(self):
         """Calculate total amount of damaged items using the price field, after deduction percentage"""
         if not self.price:
             return Decimal("0.00")
@@ -210,7 +333,7 @@ class DamageOrderItem(BaseModel):
         return f"{self.order.order_number} - {self.product.name} (Damage)"
 
 
-class FreeOfferItem(BaseModel):
+class FreeOfferItem(StoredTotalMixin, BaseModel):
     """Model to represent free offer items"""
 
     order = models.ForeignKey(
@@ -237,14 +360,25 @@ class FreeOfferItem(BaseModel):
     quantity_in_pcs = models.IntegerField(
         default=0, help_text="Free offer quantity in pieces"
     )
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Stored notional line amount, see calculate_total_amount()",
+    )
 
     class Meta:
         verbose_name = "Free Offer Item"
         verbose_name_plural = "Free Offer Items"
         ordering = ["order", "product"]
 
-    @property
-    def total_amount(self):
+    @staticmethod
+    def total_amount_expression(ctn_price, piece_price):
+        """calculate_total_amount() over the line's columns"""
+        return models.F("quantity_in_ctn") * ctn_price + models.F("quantity_in_pcs") * piece_price
+
+    def calculate_total_amount(self):
         """Calculate notional total amount of free offer items using the price field"""
         if not self.price:
             return Decimal("0.00")
@@ -1,2 +1,3 @@
 from .order import *
 from .duesell import *
+from .sync import *
@@ -1,9 +1,55 @@
 from rest_framework import serializers
 
+from apps.core.batching import BatchedListSerializer, BatchedPrimaryKeyRelatedField
+from apps.crm.models import Customer
 from apps.sales.models import DueSell, DueCollection, OrderDelivery
 from apps.crm.serializers.customer import CustomerSerializer
 from apps.user.serializers.staff import UserSerializer
 
+# Largest number of rows one bulk-create request may carry.
+DUE_BULK_MAX_ROWS = 1000
+
+
+class CustomerLedgerBulkListSerializer(BatchedListSerializer):
+    """
+    Creates all validated DueSell/DueCollection rows with one bulk INSERT
+    and one customer total UPDATE (see CustomerLedgerQuerySet.bulk_post).
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", DUE_BULK_MAX_ROWS)
+        kwargs.setdefault("allow_empty", False)
+        super().__init__(*args, **kwargs)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        created = model.objects.bulk_post([model(**attrs) for attrs in validated_data])
+        # The customers were loaded before their totals moved.
+        customers = Customer.objects.in_bulk({row.customer_id for row in created})
+        for row in created:
+            row.customer = customers[row.customer_id]
+        return created
+
+
+class CustomerLedgerBulkCreateSerializer(serializers.Serializer):
+    """
+    Base of the bulk-create serializers. With ``compact`` in the context
+    the response lists only the created ids.
+    """
+
+    rows_field = None
+    read_serializer_class = None
+
+    def create(self, validated_data):
+        field = self.fields[self.rows_field]
+        return {self.rows_field: field.create(validated_data[self.rows_field])}
+
+    def to_representation(self, instance):
+        rows = instance[self.rows_field]
+        if self.context.get("compact"):
+            return {"count": len(rows), "ids": [row.pk for row in rows]}
+        return {self.rows_field: self.read_serializer_class(rows, many=True).data}
+
 
 class OrderDeliveryBasicSerializer(serializers.ModelSerializer):
     """Basic serializer for OrderDelivery (used in nested serializers)"""
@@ -65,8 +111,11 @@ class DueSellSerializer(serializers.ModelSerializer):
 class DueSellWriteSerializer(serializers.ModelSerializer):
     """Write serializer for DueSell (used in bulk operations)."""
 
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
     class Meta:
         model = DueSell
+        list_serializer_class = CustomerLedgerBulkListSerializer
         fields = [
             "customer",
             "deliver_by",
@@ -77,27 +126,13 @@ class DueSellWriteSerializer(serializers.ModelSerializer):
         ]
 
 
-class DueSellBulkCreateSerializer(serializers.Serializer):
+class DueSellBulkCreateSerializer(CustomerLedgerBulkCreateSerializer):
     """Serializer for bulk creating DueSell records."""
 
-    due_sells = DueSellWriteSerializer(many=True)
-
-    def create(self, validated_data):
-        """Create multiple DueSell records."""
-        due_sells_data = validated_data.pop("due_sells")
-        created_due_sells = []
-        
-        for due_sell_data in due_sells_data:
-            due_sell = DueSell.objects.create(**due_sell_data)
-            created_due_sells.append(due_sell)
-        
-        return {"due_sells": created_due_sells}
+    rows_field = "due_sells"
+    read_serializer_class = DueSellSerializer
 
-    def to_representation(self, instance):
-        """Return the created DueSell records."""
-        return {
-            "due_sells": DueSellSerializer(instance["due_sells"], many=True).data
-        }
+    due_sells = DueSellWriteSerializer(many=True)
 
 
 class DueCollectionSerializer(serializers.ModelSerializer):
@@ -132,8 +167,11 @@ class DueCollectionSerializer(serializers.ModelSerializer):
 class DueCollectionWriteSerializer(serializers.ModelSerializer):
     """Write serializer for DueCollection (used in bulk operations)."""
 
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
     class Meta:
         model = DueCollection
+        list_serializer_class = CustomerLedgerBulkListSerializer
         fields = [
             "customer",
             "collected_by",
@@ -143,23 +181,10 @@ class DueCollectionWriteSerializer(serializers.ModelSerializer):
         ]
 
 
-class DueCollectionBulkCreateSerializer(serializers.Serializer):
+class DueCollectionBulkCreateSerializer(CustomerLedgerBulkCreateSerializer):
     """Serializer for bulk creating DueCollection records."""
 
-    due_collections = DueCollectionWriteSerializer(many=True)
-
-    def create(self, validated_data):
-        due_collections_data = validated_data.pop("due_collections")
-        created = []
-        for row in due_collections_data:
-            created.append(DueCollection.objects.create(**row))
-        return {"due_collections": created}
-
-    def to_representation(self, instance):
-        return {
-            "due_collections": DueCollectionSerializer(
-                instance["due_collections"], many=True
-            ).data
-        }
-
+    rows_field = "due_collections"
+    read_serializer_class = DueCollectionSerializer
 
+    due_collections = DueCollectionWriteSerializer(many=True)
@@ -1,7 +1,14 @@
+from django.db import transaction
 from rest_framework import serializers
 from apps.sales.models import OrderDelivery, OrderItem, DamageOrderItem, FreeOfferItem
-from apps.product.serializers import ProductSerializer, ProductPriceSerializer
+from apps.core.batching import BatchedListSerializer, BatchedPrimaryKeyRelatedField
+from apps.product.serializers import (
+    ProductPriceSerializer,
+    ProductSummarySerializer,
+    validate_price_product,
+)
 from apps.user.serializers.staff import UserSerializer
+from apps.sales.services import post_order_lines, sync_order_lines
 from apps.sales.utils import generate_order_number
 
 
@@ -10,7 +17,7 @@ class OrderItemReadMixin(serializers.Serializer):
 
     product_name = serializers.CharField(read_only=True, source="product.name")
     product_sku = serializers.CharField(read_only=True, source="product.sku")
-    product_details = ProductSerializer(read_only=True, source="product")
+    product_details = ProductSummarySerializer(read_only=True, source="product")
     price_details = ProductPriceSerializer(read_only=True, source="price")
     total_amount = serializers.DecimalField(
         max_digits=12, decimal_places=2, read_only=True
@@ -55,9 +62,16 @@ class OrderItemSerializer(OrderItemReadMixin, serializers.ModelSerializer):
 class OrderItemWriteSerializer(serializers.ModelSerializer):
     """Serializer for writing OrderItem data (nested in OrderDelivery)"""
 
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
+    # Optional on update: identifies the existing line to edit in place.
+    id = serializers.UUIDField(required=False)
+
     class Meta:
         model = OrderItem
+        list_serializer_class = BatchedListSerializer
         fields = [
+            "id",
             "product",
             "price",
             "quantity_in_ctn",
@@ -68,6 +82,9 @@ class OrderItemWriteSerializer(serializers.ModelSerializer):
             "return_in_pcs",
         ]
 
+    def validate(self, attrs):
+        return validate_price_product(attrs)
+
 
 class DamageOrderItemSerializer(OrderItemReadMixin, serializers.ModelSerializer):
     """Serializer for DamageOrderItem (nested in OrderDelivery)."""
@@ -105,9 +122,16 @@ class DamageOrderItemSerializer(OrderItemReadMixin, serializers.ModelSerializer)
 class DamageOrderItemWriteSerializer(serializers.ModelSerializer):
     """Serializer for writing DamageOrderItem data (nested in OrderDelivery)"""
 
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
+    # Optional on update: identifies the existing line to edit in place.
+    id = serializers.UUIDField(required=False)
+
     class Meta:
         model = DamageOrderItem
+        list_serializer_class = BatchedListSerializer
         fields = [
+            "id",
             "product",
             "price",
             "quantity_in_ctn",
@@ -116,6 +140,9 @@ class DamageOrderItemWriteSerializer(serializers.ModelSerializer):
             "inventory_damage_deduction_percent",
         ]
 
+    def validate(self, attrs):
+        return validate_price_product(attrs)
+
 
 class FreeOfferItemSerializer(OrderItemReadMixin, serializers.ModelSerializer):
     """Serializer for FreeOfferItem (nested in OrderDelivery)."""
@@ -151,15 +178,25 @@ class FreeOfferItemSerializer(OrderItemReadMixin, serializers.ModelSerializer):
 class FreeOfferItemWriteSerializer(serializers.ModelSerializer):
     """Serializer for writing FreeOfferItem data (nested in OrderDelivery)"""
 
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
+    # Optional on update: identifies the existing line to edit in place.
+    id = serializers.UUIDField(required=False)
+
     class Meta:
         model = FreeOfferItem
+        list_serializer_class = BatchedListSerializer
         fields = [
+            "id",
             "product",
             "price",
             "quantity_in_ctn",
             "quantity_in_pcs",
         ]
 
+    def validate(self, attrs):
+        return validate_price_product(attrs)
+
 
 class OrderDeliverySerializer(serializers.ModelSerializer):
     """Serializer for OrderDelivery with nested items"""
@@ -239,45 +276,48 @@ class OrderDeliverySerializer(serializers.ModelSerializer):
 
         return attrs
 
-    def _process_items(self, order, items_data, damage_items_data, free_offer_items_data):
-        """Create order items. For update, pass empty lists to skip that item type."""
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
-        for item_data in damage_items_data:
-            DamageOrderItem.objects.create(order=order, **item_data)
-        for item_data in free_offer_items_data:
-            FreeOfferItem.objects.create(order=order, **item_data)
-
+    @transaction.atomic
     def create(self, validated_data):
-        """Create order with items"""
-        items_data = validated_data.pop("items_data", []) or []
-        damage_items_data = validated_data.pop("damage_items_data", []) or []
-        free_offer_items_data = validated_data.pop("free_offer_items_data", []) or []
+        """Create order with items and post their stock transactions in one transaction"""
+        # A line ``id`` only points at an existing line on update; new lines
+        # always get a fresh primary key.
+        items_data, damage_items_data, free_offer_items_data = (
+            [{key: value for key, value in line.items() if key != "id"} for line in lines]
+            for lines in (
+                validated_data.pop("items_data", []) or [],
+                validated_data.pop("damage_items_data", []) or [],
+                validated_data.pop("free_offer_items_data", []) or [],
+            )
+        )
 
         order = OrderDelivery.objects.create(**validated_data)
-        self._process_items(order, items_data, damage_items_data, free_offer_items_data)
+        items, damage_items, free_offer_items = post_order_lines(
+            order, items_data, damage_items_data, free_offer_items_data
+        )
+        # Respond with the lines just written, whose product and price are the
+        # instances resolved during validation, instead of reloading them.
+        items.sort(key=lambda line: line.product.sku)
+        order._prefetched_objects_cache = {
+            "items": items,
+            "damage_items": damage_items,
+            "free_offer_items": free_offer_items,
+        }
         return order
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update order and handle items"""
-        items_data = validated_data.pop("items_data", None)
-        damage_items_data = validated_data.pop("damage_items_data", None)
-        free_offer_items_data = validated_data.pop("free_offer_items_data", None)
-
-        if items_data is not None or damage_items_data is not None or free_offer_items_data is not None:
-            if items_data is not None:
-                instance.items.all().delete()
-            if damage_items_data is not None:
-                instance.damage_items.all().delete()
-            if free_offer_items_data is not None:
-                instance.free_offer_items.all().delete()
-
-            self._process_items(
-                instance,
-                items_data or [],
-                damage_items_data or [],
-                free_offer_items_data or [],
-            )
+        """
+        Update order and diff the submitted items against the existing ones.
+
+        Lines are matched by "id" when given, otherwise by product and price;
+        only added, removed or changed lines touch the ledger.
+        """
+        sync_order_lines(
+            instance,
+            validated_data.pop("items_data", None),
+            validated_data.pop("damage_items_data", None),
+            validated_data.pop("free_offer_items_data", None),
+        )
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -296,8 +336,8 @@ class OrderNumberGenerateSerializer(serializers.Serializer):
 
     def to_representation(self, instance):
         """
-        Override to generate and return the order number using the utility function.
+        Override to return the order number the next order would get, without taking it.
         """
-        order_number = generate_order_number()
+        order_number = generate_order_number(peek=True)
         return {"order_number": order_number}
 
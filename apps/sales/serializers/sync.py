@@ -0,0 +1,163 @@
+from itertools import groupby
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from apps.sales.models import DueCollection, DueSell, OrderDelivery
+from .duesell import DueCollectionWriteSerializer, DueSellWriteSerializer
+from .order import OrderDeliverySerializer
+
+# Largest number of operations one sync request may carry.
+SYNC_MAX_OPERATIONS = 2000
+
+# Operation type -> (model, serializer validating its ``data``).
+SYNC_OPERATIONS = {
+    "order": (OrderDelivery, OrderDeliverySerializer),
+    "due_sell": (DueSell, DueSellWriteSerializer),
+    "due_collection": (DueCollection, DueCollectionWriteSerializer),
+}
+
+
+class SyncOperationSerializer(serializers.Serializer):
+    """One operation of a sync batch."""
+
+    id = serializers.UUIDField(
+        help_text="Client-generated id, stored as the id of the created row"
+    )
+    type = serializers.ChoiceField(choices=list(SYNC_OPERATIONS))
+    data = serializers.DictField(
+        help_text="Body of the matching create endpoint (order, due sell or due collection row)"
+    )
+
+
+class SyncResultSerializer(serializers.Serializer):
+    """Outcome of one operation: created now, or already synced earlier."""
+
+    id = serializers.UUIDField()
+    type = serializers.CharField()
+    status = serializers.ChoiceField(choices=["created", "exists"])
+
+
+class SyncBatchSerializer(serializers.Serializer):
+    """
+    Applies an ordered batch of orders, due sells and due collections in one
+    transaction.
+
+    Operations whose id already exists are reported as "exists" and left
+    untouched, so a batch can be resent after a lost response. That holds
+    for a resend that races the first attempt too: its inserts wait on the
+    first attempt's ids, and once those are committed the run is rolled
+    back to its savepoint and retried without them. Consecutive
+    due sells (or collections) are validated with one query per related
+    model and inserted with one bulk INSERT; each order is created with its
+    lines as on the orders endpoint. A later operation may refer to an
+    earlier one by its id (e.g. a due sell's ``order``). The first run of
+    operations with an error stops the batch and rolls all of it back; the
+    error attrs point at the failing operations.
+    """
+
+    operations = SyncOperationSerializer(
+        many=True,
+        write_only=True,
+        allow_empty=False,
+        max_length=SYNC_MAX_OPERATIONS,
+    )
+    results = SyncResultSerializer(many=True, read_only=True)
+
+    def validate_operations(self, operations):
+        errors = [{} for _ in operations]
+        seen = set()
+        for index, operation in enumerate(operations):
+            if operation["id"] in seen:
+                errors[index] = {"id": ["This id appears more than once in the batch."]}
+            seen.add(operation["id"])
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return operations
+
+    @staticmethod
+    def _existing_ids(operations):
+        """Ids of ``operations`` whose row is already stored."""
+        existing = set()
+        for operation_type, (model, _) in SYNC_OPERATIONS.items():
+            ids = [op["id"] for op in operations if op["type"] == operation_type]
+            if ids:
+                existing.update(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        return existing
+
+    @transaction.atomic
+    def create(self, validated_data):
+        operations = validated_data["operations"]
+        existing = self._existing_ids(operations)
+
+        errors = [{} for _ in operations]
+        pending = [(index, op) for index, op in enumerate(operations) if op["id"] not in existing]
+        for operation_type, run in groupby(pending, key=lambda item: item[1]["type"]):
+            run = list(run)
+            try:
+                with transaction.atomic():
+                    self._create_run(operation_type, run, errors)
+            except IntegrityError:
+                # A concurrent send of the same batch committed some of these ids.
+                arrived = self._existing_ids([op for _, op in run])
+                if not arrived:
+                    raise
+                existing |= arrived
+                run = [(index, op) for index, op in run if op["id"] not in arrived]
+                for index, _ in run:
+                    errors[index] = {}
+                with transaction.atomic():
+                    self._create_run(operation_type, run, errors)
+            if any(errors):
+                raise serializers.ValidationError({"operations": errors})
+
+        return {
+            "results": [
+                {
+                    "id": op["id"],
+                    "type": op["type"],
+                    "status": "exists" if op["id"] in existing else "created",
+                }
+                for op in operations
+            ]
+        }
+
+    def _create_run(self, operation_type, run, errors):
+        if not run:
+            return
+        if operation_type == "order":
+            self._create_orders(run, errors)
+        else:
+            self._create_rows(SYNC_OPERATIONS[operation_type][1], run, errors)
+
+    def _create_orders(self, run, errors):
+        for index, operation in run:
+            serializer = OrderDeliverySerializer(data=operation["data"], context=self.context)
+            if not serializer.is_valid():
+                errors[index] = {"data": serializer.errors}
+                continue
+            if any(errors):
+                continue
+            try:
+                serializer.save(id=operation["id"])
+            except serializers.ValidationError as exc:
+                errors[index] = {"data": exc.detail}
+
+    def _create_rows(self, serializer_class, run, errors):
+        serializer = serializer_class(
+            data=[operation["data"] for _, operation in run],
+            many=True,
+            max_length=None,
+            context=self.context,
+        )
+        if not serializer.is_valid():
+            for (index, _), row_errors in zip(run, serializer.errors):
+                if row_errors:
+                    errors[index] = {"data": row_errors}
+            return
+        serializer.create(
+            [
+                {**attrs, "id": operation["id"]}
+                for attrs, (_, operation) in zip(serializer.validated_data, run)
+            ]
+        )
@@ -0,0 +1,407 @@
+import copy
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.core.registry import registry
+from apps.inventory.models import StockTransaction, StockType, TransactionType
+from apps.sales.models import DamageOrderItem, FreeOfferItem, OrderItem
+
+REGULAR_STOCK = "Regular Stock"
+ADVANCE_STOCK = "Advance Stock"
+DAMAGE_STOCK = "Damage Stock"
+FREE_STOCK = "Free Stock"
+POSTED_STOCK_TYPES = (REGULAR_STOCK, ADVANCE_STOCK, DAMAGE_STOCK, FREE_STOCK)
+
+
+def get_stock_type_ids() -> dict:
+    """Map stock type name -> id, from the in-process lookup registry."""
+    return registry.ids("stock_types", required=POSTED_STOCK_TYPES)
+
+
+def _stock_type_id(stock_type_ids: dict, name: str):
+    try:
+        return stock_type_ids[name]
+    except KeyError:
+        raise StockType.DoesNotExist(
+            f'Stock type "{name}" does not exist. Run "manage.py setup" first.'
+        )
+
+
+def _get_prices(item):
+    """Extract product_price, ctn_price and piece_price from order item."""
+    if not item.price:
+        return {"product_price": None, "ctn_price": 0, "piece_price": 0}
+    return {
+        "product_price": item.price,
+        "ctn_price": item.price.ctn_price or Decimal("0"),
+        "piece_price": item.price.piece_price or Decimal("0"),
+    }
+
+
+def _get_damage_prices(damage_order_item):
+    """
+    Get ctn_price and piece_price for a DamageOrderItem, applying
+    inventory_damage_deduction_percent when set.
+    """
+    base = _get_prices(damage_order_item)
+    ctn_price = base["ctn_price"]
+    piece_price = base["piece_price"]
+
+    percent = getattr(damage_order_item, "inventory_damage_deduction_percent", None)
+    if percent is not None and percent > 0:
+        factor = Decimal("1") - (Decimal(str(percent)) / Decimal("100"))
+        ctn_price = ctn_price * factor
+        piece_price = piece_price * factor
+
+    return {
+        "product_price": base["product_price"],
+        "ctn_price": ctn_price,
+        "piece_price": piece_price,
+    }
+
+
+def build_order_item_transactions(item, stock_type_ids):
+    """
+    Unsaved StockTransactions derived from an OrderItem.
+
+    Case 1: Net quantity (quantity - return) → OUT from Regular Stock
+    Case 2: Advanced quantity → IN to Advance Stock
+    """
+    prices = _get_prices(item)
+    order_ref = item.order.order_number
+    transactions = []
+
+    # Case 1: Regular stock OUT (net quantity)
+    net_ctn = item.quantity_in_ctn - item.return_in_ctn
+    net_pcs = item.quantity_in_pcs - item.return_in_pcs
+    if net_ctn > 0 or net_pcs > 0:
+        transactions.append(
+            StockTransaction(
+                stock_type_id=_stock_type_id(stock_type_ids, REGULAR_STOCK),
+                product=item.product,
+                transaction_type=TransactionType.OUT.value,
+                ctn_quantity=net_ctn,
+                piece_quantity=net_pcs,
+                note=f"Net quantity (quantity - return) for order {order_ref}",
+                order_item=item,
+                **prices,
+            )
+        )
+
+    # Case 2: Advance stock IN
+    adv_ctn = item.advanced_in_ctn
+    adv_pcs = item.advanced_in_pcs
+    if adv_ctn > 0 or adv_pcs > 0:
+        transactions.append(
+            StockTransaction(
+                stock_type_id=_stock_type_id(stock_type_ids, ADVANCE_STOCK),
+                product=item.product,
+                transaction_type=TransactionType.IN.value,
+                ctn_quantity=adv_ctn,
+                piece_quantity=adv_pcs,
+                note=f"Advanced quantity for order {order_ref}",
+                order_item=item,
+                **prices,
+            )
+        )
+
+    return transactions
+
+
+def build_damage_order_item_transactions(item, stock_type_ids):
+    """Unsaved StockTransactions derived from a DamageOrderItem (IN to Damage Stock).
+    ctn_price and piece_price are stored with inventory_damage_deduction_percent applied.
+    """
+    ctn = item.quantity_in_ctn
+    pcs = item.quantity_in_pcs
+    if ctn <= 0 and pcs <= 0:
+        return []
+
+    note = f"Damaged quantity for order {item.order.order_number}"
+    if item.damage_reason:
+        note += f" - {item.damage_reason}"
+
+    return [
+        StockTransaction(
+            stock_type_id=_stock_type_id(stock_type_ids, DAMAGE_STOCK),
+            product=item.product,
+            transaction_type=TransactionType.IN.value,
+            ctn_quantity=ctn,
+            piece_quantity=pcs,
+            note=note,
+            damage_order_item=item,
+            **_get_damage_prices(item),
+        )
+    ]
+
+
+def build_free_offer_item_transactions(item, stock_type_ids):
+    """Unsaved StockTransactions derived from a FreeOfferItem (OUT from Free Stock)."""
+    ctn = item.quantity_in_ctn
+    pcs = item.quantity_in_pcs
+    if ctn <= 0 and pcs <= 0:
+        return []
+
+    return [
+        StockTransaction(
+            stock_type_id=_stock_type_id(stock_type_ids, FREE_STOCK),
+            product=item.product,
+            transaction_type=TransactionType.OUT.value,
+            ctn_quantity=ctn,
+            piece_quantity=pcs,
+            note=f"Free offer quantity for order {item.order.order_number}",
+            free_offer_item=item,
+            **_get_prices(item),
+        )
+    ]
+
+
+def post_order_lines(order, items_data=(), damage_items_data=(), free_offer_items_data=()):
+    """
+    Create an order's lines and their stock transactions set-based.
+
+    Every line and every derived Regular/Advance/Damage/Free transaction is
+    built in memory first, then written with one bulk INSERT per table inside
+    a single atomic block, so the query count does not grow with the number
+    of lines and a failure leaves nothing half-posted. Line totals and the
+    order's stored roll-ups are filled in on the way. The post_save signals
+    in apps.sales.signals do not fire here; they only cover ad-hoc saves.
+    """
+    items = [OrderItem(order=order, **data) for data in items_data]
+    damage_items = [DamageOrderItem(order=order, **data) for data in damage_items_data]
+    free_offer_items = [
+        FreeOfferItem(order=order, **data) for data in free_offer_items_data
+    ]
+
+    for line in (*items, *damage_items, *free_offer_items):
+        line.refresh_total_amount()
+
+    stock_type_ids = get_stock_type_ids()
+    transactions = []
+    for item in items:
+        transactions.extend(build_order_item_transactions(item, stock_type_ids))
+    for item in damage_items:
+        transactions.extend(build_damage_order_item_transactions(item, stock_type_ids))
+    for item in free_offer_items:
+        transactions.extend(build_free_offer_item_transactions(item, stock_type_ids))
+
+    with transaction.atomic():
+        OrderItem.objects.bulk_create(items)
+        DamageOrderItem.objects.bulk_create(damage_items)
+        FreeOfferItem.objects.bulk_create(free_offer_items)
+        StockTransaction.objects.bulk_post(transactions, check_stock=True)
+        order.refresh_totals()
+
+    return items, damage_items, free_offer_items
+
+
+# How each line type is diffed on update: the builder for its stock legs, the
+# fields that only move quantities (posted as compensating adjustments) and
+# the fields that change the line's pricing (the line is replaced instead).
+_LINE_TYPES = {
+    "items": {
+        "model": OrderItem,
+        "build": build_order_item_transactions,
+        "quantity_fields": (
+            "quantity_in_ctn",
+            "quantity_in_pcs",
+            "advanced_in_ctn",
+            "advanced_in_pcs",
+            "return_in_ctn",
+            "return_in_pcs",
+        ),
+        "pricing_fields": ("product", "price"),
+    },
+    "damage_items": {
+        "model": DamageOrderItem,
+        "build": build_damage_order_item_transactions,
+        "quantity_fields": ("quantity_in_ctn", "quantity_in_pcs", "damage_reason"),
+        "pricing_fields": ("product", "price", "inventory_damage_deduction_percent"),
+    },
+    "free_offer_items": {
+        "model": FreeOfferItem,
+        "build": build_free_offer_item_transactions,
+        "quantity_fields": ("quantity_in_ctn", "quantity_in_pcs"),
+        "pricing_fields": ("product", "price"),
+    },
+}
+
+
+def _signed_legs(transactions, sign, totals, templates):
+    for leg in transactions:
+        direction = sign if leg.transaction_type == TransactionType.IN else -sign
+        total = totals[leg.stock_type_id]
+        total[0] += direction * leg.ctn_quantity
+        total[1] += direction * leg.piece_quantity
+        templates[leg.stock_type_id] = leg
+
+
+def build_adjustment_transactions(old_legs, new_legs, note):
+    """
+    Compensating StockTransactions that move the ledger from old_legs to new_legs.
+
+    Legs are netted per stock type as signed IN minus OUT quantities; an
+    increase is posted as IN and a decrease as OUT (cartons and pieces can
+    move in opposite directions, which gives one row each way).
+    """
+    totals = defaultdict(lambda: [0, 0])
+    templates = {}
+    _signed_legs(old_legs, -1, totals, templates)
+    _signed_legs(new_legs, 1, totals, templates)
+
+    adjustments = []
+    for stock_type_id, (ctn, pcs) in totals.items():
+        template = templates[stock_type_id]
+        for transaction_type, ctn_quantity, piece_quantity in (
+            (TransactionType.IN.value, max(ctn, 0), max(pcs, 0)),
+            (TransactionType.OUT.value, max(-ctn, 0), max(-pcs, 0)),
+        ):
+            if not (ctn_quantity or piece_quantity):
+                continue
+            adjustments.append(
+                StockTransaction(
+                    stock_type_id=stock_type_id,
+                    product_id=template.product_id,
+                    product_price=template.product_price,
+                    transaction_type=transaction_type,
+                    ctn_quantity=ctn_quantity,
+                    piece_quantity=piece_quantity,
+                    ctn_price=template.ctn_price,
+                    piece_price=template.piece_price,
+                    note=note,
+                    order_item=template.order_item,
+                    damage_order_item=template.damage_order_item,
+                    free_offer_item=template.free_offer_item,
+                )
+            )
+    return adjustments
+
+
+def _match_lines(existing, lines_data):
+    """
+    Pair incoming line data with existing lines.
+
+    Lines are matched on a client-supplied ``id`` when present, otherwise on
+    (product, price). Returns (matches, new_data, unmatched_lines) where
+    matches is a list of (line, data) pairs.
+    """
+    by_id = {line.pk: line for line in existing}
+    by_key = defaultdict(list)
+    for line in existing:
+        by_key[(line.product_id, line.price_id)].append(line)
+
+    matched_ids = set()
+    matches = []
+    new_data = []
+    for data in lines_data:
+        data = dict(data)
+        line_id = data.pop("id", None)
+        if line_id is not None:
+            line = by_id.get(line_id)
+            if line is None or line.pk in matched_ids:
+                raise serializers.ValidationError(
+                    {"id": f"Line {line_id} does not belong to this order."}
+                )
+        else:
+            key = (data["product"].pk, data["price"].pk)
+            line = next(
+                (line for line in by_key[key] if line.pk not in matched_ids), None
+            )
+        if line is None:
+            new_data.append(data)
+            continue
+        matched_ids.add(line.pk)
+        matches.append((line, data))
+
+    unmatched = [line for line in existing if line.pk not in matched_ids]
+    return matches, new_data, unmatched
+
+
+@transaction.atomic
+def sync_order_lines(order, items_data=None, damage_items_data=None, free_offer_items_data=None):
+    """
+    Bring an order's lines in line with the submitted lists by diffing.
+
+    For each line type that was submitted (None means "leave untouched"):
+    - lines that no longer appear are deleted (their ledger rows cascade),
+    - new lines are posted through post_order_lines,
+    - matched lines with different quantities are updated in place and get
+      compensating stock transactions for the difference,
+    - matched lines whose product, price or damage deduction changed are
+      replaced, since their ledger value changes.
+    Unchanged lines cause no writes, so the write volume follows the edit.
+    """
+    submitted = {
+        "items": items_data,
+        "damage_items": damage_items_data,
+        "free_offer_items": free_offer_items_data,
+    }
+    stock_type_ids = None
+    created_data = {}
+    adjustments = []
+    lines_changed = False
+
+    for related_name, lines_data in submitted.items():
+        if lines_data is None:
+            continue
+        config = _LINE_TYPES[related_name]
+        existing = list(getattr(order, related_name).all())
+        matches, new_data, to_delete = _match_lines(existing, lines_data)
+
+        to_update = []
+        for line, data in matches:
+            if any(
+                getattr(line, field) != data.get(field, getattr(line, field))
+                for field in config["pricing_fields"]
+            ):
+                to_delete.append(line)
+                new_data.append(data)
+                continue
+            changed = [
+                field
+                for field in config["quantity_fields"]
+                if field in data and getattr(line, field) != data[field]
+            ]
+            if not changed:
+                continue
+            previous = copy.copy(line)
+            for field in changed:
+                setattr(line, field, data[field])
+            line.refresh_total_amount()
+            line.updated_at = timezone.now()
+            to_update.append(line)
+
+            if stock_type_ids is None:
+                stock_type_ids = get_stock_type_ids()
+            adjustments.extend(
+                build_adjustment_transactions(
+                    config["build"](previous, stock_type_ids),
+                    config["build"](line, stock_type_ids),
+                    note=f"Adjustment for order {order.order_number} line edit",
+                )
+            )
+
+        lines_changed = lines_changed or bool(to_delete or to_update)
+        if to_delete:
+            config["model"].objects.filter(pk__in=[line.pk for line in to_delete]).delete()
+        if to_update:
+            config["model"].objects.bulk_update(
+                to_update,
+                [*config["quantity_fields"], "total_amount", "updated_at"],
+            )
+        created_data[related_name] = new_data
+
+    if any(created_data.values()):
+        post_order_lines(
+            order,
+            created_data.get("items", ()),
+            created_data.get("damage_items", ()),
+            created_data.get("free_offer_items", ()),
+        )
+    elif lines_changed:
+        order.refresh_totals()
+    StockTransaction.objects.bulk_post(adjustments, check_stock=True)
@@ -1,83 +1,35 @@
 from decimal import Decimal
 
-from django.db.models.signals import post_save
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from apps.inventory.models import StockTransaction, StockType, TransactionType
-from apps.sales.models import DamageOrderItem, FreeOfferItem, OrderItem
-
-
-def _get_stock_type(name: str) -> StockType:
-    """Get StockType by name (cached per request via ORM)."""
-    return StockType.objects.get(name=name)
-
-
-def _get_prices(item):
-    """Extract product_price, ctn_price and piece_price from order item."""
-    if not item.price:
-        return {"product_price": None, "ctn_price": 0, "piece_price": 0}
-    return {
-        "product_price": item.price,
-        "ctn_price": item.price.ctn_price or Decimal("0"),
-        "piece_price": item.price.piece_price or Decimal("0"),
-    }
-
-
-def _get_damage_prices(damage_order_item):
-    """
-    Get ctn_price and piece_price for a DamageOrderItem, applying
-    inventory_damage_deduction_percent when set.
-    """
-    base = _get_prices(damage_order_item)
-    ctn_price = base["ctn_price"]
-    piece_price = base["piece_price"]
-
-    percent = getattr(
-        damage_order_item, "inventory_damage_deduction_percent", None
-    )
-    if percent is not None and percent > 0:
-        factor = Decimal("1") - (Decimal(str(percent)) / Decimal("100"))
-        ctn_price = ctn_price * factor
-        piece_price = piece_price * factor
-
-    return {
-        "product_price": base["product_price"],
-        "ctn_price": ctn_price,
-        "piece_price": piece_price,
-    }
-
-
-def _create_stock_transaction(
-    *,
-    stock_type_name: str,
-    product,
-    transaction_type: str,
-    ctn_quantity: int,
-    piece_quantity: int,
-    note: str,
-    order_item=None,
-    damage_order_item=None,
-    free_offer_item=None,
-    product_price=None,
-    ctn_price=0,
-    piece_price=0,
-):
-    """Create a StockTransaction with common kwargs."""
-    stock_type = _get_stock_type(stock_type_name)
-    return StockTransaction.objects.create(
-        stock_type=stock_type,
-        product=product,
-        product_price=product_price,
-        transaction_type=transaction_type,
-        ctn_quantity=ctn_quantity,
-        piece_quantity=piece_quantity,
-        ctn_price=ctn_price,
-        piece_price=piece_price,
-        note=note,
-        order_item=order_item,
-        damage_order_item=damage_order_item,
-        free_offer_item=free_offer_item,
-    )
+from apps.crm.balances import apply_amounts
+from apps.product.models import ProductPrice
+from apps.sales.models import (
+    DamageOrderItem,
+    DueCollection,
+    DueSell,
+    FreeOfferItem,
+    OrderDelivery,
+    OrderItem,
+)
+from apps.sales.services import (
+    build_damage_order_item_transactions,
+    build_free_offer_item_transactions,
+    build_order_item_transactions,
+    get_stock_type_ids,
+)
+
+# Order posting goes through apps.sales.services.post_order_lines, which
+# bulk-creates lines and their stock transactions without firing these
+# signals. The receivers below only cover ad-hoc saves (admin, shell, ...).
+
+
+def _save_transactions(transactions):
+    """Save one by one so the StockTransaction signals keep summaries in step."""
+    for stock_transaction in transactions:
+        stock_transaction.save()
 
 
 @receiver(post_save, sender=OrderItem)
@@ -90,39 +42,7 @@ def create_stock_transaction_on_order_item_created(sender, instance, created, **
     """
     if not created:
         return
-
-    prices = _get_prices(instance)
-    order_ref = instance.order.order_number
-
-    # Case 1: Regular stock OUT (net quantity)
-    net_ctn = instance.quantity_in_ctn - instance.return_in_ctn
-    net_pcs = instance.quantity_in_pcs - instance.return_in_pcs
-    if net_ctn > 0 or net_pcs > 0:
-        _create_stock_transaction(
-            stock_type_name="Regular Stock",
-            product=instance.product,
-            transaction_type=TransactionType.OUT.value,
-            ctn_quantity=net_ctn,
-            piece_quantity=net_pcs,
-            note=f"Net quantity (quantity - return) for order {order_ref}",
-            order_item=instance,
-            **prices,
-        )
-
-    # Case 2: Advance stock IN
-    adv_ctn = instance.advanced_in_ctn
-    adv_pcs = instance.advanced_in_pcs
-    if adv_ctn > 0 or adv_pcs > 0:
-        _create_stock_transaction(
-            stock_type_name="Advance Stock",
-            product=instance.product,
-            transaction_type=TransactionType.IN.value,
-            ctn_quantity=adv_ctn,
-            piece_quantity=adv_pcs,
-            note=f"Advanced quantity for order {order_ref}",
-            order_item=instance,
-            **prices,
-        )
+    _save_transactions(build_order_item_transactions(instance, get_stock_type_ids()))
 
 
 @receiver(post_save, sender=DamageOrderItem)
@@ -134,25 +54,8 @@ def create_stock_transaction_on_damage_order_item_created(
     """
     if not created:
         return
-
-    ctn = instance.quantity_in_ctn
-    pcs = instance.quantity_in_pcs
-    if ctn <= 0 and pcs <= 0:
-        return
-
-    note = f"Damaged quantity for order {instance.order.order_number}"
-    if instance.damage_reason:
-        note += f" - {instance.damage_reason}"
-
-    _create_stock_transaction(
-        stock_type_name="Damage Stock",
-        product=instance.product,
-        transaction_type=TransactionType.IN.value,
-        ctn_quantity=ctn,
-        piece_quantity=pcs,
-        note=note,
-        damage_order_item=instance,
-        **_get_damage_prices(instance),
+    _save_transactions(
+        build_damage_order_item_transactions(instance, get_stock_type_ids())
     )
 
 
@@ -163,19 +66,109 @@ def create_stock_transaction_on_free_offer_item_created(
     """Create StockTransaction when a FreeOfferItem is created (OUT from Free Stock)."""
     if not created:
         return
+    _save_transactions(
+        build_free_offer_item_transactions(instance, get_stock_type_ids())
+    )
+
 
-    ctn = instance.quantity_in_ctn
-    pcs = instance.quantity_in_pcs
-    if ctn <= 0 and pcs <= 0:
+@receiver(post_save, sender=OrderItem)
+@receiver(post_save, sender=DamageOrderItem)
+@receiver(post_save, sender=FreeOfferItem)
+def refresh_order_totals_on_line_saved(sender, instance, **kwargs):
+    """Keep the order's stored totals in step with ad-hoc line saves."""
+    OrderDelivery.objects.filter(pk=instance.order_id).refresh_totals()
+
+
+@receiver(post_delete, sender=OrderItem)
+@receiver(post_delete, sender=DamageOrderItem)
+@receiver(post_delete, sender=FreeOfferItem)
+def refresh_order_totals_on_line_deleted(sender, instance, origin=None, **kwargs):
+    """Keep the order's stored totals in step when a line is deleted."""
+    if isinstance(origin, OrderDelivery):
+        # The whole order is being deleted; there is nothing left to total.
         return
+    OrderDelivery.objects.filter(pk=instance.order_id).refresh_totals()
+
 
-    _create_stock_transaction(
-        stock_type_name="Free Stock",
-        product=instance.product,
-        transaction_type=TransactionType.OUT.value,
-        ctn_quantity=ctn,
-        piece_quantity=pcs,
-        note=f"Free offer quantity for order {instance.order.order_number}",
-        free_offer_item=instance,
-        **_get_prices(instance),
+# Price fields the stored line totals are computed from.
+_LINE_PRICE_FIELDS = ("ctn_price", "piece_price")
+
+
+@receiver(pre_save, sender=ProductPrice)
+def remember_previous_line_prices(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the stored ctn/piece price so post_save can tell whether they changed."""
+    instance._previous_line_prices = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(_LINE_PRICE_FIELDS) & set(update_fields):
+        return
+    instance._previous_line_prices = (
+        sender.objects.filter(pk=instance.pk).values_list(*_LINE_PRICE_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=ProductPrice)
+def refresh_line_totals_on_price_changed(sender, instance, created, **kwargs):
+    """
+    Line totals are priced from the linked ProductPrice, so changing its
+    ctn or piece price re-totals the lines that use it (one UPDATE per line
+    model) and the orders they belong to (one more). Other saves, such as
+    flipping is_latest, leave the lines alone.
+    """
+    previous = getattr(instance, "_previous_line_prices", None)
+    if created or previous is None:
+        return
+    current = tuple(Decimal(str(getattr(instance, field) or 0)) for field in _LINE_PRICE_FIELDS)
+    if current == tuple(value or 0 for value in previous):
+        return
+
+    line_models = (OrderItem, DamageOrderItem, FreeOfferItem)
+    for model in line_models:
+        model.objects.filter(price=instance).update(
+            total_amount=model.stored_total_expression(*current)
+        )
+    affected = Q()
+    for model in line_models:
+        affected |= Q(pk__in=model.objects.filter(price=instance).values("order_id"))
+    OrderDelivery.objects.filter(affected).refresh_totals()
+
+
+# Customer.due_sell / Customer.due_collection follow their ledgers.
+_CUSTOMER_TOTAL_FIELD = {DueSell: "due_sell", DueCollection: "due_collection"}
+
+
+def _refresh_cached_customer(sender, instance):
+    """Reload the totals of an already loaded customer so responses show them."""
+    if sender.customer.is_cached(instance):
+        instance.customer.refresh_from_db(fields=["due_sell", "due_collection", "balance"])
+
+
+@receiver(pre_save, sender=DueSell)
+@receiver(pre_save, sender=DueCollection)
+def remember_previous_customer_amount(sender, instance, **kwargs):
+    """Keep the stored (customer, amount) so post_save can move the difference."""
+    instance._previous_customer_amount = None
+    if instance._state.adding:
+        return
+    instance._previous_customer_amount = (
+        sender.objects.filter(pk=instance.pk).values_list("customer_id", "amount").first()
     )
+
+
+@receiver(post_save, sender=DueSell)
+@receiver(post_save, sender=DueCollection)
+def update_customer_total_on_saved(sender, instance, **kwargs):
+    field = _CUSTOMER_TOTAL_FIELD[sender]
+    previous = getattr(instance, "_previous_customer_amount", None)
+    rows = [(instance.customer_id, instance.amount)]
+    if previous:
+        rows.append((previous[0], -previous[1]))
+    apply_amounts(field, rows)
+    _refresh_cached_customer(sender, instance)
+
+
+@receiver(post_delete, sender=DueSell)
+@receiver(post_delete, sender=DueCollection)
+def update_customer_total_on_deleted(sender, instance, **kwargs):
+    apply_amounts(_CUSTOMER_TOTAL_FIELD[sender], [(instance.customer_id, instance.amount)], sign=-1)
+    _refresh_cached_customer(sender, instance)
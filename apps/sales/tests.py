@@ -1,3 +1,243 @@
-from django.test import TestCase
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.models import IdempotencyKey
+from apps.crm.balances import drifted_customers
+from apps.crm.models import Customer
+from apps.inventory.models import StockTransaction
+from apps.inventory.tests import LedgerSummaryTestCase, make_product
+from apps.sales.models import DamageOrderItem, DueSell, FreeOfferItem, OrderDelivery, OrderItem
+from apps.sales.serializers.sync import SyncBatchSerializer
+
+
+class OrderTestCase(LedgerSummaryTestCase):
+    """A delivery man posting orders for three products."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="delivery")
+        self.user.groups.add(Group.objects.get(name="Delivery man"))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.products = [make_product(name) for name in ("Soap", "Rice", "Salt")]
+
+    def line(self, index, **quantities):
+        product, price = self.products[index]
+        return {"product": str(product.pk), "price": str(price.pk), **quantities}
+
+    def payload(self):
+        return {
+            "order_date": "2026-10-01",
+            "order_by": self.user.pk,
+            "items_data": [
+                self.line(0, quantity_in_ctn=5, quantity_in_pcs=3, advanced_in_ctn=1),
+                self.line(1, quantity_in_ctn=2, return_in_ctn=1),
+            ],
+            "damage_items_data": [
+                self.line(0, quantity_in_ctn=1, inventory_damage_deduction_percent="12.5")
+            ],
+            "free_offer_items_data": [self.line(1, quantity_in_pcs=2)],
+        }
+
+    def post_order(self, **headers):
+        return self.client.post("/sales/orders/", self.payload(), format="json", **headers)
+
+
+class OrderPostingTests(OrderTestCase):
+    """Orders posted, edited and deleted through the API keep the stock summaries on the ledger."""
+
+    def test_create_update_delete(self):
+        response = self.post_order()
+        self.assertEqual(response.status_code, 201, response.data)
+        order_id = response.data["id"]
+        self.assertTrue(StockTransaction.objects.exists())
+        self.assertSummariesMatchLedger()
+
+        # sync_order_lines: one quantity edit, one line dropped, one line added.
+        items = [
+            self.line(0, quantity_in_ctn=1, quantity_in_pcs=3, advanced_in_ctn=1),
+            self.line(2, quantity_in_ctn=4),
+        ]
+        response = self.client.patch(
+            f"/sales/orders/{order_id}/", {"items_data": items}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(OrderItem.objects.filter(order_id=order_id).count(), 2)
+        self.assertSummariesMatchLedger()
+
+        response = self.client.delete(f"/sales/orders/{order_id}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(StockTransaction.objects.exists())
+        self.assertSummariesMatchLedger()
+
+    def test_line_id_is_ignored_on_create(self):
+        first = self.post_order()
+        self.assertEqual(first.status_code, 201, first.data)
+        existing = OrderItem.objects.first()
+
+        # The first order re-submitted as a new one, line ids included.
+        payload = self.payload()
+        payload["items_data"][0]["id"] = str(existing.pk)
+        payload["items_data"][1]["id"] = str(uuid.uuid4())
+        response = self.client.post("/sales/orders/", payload, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+        new_ids = {item["id"] for item in response.data["items"]}
+        self.assertEqual(len(new_ids), 2)
+        self.assertNotIn(str(existing.pk), new_ids)
+        self.assertNotIn(payload["items_data"][1]["id"], new_ids)
+        existing.refresh_from_db()
+        self.assertEqual(str(existing.order_id), first.data["id"])
+        self.assertSummariesMatchLedger()
+
+    def test_idempotent_replay_posts_once(self):
+        first = self.post_order(HTTP_IDEMPOTENCY_KEY="order-1")
+        self.assertEqual(first.status_code, 201, first.data)
+        posted = StockTransaction.objects.count()
+
+        replay = self.post_order(HTTP_IDEMPOTENCY_KEY="order-1")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(OrderDelivery.objects.count(), 1)
+        self.assertEqual(StockTransaction.objects.count(), posted)
+        self.assertSummariesMatchLedger()
+
+    def test_failed_request_releases_its_key(self):
+        response = self.client.post(
+            "/sales/orders/",
+            dict(self.payload(), items_data=[dict(self.line(0), product="not-a-product")]),
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="order-2",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertFalse(StockTransaction.objects.exists())
+
+        response = self.post_order(HTTP_IDEMPOTENCY_KEY="order-2")
+        self.assertEqual(response.status_code, 201)
+        self.assertSummariesMatchLedger()
+
+
+class PriceChangeTests(OrderTestCase):
+    """Editing a ProductPrice re-totals its lines and orders only when a price changed."""
+
+    def lines(self):
+        for model in (OrderItem, DamageOrderItem, FreeOfferItem):
+            yield from model.objects.select_related("price")
+
+    def assertStoredTotalsMatch(self):
+        for line in self.lines():
+            self.assertEqual(line.total_amount, line.calculate_total_amount().quantize(Decimal("0.01")))
+        order = OrderDelivery.objects.get()
+        for field, model in (
+            ("total_order_items", OrderItem),
+            ("total_damage_items", DamageOrderItem),
+            ("total_free_offer_items", FreeOfferItem),
+        ):
+            self.assertEqual(
+                getattr(order, field), sum(line.total_amount for line in model.objects.all())
+            )
+
+    def sales_writes(self, save):
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        return [q["sql"] for q in queries if q["sql"].startswith("UPDATE") and '"sales_' in q["sql"]]
+
+    def test_unchanged_prices_leave_lines_alone(self):
+        self.assertEqual(self.post_order().status_code, 201)
+        _, price = self.products[0]
+        self.assertEqual(self.sales_writes(price.save), [])
+        self.assertEqual(self.sales_writes(lambda: price.save(update_fields=["is_latest"])), [])
+
+    def test_price_change_retotals_lines_and_orders(self):
+        self.assertEqual(self.post_order().status_code, 201)
+        before = {line.pk: line.total_amount for line in self.lines()}
+        _, price = self.products[0]
+        price.ctn_price = Decimal("131.37")
+        price.piece_price = Decimal("11.11")
+        # One UPDATE per line model and one for the orders.
+        self.assertEqual(len(self.sales_writes(price.save)), 4)
+
+        changed = {line.pk for line in self.lines() if line.total_amount != before[line.pk]}
+        self.assertEqual(
+            changed, {line.pk for line in self.lines() if line.price_id == price.pk}
+        )
+        self.assertStoredTotalsMatch()
+
+
+class SyncBatchTests(LedgerSummaryTestCase):
+    """Resending a sync batch never posts an operation twice."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="delivery")
+        self.user.groups.add(Group.objects.get(name="Delivery man"))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.product, self.price = make_product("Soap")
+        self.customer = Customer.objects.create(name="Customer", shop_name="Shop")
+
+    def batch(self):
+        order_id = str(uuid.uuid4())
+        order = {
+            "order_date": "2026-10-01",
+            "order_by": self.user.pk,
+            "items_data": [
+                {"product": str(self.product.pk), "price": str(self.price.pk), "quantity_in_ctn": 1}
+            ],
+        }
+        due_sell = {
+            "customer": str(self.customer.pk),
+            "deliver_by": self.user.pk,
+            "order": order_id,
+            "amount": "10.00",
+        }
+        return {
+            "operations": [
+                {"id": order_id, "type": "order", "data": order},
+                {"id": str(uuid.uuid4()), "type": "due_sell", "data": due_sell},
+            ]
+        }
+
+    def sync(self, batch):
+        return self.client.post("/sales/sync/", batch, format="json")
+
+    def assertPostedOnce(self):
+        self.assertEqual(OrderDelivery.objects.count(), 1)
+        self.assertEqual(DueSell.objects.count(), 1)
+        self.assertFalse(drifted_customers().exists())
+        self.assertSummariesMatchLedger()
+
+    def test_resend_reports_exists(self):
+        batch = self.batch()
+        self.assertEqual(self.sync(batch).status_code, 200)
+
+        response = self.sync(batch)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row["status"] for row in response.data["results"]}, {"exists"})
+        self.assertPostedOnce()
+
+    def test_resend_racing_the_first_attempt_reports_exists(self):
+        batch = self.batch()
+        self.assertEqual(self.sync(batch).status_code, 200)
+
+        # The retry's first lookup runs before the first attempt commits.
+        existing_ids = SyncBatchSerializer._existing_ids
+
+        def lookup(operations):
+            return existing_ids(operations) if patched.call_count > 1 else set()
+
+        with mock.patch.object(SyncBatchSerializer, "_existing_ids", side_effect=lookup) as patched:
+            response = self.sync(batch)
+        # The first lookup, then one per run that hit the stored ids.
+        self.assertEqual(patched.call_count, 3)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual({row["status"] for row in response.data["results"]}, {"exists"})
+        self.assertPostedOnce()
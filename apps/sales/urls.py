@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OrderDeliveryViewSet, DueSellViewSet, DueCollectionViewSet
+from .views import OrderDeliveryViewSet, DueSellViewSet, DueCollectionViewSet, SyncView
 
 router = DefaultRouter()
 router.register(r"orders", OrderDeliveryViewSet)
@@ -8,6 +8,7 @@ router.register(r"due-sells", DueSellViewSet)
 router.register(r"due-collections", DueCollectionViewSet)
 
 urlpatterns = [
+    path("sync/", SyncView.as_view(), name="sync"),
     path("", include(router.urls)),
 ]
 
@@ -1,8 +1,9 @@
-from rest_framework import viewsets, mixins, filters
+from rest_framework import viewsets, mixins, filters, views
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import ProtectedError, Sum
 from django.db.models import Prefetch
@@ -22,15 +23,50 @@ from .serializers import (
     DueSellBulkCreateSerializer,
     DueCollectionSerializer,
     DueCollectionBulkCreateSerializer,
+    SyncBatchSerializer,
 )
-from apps.core.utils import DefaultPagination
+from apps.core.utils import LedgerPagination
+from apps.core.exports import ExportMixin
+from apps.core.idempotency import IdempotencyMixin
+from apps.core.parsers import CSVParser, GzipJSONParser, NDJSONParser, read_csv_rows
 
 # utils
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+
+COMPACT_PARAMETER = OpenApiParameter(
+    name="compact",
+    type=OpenApiTypes.BOOL,
+    location=OpenApiParameter.QUERY,
+    description="Respond with only the count and ids of the created rows",
+    required=False,
+)
+BULK_PARSERS = [JSONParser, CSVParser, NDJSONParser, MultiPartParser]
+
+
+def bulk_create_rows(view, request, rows_field):
+    """
+    Shared body of the due sell / due collection bulk-create actions.
+
+    A bare list of rows (CSV, NDJSON, JSON or a CSV ``file`` upload) is
+    taken as the ``rows_field`` list.
+    """
+    upload = request.FILES.get("file")
+    data = read_csv_rows(upload) if upload else request.data
+    if isinstance(data, list):
+        data = {rows_field: data}
+    context = view.get_serializer_context()
+    context["compact"] = request.query_params.get("compact", "").lower() in ("1", "true")
+    serializer = view.get_serializer(data=data, context=context)
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return Response(serializer.data, status=201)
 
 
 @extend_schema(tags=["Orders"])
 class OrderDeliveryViewSet(
+    IdempotencyMixin,
+    ExportMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -50,19 +86,21 @@ class OrderDeliveryViewSet(
         .prefetch_related(
             Prefetch(
                 "items",
-                queryset=OrderItem.objects.select_related("product", "price").order_by(
+                queryset=OrderItem.objects.select_related(
+                    "product__brand", "price"
+                ).order_by(
                     "product__sku"
                 ),
             ),
-            "damage_items__product",
+            "damage_items__product__brand",
             "damage_items__price",
-            "free_offer_items__product",
+            "free_offer_items__product__brand",
             "free_offer_items__price",
         )
         .all()
     )
     serializer_class = OrderDeliverySerializer
-    pagination_class = DefaultPagination
+    pagination_class = LedgerPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [
         DjangoFilterBackend,
@@ -73,14 +111,34 @@ class OrderDeliveryViewSet(
     filterset_fields = {
         "order_by": ["exact"],
         "order_date": ["exact", "gte", "lte"],
+        "total_order_items": ["gte", "lte"],
+        "total_damage_items": ["gte", "lte"],
+        "total_free_offer_items": ["gte", "lte"],
     }
     ordering_fields = [
         "order_date",
         "order_number",
+        "total_order_items",
+        "total_damage_items",
+        "total_free_offer_items",
         "created_at",
     ]
     ordering = ["-order_date", "-created_at"]
 
+    export_filename = "orders"
+    export_columns = [
+        ("order_number", "order_number"),
+        ("order_date", "order_date"),
+        ("order_by", "order_by__username"),
+        ("cash_sell_amount", "cash_sell_amount"),
+        ("priojon_offer", "priojon_offer"),
+        ("total_order_items", "total_order_items"),
+        ("total_damage_items", "total_damage_items"),
+        ("total_free_offer_items", "total_free_offer_items"),
+        ("narration", "narration"),
+        ("created_at", "created_at"),
+    ]
+
     def destroy(self, request, *args, **kwargs):
         """
         Override destroy to handle ProtectedError and format it properly for drf_standardized_errors.
@@ -118,6 +176,7 @@ class OrderDeliveryViewSet(
         """
         Generate a unique order number.
         Returns a unique order number in the format: ORD-YYYY-0001 (ORD prefix, year, followed by sequential number)
+        A preview only: nothing is reserved, and the number is assigned when the order is saved.
         """
         serializer = self.get_serializer(None)
         return Response(serializer.to_representation(None))
@@ -125,6 +184,8 @@ class OrderDeliveryViewSet(
 
 @extend_schema(tags=["Due Sells"])
 class DueSellViewSet(
+    IdempotencyMixin,
+    ExportMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -138,7 +199,7 @@ class DueSellViewSet(
 
     queryset = DueSell.objects.select_related("customer", "deliver_by", "order").all()
     serializer_class = DueSellSerializer
-    pagination_class = DefaultPagination
+    pagination_class = LedgerPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [
         DjangoFilterBackend,
@@ -166,6 +227,19 @@ class DueSellViewSet(
     ]
     ordering = ["-sale_date", "-created_at"]
 
+    export_filename = "due_sells"
+    export_columns = [
+        ("sale_date", "sale_date"),
+        ("customer_id", "customer__customer_id"),
+        ("customer_name", "customer__name"),
+        ("shop_name", "customer__shop_name"),
+        ("deliver_by", "deliver_by__username"),
+        ("order_number", "order__order_number"),
+        ("amount", "amount"),
+        ("note", "note"),
+        ("created_at", "created_at"),
+    ]
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         total_amount = queryset.total_amount()
@@ -188,15 +262,21 @@ class DueSellViewSet(
 
     @extend_schema(
         summary="Bulk create due sells",
-        description="Create multiple due sell records in a single request",
+        description=(
+            "Create up to 1000 due sell records atomically. Accepts the JSON body "
+            "below, or the rows alone as a JSON list, text/csv, "
+            "application/x-ndjson or a multipart CSV ``file``."
+        ),
         request=DueSellBulkCreateSerializer,
         responses={201: DueSellBulkCreateSerializer},
+        parameters=[COMPACT_PARAMETER],
     )
     @action(
         detail=False,
         methods=["post"],
         serializer_class=DueSellBulkCreateSerializer,
         url_path="bulk-create",
+        parser_classes=BULK_PARSERS,
     )
     def bulk_create(self, request):
         """
@@ -217,16 +297,18 @@ class DueSellViewSet(
                 ...
             ]
         }
-        """
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        result = serializer.save()
 
-        return Response(serializer.to_representation(result), status=201)
+        Foreign keys of all rows are resolved with one query per model and
+        the rows are inserted with one bulk INSERT; ``?compact=true`` returns
+        only the created ids.
+        """
+        return bulk_create_rows(self, request, "due_sells")
 
 
 @extend_schema(tags=["Due Collections"])
 class DueCollectionViewSet(
+    IdempotencyMixin,
+    ExportMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -240,7 +322,7 @@ class DueCollectionViewSet(
 
     queryset = DueCollection.objects.select_related("customer", "collected_by").all()
     serializer_class = DueCollectionSerializer
-    pagination_class = DefaultPagination
+    pagination_class = LedgerPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [
         DjangoFilterBackend,
@@ -265,6 +347,18 @@ class DueCollectionViewSet(
     ]
     ordering = ["-collection_date", "-created_at"]
 
+    export_filename = "due_collections"
+    export_columns = [
+        ("collection_date", "collection_date"),
+        ("customer_id", "customer__customer_id"),
+        ("customer_name", "customer__name"),
+        ("shop_name", "customer__shop_name"),
+        ("collected_by", "collected_by__username"),
+        ("amount", "amount"),
+        ("note", "note"),
+        ("created_at", "created_at"),
+    ]
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         total_amount = queryset.aggregate(total=Sum("amount"))["total"] or 0
@@ -287,15 +381,21 @@ class DueCollectionViewSet(
 
     @extend_schema(
         summary="Bulk create due collections",
-        description="Create multiple due collection (payment) records in a single request",
+        description=(
+            "Create up to 1000 due collection (payment) records atomically. Accepts "
+            "the JSON body below, or the rows alone as a JSON list, text/csv, "
+            "application/x-ndjson or a multipart CSV ``file``."
+        ),
         request=DueCollectionBulkCreateSerializer,
         responses={201: DueCollectionBulkCreateSerializer},
+        parameters=[COMPACT_PARAMETER],
     )
     @action(
         detail=False,
         methods=["post"],
         serializer_class=DueCollectionBulkCreateSerializer,
         url_path="bulk-create",
+        parser_classes=BULK_PARSERS,
     )
     def bulk_create(self, request):
         """
@@ -314,8 +414,36 @@ class DueCollectionViewSet(
                 ...
             ]
         }
+
+        Foreign keys of all rows are resolved with one query per model and
+        the rows are inserted with one bulk INSERT; ``?compact=true`` returns
+        only the created ids.
         """
-        serializer = self.get_serializer(data=request.data)
+        return bulk_create_rows(self, request, "due_collections")
+
+
+@extend_schema(tags=["Sync"])
+class SyncView(views.APIView):
+    """
+    Offline sync for the field app: one request carries a route's day of
+    orders, due sells and due collections, applied in order in a single
+    transaction (see SyncBatchSerializer). The body may be sent with
+    ``Content-Encoding: gzip``.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [GzipJSONParser]
+    serializer_class = SyncBatchSerializer
+
+    @extend_schema(
+        summary="Sync a batch of operations",
+        request=SyncBatchSerializer,
+        responses={200: SyncBatchSerializer},
+    )
+    def post(self, request):
+        serializer = self.serializer_class(
+            data=request.data, context={"request": request, "view": self}
+        )
         serializer.is_valid(raise_exception=True)
-        result = serializer.save()
-        return Response(serializer.to_representation(result), status=201)
+        serializer.save()
+        return Response(serializer.data)
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('area', '0004_area_zone_updated_at_index'),
+        ('user', '0003_remove_profile_zone_profile_areas_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['updated_at', 'id'], name='user_profil_updated_780fe7_idx'),
+        ),
+    ]
@@ -34,3 +34,6 @@ class Profile(BaseModel):
     class Meta:
         verbose_name = "Profile"
         verbose_name_plural = "Profiles"
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),
+        ]
@@ -1,19 +1,84 @@
-from rest_framework import viewsets, mixins, filters
+from decimal import Decimal
+
+from rest_framework import viewsets, mixins, filters, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User, Group
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from .serializers import StaffSerializer, GroupSerializer, DeliveryPersonSerializer
+from apps.core.delta import DeltaSyncMixin
+from apps.core.registry import registry
 from apps.core.utils import DefaultPagination
+from apps.sales.models import DueCollection, DueSell, OrderDelivery
 
 # utils
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
 
+DELIVERY_TOTAL_FIELDS = [
+    "total_due_sell_amount",
+    "total_due_collection_amount",
+    "total_cash_sell_amount",
+    "total_priojon_offer",
+    "total_order_item_amount",
+    "total_damage_amount",
+    "total_free_offer_amount",
+]
+
+
+def annotate_delivery_totals(queryset, date_from=None, date_to=None):
+    """
+    Annotate users with their delivery totals, optionally limited to a date
+    range (DueSell.sale_date, DueCollection.collection_date,
+    OrderDelivery.order_date). Each total is a grouped subquery, so the
+    whole page stays a single SQL round trip and can be ordered by any total.
+    """
+
+    def total(model, user_field, date_field, amount_field):
+        rows = model.objects.filter(**{user_field: OuterRef("pk")})
+        if date_from:
+            rows = rows.filter(**{f"{date_field}__gte": date_from})
+        if date_to:
+            rows = rows.filter(**{f"{date_field}__lte": date_to})
+        rows = (
+            rows.order_by()
+            .values(user_field)
+            .annotate(total=Sum(amount_field))
+            .values("total")
+        )
+        return Coalesce(
+            Subquery(rows, output_field=DecimalField(max_digits=16, decimal_places=2)),
+            Value(Decimal("0.00")),
+        )
+
+    return queryset.annotate(
+        total_due_sell_amount=total(DueSell, "deliver_by", "sale_date", "amount"),
+        total_due_collection_amount=total(
+            DueCollection, "collected_by", "collection_date", "amount"
+        ),
+        total_cash_sell_amount=total(
+            OrderDelivery, "order_by", "order_date", "cash_sell_amount"
+        ),
+        total_priojon_offer=total(OrderDelivery, "order_by", "order_date", "priojon_offer"),
+        total_order_item_amount=total(
+            OrderDelivery, "order_by", "order_date", "total_order_items"
+        ),
+        total_damage_amount=total(
+            OrderDelivery, "order_by", "order_date", "total_damage_items"
+        ),
+        total_free_offer_amount=total(
+            OrderDelivery, "order_by", "order_date", "total_free_offer_items"
+        ),
+    )
+
+
 @extend_schema(tags=["Staff"])
 class StaffViewSet(
+    DeltaSyncMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -30,10 +95,12 @@ class StaffViewSet(
 
     queryset = (
         User.objects.select_related("profile")
-        .prefetch_related("groups")
+        .prefetch_related("groups", "profile__areas__zone", "profile__areas__working_days")
         .exclude(is_superuser=True)
     )
     serializer_class = StaffSerializer
+    # Staff rows change with their profile (see apps.core.signals)
+    delta_field = "profile__updated_at"
     pagination_class = DefaultPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [
@@ -90,8 +157,9 @@ class DeliveryPersonViewSet(
 
     queryset = (
         User.objects.select_related("profile")
-        .prefetch_related("groups")
-        .filter(groups__name="Delivery man")
+        .prefetch_related(
+            "groups", "profile__areas__zone", "profile__areas__working_days"
+        )
     )
     serializer_class = DeliveryPersonSerializer
     pagination_class = DefaultPagination
@@ -109,9 +177,29 @@ class DeliveryPersonViewSet(
         "profile__phone_number",
     ]
     
-    ordering_fields = ["username", "email", "date_joined"]
+    ordering_fields = [
+        "username",
+        "email",
+        "date_joined",
+        *DELIVERY_TOTAL_FIELDS,
+    ]
     ordering = ["-date_joined"]
 
+    def get_queryset(self):
+        """Annotate all totals as correlated subqueries so a page is one query."""
+        date_field = serializers.DateField()
+        dates = {}
+        for param in ("date_from", "date_to"):
+            value = self.request.query_params.get(param)
+            try:
+                dates[param] = date_field.to_internal_value(value) if value else None
+            except serializers.ValidationError as exc:
+                raise serializers.ValidationError({param: exc.detail})
+        group_id = registry.id_for("groups", "Delivery man")
+        queryset = super().get_queryset()
+        queryset = queryset.filter(groups=group_id) if group_id else queryset.none()
+        return annotate_delivery_totals(queryset, **dates)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -1,6 +1,8 @@
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 try:
     from decouple import config as config  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover
@@ -128,6 +130,10 @@ CSRF_TRUSTED_ORIGINS = config(
     cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
 )
 
+# Browser clients may send Idempotency-Key on POSTs (see apps.core.idempotency)
+
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
 
 # Internationalization
 
@@ -155,6 +161,32 @@ MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Stock checkpoints: closing snapshots written by build_stock_checkpoints
+# at the end of every "daily" or "monthly" period.
+
+STOCK_CHECKPOINT_PERIOD = config("STOCK_CHECKPOINT_PERIOD", default="monthly")
+
+# Stock types that order posting may not take below zero (comma separated
+# names, e.g. "Regular Stock,Free Stock"). Empty by default, which allows
+# overselling everywhere; list the types to enable the check.
+
+STOCK_GUARDED_TYPES = config(
+    "STOCK_GUARDED_TYPES",
+    default="",
+    cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+)
+
+# Hours a stored Idempotency-Key response is replayed before it expires
+# (expired keys are deleted by purge_idempotency_keys).
+
+IDEMPOTENCY_KEY_TTL_HOURS = config("IDEMPOTENCY_KEY_TTL_HOURS", default=24, cast=int)
+
+# Days deletions are kept for the ?updated_since= change feeds; a client
+# whose watermark is older gets a full reload (deleted by purge_tombstones).
+
+TOMBSTONE_RETENTION_DAYS = config("TOMBSTONE_RETENTION_DAYS", default=90, cast=int)
+
+
 # Spectacular
 
 SPECTACULAR_SETTINGS = {
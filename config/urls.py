@@ -28,6 +28,7 @@ from drf_spectacular.views import (
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("auth/", include("apps.auth.urls")),
+    path("core/", include("apps.core.urls")),
     path("product/", include("apps.product.urls")),
     path("user/", include("apps.user.urls")),
     path("inventory/", include("apps.inventory.urls")),